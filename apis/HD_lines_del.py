@@ -1,34 +1,552 @@
 from importlib.util import source_hash
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Literal
 
-from fastapi import APIRouter
+from fastapi import APIRouter, File, Form, UploadFile, Request, Query
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 
-from .schemas import InputOutputPaths, StatusResponse, ProcessAndComparePath
+from .schemas import LinesInfoRequest, LinesInfoStreamRequest, StatusResponse, ProcessAndComparePath, PipelineRequest, SplitCoordsRequest, CutSlipsRequest, SingleInputPath, TournamentRequest, SweepRequest
 
 from ..workers.获取图片线信息 import get_images_lines_info as process_images_from_folder
-from ..workers.调用算法main import process_and_compare
+from ..workers.获取图片线信息 import extract_image_bytes
+from ..workers.调用算法main import process_and_compare, process_and_compare_streaming, find_slip_starts, run_tournament, is_correct
+from ..workers.模板索引 import TemplateIndex
+from ..workers.算法注册 import available_algorithms, get_algorithm, check_params, run_algorithm_batch
+from ..workers.参数搜索 import run_sweep
+from ..workers.提取并分割 import extract_and_split
+from ..workers.回单切割 import cut_folder
+from ..workers.级联调度 import CascadeScheduler, DEFAULT_TIERS
+from ..workers.切分记忆 import SlipStartMemo
+from .jobs import JobManager
+from .streaming import STREAM_MEDIA_TYPES, stream_events
+
+# 模板索引在第一次查询时才读盘，不拖慢服务启动
+template_index = TemplateIndex()
+# 后台任务：提交后立即返回任务ID，避免大文件夹超过调用方（如 n8n）的HTTP超时
+job_manager = JobManager()
+# 分割结果缓存：每个 (算法, 量化档数) 一个，整个服务进程共享，同一银行同一样式的回单在多次请求之间也能命中。
+# 最多保留 MAX_MEMOS 个（按最近使用淘汰），每个的估算占用不超过 MEMO_MAX_BYTES
+MAX_MEMOS = 8
+MEMO_MAX_BYTES = 16 * 1024 * 1024
+_memos: "OrderedDict[tuple, SlipStartMemo]" = OrderedDict()
+_memos_lock = threading.Lock()
 
 router = APIRouter(
     prefix="/HDLineDel",
+    on_shutdown=[lambda: job_manager.shutdown(wait=False)],
 )
 
-@router.post("/get_images_lines_info")
-def get_images_lines_info_endpoint(request:InputOutputPaths):
-    process_images_from_folder(
+
+def _lines_info_kwargs(request: LinesInfoRequest) -> Dict[str, Any]:
+    return dict(
         source_folder_path=request.source_path,
-        output_folder_path=request.destination_path
+        output_folder_path=request.destination_path,
+        workers=request.workers,
+        chunk_size=request.chunk_size,
+        decode_mode=request.decode_mode,
+        engine=request.engine,
+        cache_path=request.cache_path,
+        resume=request.resume,
+        io_threads=request.io_threads,
+        queue_size=request.queue_size,
+        pdf_dpi=request.pdf_dpi,
+        cut_folder_path=request.cut_folder_path,
+        cut_slips=request.cut_slips,
+        cut_algorithm=request.cut_algorithm,
+        cut_mode=request.cut_mode
     )
 
+
+def _check_algorithm(request: ProcessAndComparePath | PipelineRequest) -> Optional[StatusResponse]:
+    # 级联调度不使用 algorithm，由 _make_cascade 校验
+    if getattr(request, "cascade", False):
+        return None
+    if request.algorithm is not None or request.params:
+        try:
+            check_params(get_algorithm(request.algorithm), request.params)
+        except ValueError as e:
+            return StatusResponse(status="error", message=str(e))
+    return None
+
+
+def _get_memo(request: ProcessAndComparePath | SplitCoordsRequest | PipelineRequest) -> Optional[SlipStartMemo]:
+    """取出请求所用算法的共享缓存；memo_bypass 或级联调度时返回 None。算法无效时抛出 ValueError。"""
+    if request.memo_bypass or getattr(request, "cascade", False):
+        return None
+    func = get_algorithm(request.algorithm)
+    key = (func, request.memo_quantize)
+    with _memos_lock:
+        memo = _memos.get(key)
+        if memo is None:
+            memo = _memos[key] = SlipStartMemo(func, quantize=request.memo_quantize, max_bytes=MEMO_MAX_BYTES)
+            while len(_memos) > MAX_MEMOS:
+                _memos.popitem(last=False)
+        else:
+            _memos.move_to_end(key)
+    return memo
+
+
+def _make_cascade(request: ProcessAndComparePath | SplitCoordsRequest) -> Optional[CascadeScheduler]:
+    """请求开启级联时按层级与阈值新建调度器（每个请求各自统计）；层级无效时抛出 ValueError。"""
+    if not request.cascade:
+        return None
+    if request.params:
+        raise ValueError("级联调度下各层使用默认参数，不能同时设置 params。")
+    return CascadeScheduler(request.cascade_tiers or DEFAULT_TIERS, request.cascade_threshold)
+
+
+def _compare_kwargs(request: ProcessAndComparePath) -> Dict[str, Any]:
+    return dict(
+        input_json_path=request.source_path,
+        gt_json_path=request.gt_path,
+        expected_slips=request.expected_slips,
+        output_folder_path=request.destination_path,
+        template_index=template_index if request.use_templates else None,
+        algorithm=request.algorithm,
+        params=request.params,
+        memo=_get_memo(request),
+        cascade=_make_cascade(request)
+    )
+
+
+def _check_cut_algorithm(request: LinesInfoRequest) -> Optional[StatusResponse]:
+    if request.cut_folder_path and request.cut_algorithm is not None:
+        try:
+            get_algorithm(request.cut_algorithm)
+        except ValueError as e:
+            return StatusResponse(status="error", message=str(e))
+    return None
+
+
+@router.post("/get_images_lines_info")
+def get_images_lines_info_endpoint(request:LinesInfoRequest):
+    error = _check_cut_algorithm(request)
+    if error is not None:
+        return error
+    summary = process_images_from_folder(**_lines_info_kwargs(request))
+
     final_output_path = os.path.join(request.destination_path, "image_info.json")
-    return StatusResponse(message=f"结果已成功保存至: {os.path.abspath(final_output_path)}")
+    return StatusResponse(message=f"结果已成功保存至: {os.path.abspath(final_output_path)}", details=summary)
+
+@router.post("/get_images_lines_info/stream")
+def get_images_lines_info_stream_endpoint(
+        request: LinesInfoStreamRequest,
+        format: Literal["ndjson", "sse"] = Query("ndjson", description="'ndjson' 每行一个JSON；'sse' 为 server-sent events。")
+):
+    """
+    流式提取：每张图片处理完立即推送一个 image 事件（lines、可选的 slip_starts、elapsed_ms），
+    最后推送 summary 事件（与同步接口返回的处理统计相同）。image_info.json 照常生成。
+    """
+    error = _check_cut_algorithm(request)
+    if error is not None:
+        return error
+    slip_fn = None
+    if request.expected_slips is not None:
+        try:
+            slip_fn = find_slip_starts if request.algorithm is None else get_algorithm(request.algorithm)
+        except ValueError as e:
+            return StatusResponse(status="error", message=str(e))
+
+    def make_event(filename, lines):
+        if lines is None:
+            return {"lines": None, "failed": True}
+        event = {"lines": lines}
+        if slip_fn is not None:
+            event["slip_starts"] = slip_fn(lines, request.expected_slips)
+        return event
+
+    kwargs = _lines_info_kwargs(request)
+    return StreamingResponse(stream_events(process_images_from_folder, kwargs, make_event, format), media_type=STREAM_MEDIA_TYPES[format])
+
+
+@router.get("/algorithms")
+def list_algorithms_endpoint():
+    """列出可选的分割算法（只扫描文件名，不导入）。"""
+    return StatusResponse(message="可选的分割算法。", details=available_algorithms())
+
 
 @router.post("/process_and_compare")
 def process_and_compare_endpoint(request:ProcessAndComparePath):
-    process_and_compare(
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+    try:
+        kwargs = _compare_kwargs(request)
+    except ValueError as e:
+        return StatusResponse(status="error", message=str(e))
+
+    compare_fn = process_and_compare_streaming if request.streaming else process_and_compare
+    results = compare_fn(**kwargs)
+
+    details = results if request.streaming else None
+    if not request.streaming:
+        details = {}
+        if kwargs["memo"] is not None:
+            details["memo"] = kwargs["memo"].stats()
+        if kwargs["cascade"] is not None:
+            details["cascade"] = kwargs["cascade"].stats()
+        details = details or None
+    return StatusResponse(
+        message=f"结果已成功保存至: {os.path.abspath(request.destination_path)}",
+        details=details
+    )
+
+
+@router.post("/process_and_compare/stream")
+def process_and_compare_stream_endpoint(
+        request: ProcessAndComparePath,
+        format: Literal["ndjson", "sse"] = Query("ndjson", description="'ndjson' 每行一个JSON；'sse' 为 server-sent events。")
+):
+    """
+    流式评测：每张图片算完立即推送一个 image 事件（raw 起始线、GT、Val、correct、elapsed_ms），
+    最后推送带准确率统计的 summary 事件。结果文件照常生成（内容与非流式相同）。
+    """
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+    try:
+        kwargs = _compare_kwargs(request)
+    except ValueError as e:
+        return StatusResponse(status="error", message=str(e))
+
+    def make_event(filename, result):
+        return {"raw": result["raw"], "GT": result["GT"], "Val": result["Val"], "correct": is_correct(result)}
+
+    return StreamingResponse(
+        stream_events(process_and_compare_streaming, kwargs, make_event, format), media_type=STREAM_MEDIA_TYPES[format]
+    )
+
+
+def _pipeline_kwargs(request: PipelineRequest) -> Dict[str, Any]:
+    return dict(
+        source_folder_path=request.source_path,
+        expected_slips=request.expected_slips,
+        algorithm=request.algorithm,
+        params=request.params,
+        gt_json_path=request.gt_path,
+        output_folder_path=request.destination_path,
+        save_intermediate=request.save_intermediate,
+        template_index=template_index if request.use_templates else None,
+        memo=_get_memo(request),
+        workers=request.workers,
+        chunk_size=request.chunk_size,
+        decode_mode=request.decode_mode,
+        engine=request.engine,
+        cache_path=request.cache_path,
+        io_threads=request.io_threads,
+        queue_size=request.queue_size,
+        pdf_dpi=request.pdf_dpi
+    )
+
+
+def _extract_and_split_summary(**kwargs) -> Dict[str, Any]:
+    # 流式推送与后台任务已经逐张给出了结果，最终的统计里不再重复一遍
+    summary = extract_and_split(**kwargs)
+    summary.pop("results", None)
+    return summary
+
+
+@router.post("/pipeline")
+def pipeline_endpoint(request: PipelineRequest):
+    """
+    一体化处理：一次请求完成 提取线坐标 → 分割（→ 可选的GT比较），坐标在内存中直接交给算法，
+    不再写出并重新解析 image_info.json。details 中的 results 为每张图片的 lines 与 slip_starts。
+    """
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+    if request.save_intermediate and not request.destination_path:
+        return StatusResponse(status="error", message="save_intermediate 需要同时设置 destination_path。")
+    summary = extract_and_split(**_pipeline_kwargs(request))
+    if not summary:
+        return StatusResponse(status="error", message="一体化处理未能运行，请检查输入文件夹、GT文件与参数。")
+    return StatusResponse(
+        status="success" if summary["results"] else "error",
+        message=f"已处理 {len(summary['results'])} / {summary['total']} 张图片。",
+        details=summary
+    )
+
+
+@router.post("/pipeline/stream")
+def pipeline_stream_endpoint(
+        request: PipelineRequest,
+        format: Literal["ndjson", "sse"] = Query("ndjson", description="'ndjson' 每行一个JSON；'sse' 为 server-sent events。")
+):
+    """一体化处理的流式版本：每张图片推送 lines / slip_starts（有GT时含 GT、Val、correct），最后推送 summary。"""
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+
+    def make_event(filename, item):
+        if item is None:
+            return {"lines": None, "failed": True}
+        event = dict(item)
+        if "GT" in item:
+            event["correct"] = is_correct(item)
+        return event
+
+    return StreamingResponse(
+        stream_events(_extract_and_split_summary, _pipeline_kwargs(request), make_event, format),
+        media_type=STREAM_MEDIA_TYPES[format]
+    )
+
+
+@router.post("/split_coords")
+def split_coords_endpoint(request: SplitCoordsRequest):
+    """
+    已有线坐标时直接分割：请求体里带 {图片ID: [0, ..., 高度]}，一次返回整批的各联起始线。
+    算法有整批接口时向量化计算，否则按 workers 用进程池或逐张计算（见 算法注册.run_algorithm_batch）。
+    开启 cascade 时逐张级联调度，details 中另含各层统计。
+    """
+    ids = list(request.coords)
+    start = time.perf_counter()
+    try:
+        cascade = _make_cascade(request)
+        memo = _get_memo(request)
+        if cascade is not None:
+            starts, mode = [cascade(request.coords[i], request.expected_slips) for i in ids], "cascade"
+        else:
+            starts, mode = run_algorithm_batch(
+                request.algorithm, [request.coords[i] for i in ids], request.expected_slips, request.params, request.workers,
+                memo
+            )
+    except ValueError as e:
+        return StatusResponse(status="error", message=str(e))
+    except Exception as e:
+        return StatusResponse(status="error", message=f"分割失败: {e}")
+    details = {
+        "results": dict(zip(ids, starts)),
+        "mode": mode,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 3),
+    }
+    if memo is not None:
+        details["memo"] = memo.stats()
+    if cascade is not None:
+        details["cascade"] = cascade.stats()
+    return StatusResponse(message=f"已分割 {len(ids)} 张图片。", details=details)
+
+
+@router.post("/cut_slips")
+def cut_slips_endpoint(request: CutSlipsRequest):
+    """按各联起始线把文件夹中的回单切成每联一张图片（原文件名_slipN.扩展名）。"""
+    try:
+        summary = cut_folder(
+            source_folder_path=request.source_path,
+            output_folder_path=request.destination_path,
+            slip_starts=request.slip_starts,
+            info_json_path=request.info_path,
+            expected_slips=request.expected_slips,
+            algorithm=request.algorithm,
+            params=request.params,
+            mode=request.mode,
+            snap_to_mcu=request.snap_to_mcu,
+            quality=request.quality,
+            threads=request.threads
+        )
+    except ValueError as e:
+        return StatusResponse(status="error", message=str(e))
+    except Exception as e:
+        return StatusResponse(status="error", message=f"切割失败: {e}")
+    return StatusResponse(
+        status="success" if summary["images"] else "error",
+        message=f"{summary['images']} 张图片切出 {summary['slips']} 联，结果保存至: {os.path.abspath(request.destination_path)}",
+        details=summary
+    )
+
+
+@router.post("/tournament")
+def tournament_endpoint(request: TournamentRequest):
+    """所有算法 x 所有联数设置的准确率/耗时矩阵。"""
+    matrix = run_tournament(
         input_json_path=request.source_path,
         gt_json_path=request.gt_path,
-        expected_slips=request.expected_slips,
+        slips_settings=request.slips_settings,
+        algorithms=request.algorithms,
+        workers=request.workers,
         output_folder_path=request.destination_path
     )
+    if not matrix:
+        return StatusResponse(status="error", message="锦标赛未能运行，请检查输入文件与算法名。")
+    return StatusResponse(message=f"结果已成功保存至: {os.path.abspath(request.destination_path)}", details=matrix)
+
+
+@router.post("/sweep")
+def sweep_endpoint(request: SweepRequest):
+    """按网格或随机方式搜索各算法的常数，返回每组参数的准确率/耗时与帕累托前沿。"""
+    summary = run_sweep(
+        input_json_path=request.source_path,
+        gt_json_path=request.gt_path,
+        search_spaces=request.search_spaces,
+        mode=request.mode,
+        n_samples=request.n_samples,
+        seed=request.seed,
+        slips_settings=request.slips_settings,
+        workers=request.workers,
+        cache_path=request.cache_path,
+        output_folder_path=request.destination_path
+    )
+    if not summary:
+        return StatusResponse(status="error", message="参数搜索未能运行，请检查输入文件。")
+    return StatusResponse(message=f"结果已成功保存至: {os.path.abspath(request.destination_path)}", details=summary)
+
+
+@router.post("/build_template_index")
+def build_template_index_endpoint(request: SingleInputPath):
+    """从标准答案（source_path 为 image_GT.json 路径）学习各银行/样式模板的分割比例并保存。"""
+    try:
+        count = template_index.learn_from_gt(request.source_path)
+        template_index.save()
+    except (OSError, json.JSONDecodeError, ValueError) as e:
+        return StatusResponse(status="error", message=f"无法建立模板索引: {e}")
+    return StatusResponse(
+        message=f"已学习 {count} 个模板，索引保存至: {os.path.abspath(template_index.index_path)}",
+        details=template_index.stats()
+    )
+
+
+def _extract_uploaded(
+        image_bytes: bytes,
+        expected_slips: Optional[int],
+        decode_mode: Literal["full", "strip", "coarse"],
+        engine: Literal["contour", "projection"],
+        algorithm: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    处理一张内存中的图片：返回坐标列表，指定联数时附带各联起始线（algorithm 为 None 时用默认算法）。
+    """
+    y_coords, img_height = extract_image_bytes(image_bytes, decode_mode=decode_mode, engine=engine)
+    final_data = [0] + y_coords + [img_height]
+    result: Dict[str, Any] = {"lines": final_data}
+    if expected_slips is not None:
+        slip_fn = find_slip_starts if algorithm is None else get_algorithm(algorithm)
+        result["slip_starts"] = slip_fn(final_data, expected_slips)
+    return result
+
+
+@router.post("/extract_lines_upload")
+def extract_lines_upload_endpoint(
+        files: List[UploadFile] = File(..., description="一张或多张图片（multipart/form-data）。"),
+        expected_slips: Optional[int] = Form(None, description="设置后一并返回各联起始线，<=0 为自动判断联数。"),
+        decode_mode: Literal["full", "strip", "coarse"] = Form("full", description="'full' 整图解码；'strip' 只解码左侧窄条；'coarse' 先缩小解码找候选带再精查。"),
+        engine: Literal["contour", "projection"] = Form("contour", description="'contour' 或 'projection'。"),
+        algorithm: Optional[str] = Form(None, description="分割算法名，不填为结构匹配算法。")
+):
+    if algorithm is not None:
+        try:
+            get_algorithm(algorithm)
+        except ValueError as e:
+            return StatusResponse(status="error", message=str(e))
+
+    results = {}
+    failures = {}
+    for upload in files:
+        try:
+            results[upload.filename] = _extract_uploaded(upload.file.read(), expected_slips, decode_mode, engine, algorithm)
+        except Exception as e:
+            failures[upload.filename] = str(e)
+
+    return StatusResponse(
+        status="success" if results else "error",
+        message=f"已处理 {len(results)} 张图片，失败 {len(failures)} 张。",
+        details={"results": results, "failures": failures}
+    )
+
+
+@router.post("/extract_lines_binary")
+async def extract_lines_binary_endpoint(
+        request: Request,
+        filename: str = Query("image", description="返回结果中使用的图片名称。"),
+        expected_slips: Optional[int] = Query(None, description="设置后一并返回各联起始线，<=0 为自动判断联数。"),
+        decode_mode: Literal["full", "strip", "coarse"] = Query("full", description="'full' 整图解码；'strip' 只解码左侧窄条；'coarse' 先缩小解码找候选带再精查。"),
+        engine: Literal["contour", "projection"] = Query("contour", description="'contour' 或 'projection'。"),
+        algorithm: Optional[str] = Query(None, description="分割算法名，不填为结构匹配算法。")
+):
+    """请求体直接是一张图片的二进制内容（如 application/octet-stream、image/jpeg）。"""
+    image_bytes = await request.body()
+    try:
+        # 解码与检测是CPU密集的同步操作，放到线程池里，避免阻塞事件循环
+        result = await run_in_threadpool(_extract_uploaded, image_bytes, expected_slips, decode_mode, engine, algorithm)
+    except Exception as e:
+        return StatusResponse(status="error", message=f"图片 '{filename}' 处理失败: {e}")
+
+    return StatusResponse(message="处理完成。", details={"results": {filename: result}, "failures": {}})
+
+
+@router.post("/jobs/get_images_lines_info")
+def submit_lines_info_job_endpoint(request: LinesInfoRequest):
+    """后台提取文件夹的线信息，立即返回任务ID；取消后再次提交同一文件夹会从中断处继续。"""
+    error = _check_cut_algorithm(request)
+    if error is not None:
+        return error
+    try:
+        job_id = job_manager.submit("get_images_lines_info", process_images_from_folder, **_lines_info_kwargs(request))
+    except RuntimeError as e:
+        return StatusResponse(status="error", message=str(e))
+    return StatusResponse(message="任务已提交。", details={"job_id": job_id})
+
+
+@router.post("/jobs/process_and_compare")
+def submit_compare_job_endpoint(request: ProcessAndComparePath):
+    """后台流式评测（总是按 streaming 模式运行），立即返回任务ID。"""
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+    try:
+        job_id = job_manager.submit("process_and_compare", process_and_compare_streaming, **_compare_kwargs(request))
+    except (ValueError, RuntimeError) as e:
+        return StatusResponse(status="error", message=str(e))
+    return StatusResponse(message="任务已提交。", details={"job_id": job_id})
+
+
+@router.post("/jobs/pipeline")
+def submit_pipeline_job_endpoint(request: PipelineRequest):
+    """后台一体化处理，立即返回任务ID；每张图片的 lines / slip_starts 可以从 /jobs/{job_id}/results 分页读取。"""
+    error = _check_algorithm(request)
+    if error is not None:
+        return error
+    try:
+        job_id = job_manager.submit("pipeline", _extract_and_split_summary, **_pipeline_kwargs(request))
+    except RuntimeError as e:
+        return StatusResponse(status="error", message=str(e))
+    return StatusResponse(message="任务已提交。", details={"job_id": job_id})
+
+
+@router.get("/jobs")
+def list_jobs_endpoint():
+    return StatusResponse(message="任务列表。", details=job_manager.list())
+
+
+@router.get("/jobs/{job_id}")
+def job_status_endpoint(job_id: str):
+    """任务状态与进度：done / total / progress(%) / eta_seconds，结束后附带处理统计 summary。"""
+    job = job_manager.status(job_id)
+    if job is None:
+        return StatusResponse(status="error", message=f"任务不存在或已过期: {job_id}")
+    return StatusResponse(message=f"任务状态: {job['state']}", details=job)
+
+
+@router.get("/jobs/{job_id}/results")
+def job_results_endpoint(
+        job_id: str,
+        offset: int = Query(0, ge=0, description="从第几条开始读，通常用上次返回的 next_offset。"),
+        limit: Optional[int] = Query(1000, ge=1, description="最多返回多少条。")
+):
+    """分页读取任务已产出的 [名称, 结果]，任务运行中也可以读到已完成的部分。"""
+    results = job_manager.results(job_id, offset, limit)
+    if results is None:
+        return StatusResponse(status="error", message=f"任务不存在或已过期: {job_id}")
+    return StatusResponse(message=f"返回 {len(results['items'])} 条结果。", details=results)
+
 
-    return StatusResponse(message=f"结果已成功保存至: {os.path.abspath(request.destination_path)}")
+@router.post("/jobs/{job_id}/cancel")
+def cancel_job_endpoint(job_id: str):
+    """取消任务：排队中的直接取消，运行中的在处理完当前图片后停止。"""
+    state = job_manager.cancel(job_id)
+    if state is None:
+        return StatusResponse(status="error", message=f"任务不存在或已过期: {job_id}")
+    return StatusResponse(message=f"已请求取消，当前状态: {state}", details={"job_id": job_id, "state": state})
@@ -0,0 +1,236 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# 同时运行的任务数上限，超出的任务排队等待
+MAX_CONCURRENT_JOBS = 2
+# 排队加运行中的任务数上限，超出时拒绝提交
+MAX_ACTIVE_JOBS = 50
+# 内存中最多保留的已结束任务数（连同其结果），超出后淘汰最早结束的
+MAX_FINISHED_JOBS = 100
+
+# 任务状态："queued" 排队中；"running" 运行中；"succeeded" 完成；"failed" 出错；"cancelled" 已取消
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+
+class InMemoryJobStore:
+    """
+    进程内的任务状态存储。JobManager 只通过下面这几个方法访问存储，
+    换成本地的 SQLite/Redis 等实现时保持方法签名不变即可。
+    """
+
+    def __init__(self, max_finished: int = MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, List[Any]] = {}
+        self._finished: List[str] = []
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict[str, Any]):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+            self._results[job["id"]] = []
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get("state") in FINISHED_STATES:
+                self._finished.append(job_id)
+                while len(self._finished) > self.max_finished:
+                    evicted = self._finished.pop(0)
+                    self._jobs.pop(evicted, None)
+                    self._results.pop(evicted, None)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def append_results(self, job_id: str, items: List[Any]):
+        with self._lock:
+            if job_id in self._results:
+                self._results[job_id].extend(items)
+
+    def read_results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> Optional[List[Any]]:
+        with self._lock:
+            results = self._results.get(job_id)
+            if results is None:
+                return None
+            end = len(results) if limit is None else offset + limit
+            return results[offset:end]
+
+
+class JobManager:
+    """
+    把耗时的处理函数放到有界的执行器里后台运行：提交后立即返回任务ID，
+    之后可以查询进度（已完成/总数、预计剩余时间）、分页读取已产出的部分结果、取消任务。
+
+    被提交的函数需要接受 progress_callback(已完成数, 总数或None, 名称, 结果) 与 cancel_event 两个关键字参数，
+    返回的统计字典里带 "cancelled": True 表示响应了取消（见 获取图片线信息.get_images_lines_info）。
+    """
+
+    def __init__(
+            self,
+            max_concurrent: int = MAX_CONCURRENT_JOBS,
+            max_active: int = MAX_ACTIVE_JOBS,
+            store: Optional[InMemoryJobStore] = None,
+            executor: Optional[Executor] = None
+    ):
+        """
+        Args:
+            max_concurrent: 同时运行的任务数上限。
+            max_active: 排队加运行中的任务数上限。
+            store: 任务状态存储，默认为进程内存储。
+            executor: 执行任务的执行器（可换成本地队列的替身），默认为 max_concurrent 个线程的线程池。
+        """
+        self.store = store if store is not None else InMemoryJobStore()
+        self._executor = executor
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_active = max(1, max_active)
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        # 第一次提交任务时才创建线程池，不拖慢服务启动
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="hddel-job")
+            return self._executor
+
+    def submit(self, kind: str, fn: Callable[..., Dict[str, Any]], **kwargs) -> str:
+        """提交任务，返回任务ID。kwargs 原样传给 fn。排队加运行中的任务已达上限时抛出 RuntimeError。"""
+        with self._lock:
+            if len(self._cancel_events) >= self.max_active:
+                raise RuntimeError(f"任务已达上限（{self.max_active} 个排队或运行中），请稍后再提交。")
+        job_id = uuid.uuid4().hex
+        self.store.create({
+            "id": job_id,
+            "kind": kind,
+            "state": "queued",
+            "done": 0,
+            "total": None,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "summary": None,
+            "error": None,
+        })
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = cancel_event
+        future = self._get_executor().submit(self._run, job_id, fn, kwargs, cancel_event)
+        with self._lock:
+            if not future.done():
+                self._futures[job_id] = future
+        return job_id
+
+    def _run(self, job_id: str, fn: Callable[..., Dict[str, Any]], kwargs: Dict[str, Any], cancel_event: threading.Event):
+        try:
+            if cancel_event.is_set():
+                self.store.update(job_id, state="cancelled", finished_at=time.time())
+                return
+            started_at = time.time()
+            self.store.update(job_id, state="running", started_at=started_at)
+            # 断点续跑/缓存命中的部分不计入速度，首次回调（名称为 None）时记下起点
+            baseline = {"done": 0, "at": started_at}
+
+            def progress(done: int, total: Optional[int], name: Optional[str], result: Any):
+                if name is None:
+                    baseline.update(done=done, at=time.time())
+                else:
+                    self.store.append_results(job_id, [[name, result]])
+                fields = {"done": done, "baseline_done": baseline["done"], "baseline_at": baseline["at"]}
+                if total is not None:
+                    fields["total"] = total
+                self.store.update(job_id, **fields)
+
+            summary = fn(**kwargs, progress_callback=progress, cancel_event=cancel_event)
+            state = "cancelled" if summary.get("cancelled") else "succeeded"
+            self.store.update(job_id, state=state, summary=summary, finished_at=time.time())
+        except Exception as e:
+            traceback.print_exc()
+            self.store.update(job_id, state="failed", error=str(e), finished_at=time.time())
+        finally:
+            with self._lock:
+                self._cancel_events.pop(job_id, None)
+                self._futures.pop(job_id, None)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """任务状态、进度与预计剩余时间（秒，无法估计时为 None）。"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        baseline_done = job.pop("baseline_done", 0)
+        baseline_at = job.pop("baseline_at", None)
+        job["eta_seconds"] = None
+        if job["state"] == "running" and job["total"] and baseline_at is not None:
+            rate_done = job["done"] - baseline_done
+            elapsed = time.time() - baseline_at
+            if rate_done > 0 and elapsed > 0:
+                job["eta_seconds"] = round((job["total"] - job["done"]) * elapsed / rate_done, 1)
+        if job["total"]:
+            job["progress"] = round(job["done"] / job["total"] * 100, 2)
+        return job
+
+    def list(self) -> List[Dict[str, Any]]:
+        """所有保留中的任务（按提交时间排序）。"""
+        jobs = (self.status(job["id"]) for job in self.store.list())
+        return sorted((job for job in jobs if job is not None), key=lambda job: job["submitted_at"])
+
+    def results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """分页读取任务已产出的 [名称, 结果]；任务运行中也可以读，next_offset 用于下次续读。"""
+        job = self.store.get(job_id)
+        items = self.store.read_results(job_id, offset, limit)
+        if job is None or items is None:
+            return None
+        return {"state": job["state"], "items": items, "next_offset": offset + len(items)}
+
+    def cancel(self, job_id: str) -> Optional[str]:
+        """请求取消任务，返回取消后的状态；任务不存在时返回 None。运行中的任务在处理完当前图片后停止。"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            event = self._cancel_events.get(job_id)
+            future = self._futures.get(job_id)
+        if event is None:
+            return job["state"]
+        event.set()
+        if future is not None and future.cancel():
+            self._mark_cancelled(job_id)
+            return "cancelled"
+        job = self.store.get(job_id)
+        return job["state"] if job is not None else "cancelled"
+
+    def _mark_cancelled(self, job_id: str):
+        # 还没开始运行就被取消的任务，_run 不会执行，在这里收尾
+        self.store.update(job_id, state="cancelled", finished_at=time.time())
+        with self._lock:
+            self._cancel_events.pop(job_id, None)
+            self._futures.pop(job_id, None)
+
+    def shutdown(self, wait: bool = True):
+        """取消所有未结束的任务并关闭执行器。"""
+        with self._lock:
+            events = list(self._cancel_events.values())
+            futures = list(self._futures.items())
+            executor = self._executor
+        for event in events:
+            event.set()
+        for job_id, future in futures:
+            if future.cancel():
+                self._mark_cancelled(job_id)
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -1,6 +1,7 @@
 
+import os
 from pydantic import BaseModel, Field, DirectoryPath, FilePath
-from typing import Optional, Any, List
+from typing import Optional, Any, Dict, List, Literal
 
 
 # --- 积木 1: 标准状态响应 (你已经定义得很好，我们稍作优化) ---
@@ -24,6 +25,103 @@ class InputOutputPaths(BaseModel):
     destination_path: str = Field(..., description="目标文件夹的完整路径。")
 
 
-class ProcessAndComparePath(InputOutputPaths):
-    gt_path: str = Field(..., description="标准答案(Ground Truth)JSON文件路径。"),
-    expected_slips: int = Field(..., description="期望分割出的回单联数。")
\ No newline at end of file
+class ExtractionOptions(BaseModel):
+    """提取线信息的可选并行/解码参数。"""
+    workers: int = Field(1, ge=1, description="并行进程数，1 为串行模式。")
+    chunk_size: int = Field(16, ge=1, description="并行模式下每次派发给子进程的图片数。")
+    decode_mode: Literal["full", "strip", "coarse"] = Field("full", description="'full' 整图解码；'strip' 只解码左侧窄条（结果一致，速度更快）；'coarse' 先缩小解码找候选带再精查，适合超长图。")
+    engine: Literal["contour", "projection"] = Field("contour", description="绿线检测引擎：'contour' 为 HSV+轮廓，'projection' 为行投影。")
+    cache_path: Optional[str] = Field(None, description="增量缓存文件路径，设置后只解码新增或改动过的图片。")
+    io_threads: int = Field(0, ge=0, description="大于0时启用流水线模式，为预读文件的线程数。")
+    queue_size: int = Field(16, ge=1, description="流水线各阶段之间有界队列的容量。")
+    pdf_dpi: int = Field(200, ge=36, description="文件夹中有 PDF 时的光栅化分辨率，应与原先导出JPEG时一致。")
+
+
+class MemoOptions(BaseModel):
+    """服务进程内共享的分割结果缓存（见 workers/切分记忆.py），相同的坐标列表在多次请求之间直接复用结果。"""
+    memo_bypass: bool = Field(False, description="跳过分割结果缓存，直接计算。")
+    memo_quantize: Optional[int] = Field(None, ge=1, le=10000, description="量化档数（如 1000 表示按千分之一高度分档），几乎相同的坐标列表也能命中；不填只用精确匹配。")
+
+
+class CascadeOptions(BaseModel):
+    """级联调度：按成本从低到高尝试各算法，置信度达到阈值即采纳（见 workers/级联调度.py）。"""
+    cascade: bool = Field(False, description="是否用级联调度代替单个算法，开启后 algorithm 不起作用，且不能设置 params。")
+    cascade_tiers: Optional[List[str]] = Field(None, description="按成本升序的算法名（须提供 find_slip_starts_scored），不填为默认层级。")
+    cascade_threshold: float = Field(0.35, ge=0, le=1, description="采纳结果所需的最低置信度。")
+
+
+class LinesInfoRequest(InputOutputPaths, ExtractionOptions):
+    """提取图片线信息的请求，可选并行参数。"""
+    resume: bool = Field(True, description="是否从上次中断留下的中间结果继续处理。")
+    cut_folder_path: Optional[str] = Field(None, description="设置后顺带把每张回单切成每联一张图片，写入该文件夹。")
+    cut_slips: int = Field(0, description="切割时的联数，<=0 为自动判断。")
+    cut_algorithm: Optional[str] = Field(None, description="切割时使用的分割算法，不填为结构匹配算法。")
+    cut_mode: Literal["auto", "reencode"] = Field("auto", description="'auto' JPEG 切割线落在MCU边界上时无损裁剪，否则解码再编码；'reencode' 总是解码再编码。")
+
+
+class LinesInfoStreamRequest(LinesInfoRequest):
+    """流式提取：每张图片处理完立即推送一条结果，可选一并计算各联起始线。"""
+    expected_slips: Optional[int] = Field(None, description="设置后每条结果附带各联起始线，<=0 为自动判断联数。")
+    algorithm: Optional[str] = Field(None, description="计算起始线用的分割算法名，不填为结构匹配算法。")
+
+
+class ProcessAndComparePath(InputOutputPaths, MemoOptions, CascadeOptions):
+    gt_path: str = Field(..., description="标准答案(Ground Truth)JSON文件路径。")
+    expected_slips: int = Field(..., description="期望分割出的回单联数。")
+    use_templates: bool = Field(False, description="是否先按已学习的银行/样式模板查表，未命中或校验失败的再走完整算法。")
+    algorithm: Optional[str] = Field(None, description="分割算法名（workers 下的 *算法.py，可省略'算法'后缀），不填为结构匹配算法。")
+    params: Dict[str, Any] = Field(default_factory=dict, description="传给算法的额外参数，例如聚类拟合算法的 {\"engine\": \"kmeans\"}。")
+    streaming: bool = Field(False, description="流式评测：边读边算边写，内存与图片数量无关，控制台只打印不一致条目和统计，适合大批量。")
+
+
+class PipelineRequest(SingleInputPath, ExtractionOptions, MemoOptions):
+    """一体化处理：提取线坐标后直接在内存中分割，不经过 image_info.json。"""
+    expected_slips: int = Field(..., description="期望分割出的回单联数，<=0 为自动判断。")
+    algorithm: Optional[str] = Field(None, description="分割算法名（workers 下的 *算法.py，可省略'算法'后缀），不填为结构匹配算法。")
+    params: Dict[str, Any] = Field(default_factory=dict, description="传给算法的额外参数。")
+    gt_path: Optional[str] = Field(None, description="标准答案JSON文件路径（可选），设置后逐张比较并统计准确率。")
+    destination_path: Optional[str] = Field(None, description="结果保存文件夹（可选），不填则只在响应中返回结果。")
+    save_intermediate: bool = Field(False, description="是否同时写出 image_info.json（需要 destination_path）。")
+    use_templates: bool = Field(False, description="是否先按已学习的银行/样式模板查表。")
+
+
+class SplitCoordsRequest(MemoOptions, CascadeOptions):
+    """已经有线坐标、只需要分割的整批请求。"""
+    coords: Dict[str, List[int]] = Field(..., description="{图片ID: [0, ...各线y坐标, 图片高度]}。")
+    expected_slips: int = Field(..., description="期望分割出的回单联数，<=0 为自动判断。")
+    algorithm: Optional[str] = Field(None, description="分割算法名（workers 下的 *算法.py，可省略'算法'后缀），不填为结构匹配算法。")
+    params: Dict[str, Any] = Field(default_factory=dict, description="传给算法的额外参数。")
+    workers: int = Field(1, ge=1, le=os.cpu_count() or 1, description="算法没有整批接口时，图片足够多才用的进程数（不超过CPU核数），1 为逐张计算。")
+
+
+class CutSlipsRequest(InputOutputPaths):
+    """按各联起始线把回单切成每联一张图片：source_path 为图片文件夹，destination_path 为输出文件夹。"""
+    slip_starts: Optional[Dict[str, List[int]]] = Field(None, description="{文件名: 各联起始线}，不填则由 info_path 的线坐标经算法算出。")
+    info_path: Optional[str] = Field(None, description="image_info.json 路径（slip_starts 不填时必填）。")
+    expected_slips: int = Field(0, description="由线坐标计算起始线时的联数，<=0 为自动判断。")
+    algorithm: Optional[str] = Field(None, description="分割算法名，不填为结构匹配算法。")
+    params: Dict[str, Any] = Field(default_factory=dict, description="传给算法的额外参数。")
+    mode: Literal["auto", "reencode"] = Field("auto", description="'auto' JPEG 切割线落在MCU边界上时无损裁剪，否则解码再编码；'reencode' 总是解码再编码。")
+    snap_to_mcu: bool = Field(False, description="把切割线往上对齐到MCU行边界（最多移动 15 像素），让JPEG都能无损裁剪。")
+    quality: int = Field(95, ge=1, le=100, description="重新编码JPEG时的质量。")
+    threads: int = Field(4, ge=1, description="并行解码/编码的线程数。")
+
+
+class TournamentRequest(InputOutputPaths):
+    """多算法锦标赛：一次读入，所有算法 x 所有联数设置并行评测。"""
+    gt_path: str = Field(..., description="标准答案(Ground Truth)JSON文件路径。")
+    slips_settings: List[int] = Field([0, 1, 2, 3], description="要评测的联数设置，0 为自动判断联数。")
+    algorithms: Optional[List[str]] = Field(None, description="参赛算法名，不填为全部可用算法。")
+    workers: Optional[int] = Field(None, ge=1, description="进程数，不填为CPU核数，1 为串行。")
+
+
+class SweepRequest(InputOutputPaths):
+    """算法常数的超参数搜索，报告准确率-耗时的帕累托前沿。"""
+    gt_path: str = Field(..., description="标准答案(Ground Truth)JSON文件路径。")
+    search_spaces: Optional[Dict[str, Dict[str, Any]]] = Field(None, description="{算法名: {参数名: 取值列表 或 {low, high[, num, log]}}}，不填使用默认搜索空间。")
+    mode: Literal["grid", "random"] = Field("grid", description="'grid' 取遍所有组合；'random' 每个算法随机抽 n_samples 组。")
+    n_samples: int = Field(20, ge=1, description="random 模式下每个算法抽取的组合数。")
+    seed: int = Field(0, description="random 模式的随机种子。")
+    slips_settings: List[int] = Field([0, 1, 2, 3], description="每组参数都在这些联数设置下评测。")
+    workers: Optional[int] = Field(None, ge=1, description="进程数，不填为CPU核数，1 为串行。")
+    cache_path: Optional[str] = Field(None, description="评测结果缓存文件，相同的评测下次直接复用。")
@@ -0,0 +1,88 @@
+import json
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# "ndjson": 每行一个JSON对象；"sse": server-sent events（event: 类型 / data: JSON）
+STREAM_FORMATS = ("ndjson", "sse")
+STREAM_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# 处理线程与响应之间的有界队列容量：客户端读得慢时处理线程会等待，内存不会无限增长
+STREAM_QUEUE_SIZE = 256
+
+_POLL_INTERVAL = 0.2
+_DONE = object()
+
+
+def encode_event(event: Dict[str, Any], stream_format: str = "ndjson") -> str:
+    """把一个事件编码为一行 NDJSON 或一条 SSE 消息，事件类型取自 event["type"]。"""
+    data = json.dumps(event, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+def stream_events(
+        fn: Callable[..., Dict[str, Any]],
+        kwargs: Dict[str, Any],
+        make_event: Callable[[str, Any], Dict[str, Any]],
+        stream_format: str = "ndjson"
+) -> Iterator[str]:
+    """
+    在后台线程运行 fn(**kwargs, progress_callback=..., cancel_event=...)，每完成一张就产出一个 "image" 事件，
+    结束时产出一个 "summary" 事件（出错或 fn 返回空统计时为 "error" 事件）。fn 的约定与 jobs.JobManager 相同。
+
+    Args:
+        fn: 处理函数，如 get_images_lines_info、process_and_compare_streaming。
+        kwargs: 传给 fn 的参数。
+        make_event: (名称, 回调给出的结果) -> 事件字段，type / index / elapsed_ms 由这里补上。
+        stream_format: 见 STREAM_FORMATS。
+
+    客户端断开（生成器被关闭）时通过 cancel_event 让 fn 在下一张图片处停止。
+    """
+    events: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    cancel_event = threading.Event()
+    start = time.perf_counter()
+
+    def _put(item) -> bool:
+        while not cancel_event.is_set():
+            try:
+                events.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def progress(done: int, total: Optional[int], name: Optional[str], result: Any):
+        if name is None:
+            return
+        event = {"type": "image", "index": done, "total": total, "file": name}
+        event.update(make_event(name, result))
+        event["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _put(event)
+
+    def _worker():
+        try:
+            summary = fn(**kwargs, progress_callback=progress, cancel_event=cancel_event)
+            if not summary:
+                event = {"type": "error", "message": "处理未能运行，请检查输入文件与参数（详见服务日志）。"}
+            else:
+                event = {"type": "summary", **summary}
+        except Exception as e:
+            traceback.print_exc()
+            event = {"type": "error", "message": str(e)}
+        event["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        _put(event)
+        _put(_DONE)
+
+    thread = threading.Thread(target=_worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = events.get()
+            if item is _DONE:
+                return
+            yield encode_event(item, stream_format)
+    finally:
+        cancel_event.set()
@@ -0,0 +1,84 @@
+import numpy as np
+from typing import List, Sequence, Tuple
+
+# "l2": K-Means（簇内平方和）；"l1": K-Medians（到簇中位数的距离之和）
+METRICS = ("l2", "l1")
+
+
+def _segment_cost_matrix(points: np.ndarray, metric: str) -> np.ndarray:
+    """
+    用前缀和一次算出所有连续区间 points[j:i] 的簇内成本，C[j, i]（j < i），其余位置为 inf。
+    """
+    n = len(points)
+    # 先减去均值再做前缀和，减小大坐标下平方和相减的舍入误差
+    x = points - points.mean()
+    p1 = np.concatenate(([0.0], np.cumsum(x)))
+    j = np.arange(n + 1)[:, None]
+    i = np.arange(n + 1)[None, :]
+    valid = j < i
+    m = np.where(valid, i - j, 1)
+
+    if metric == "l2":
+        p2 = np.concatenate(([0.0], np.cumsum(x * x)))
+        s1 = p1[i] - p1[j]
+        cost = (p2[i] - p2[j]) - s1 * s1 / m
+        cost = np.maximum(cost, 0.0)
+    elif metric == "l1":
+        # 有序数据的中位数为 x[mid]，成本 = (上半部分之和 - 下半部分之和) 再按中位数校正
+        mid = np.where(valid, j + (m - 1) // 2, 0)
+        median = x[np.minimum(mid, n - 1)]
+        lower = median * (mid - j) - (p1[mid] - p1[j])
+        upper = (p1[i] - p1[np.minimum(mid + 1, n)]) - median * (i - mid - 1)
+        cost = np.maximum(lower + upper, 0.0)
+    else:
+        raise ValueError(f"未知的成本度量: {metric}，可选: {METRICS}")
+    return np.where(valid, cost, np.inf)
+
+
+def optimal_kmeans_1d(
+        points: Sequence[float],
+        max_k: int,
+        metric: str = "l2"
+) -> Tuple[List[float], List[List[int]]]:
+    """
+    一维数据的精确最优 K-Means / K-Medians（动态规划），一次算出 K=1..max_k 的全部结果。
+
+    一维数据的最优聚类一定是排序后的连续区间，所以问题等价于把有序序列切成 K 段：
+    D[k][i] = min_j (D[k-1][j] + C[j, i])，区间成本 C 由前缀和 O(1) 得到。
+    整个矩阵运算在 NumPy 中完成，几百条线也只需几毫秒。
+
+    Args:
+        points: 数据点（无需排序）。
+        max_k: 最大簇数，超过点数时按点数截断。
+        metric: "l2" 为簇内平方和（K-Means），"l1" 为到簇中位数的距离之和（K-Medians）。
+
+    Returns:
+        (costs, starts)：costs[k-1] 为分成 k 簇的最小成本；
+        starts[k-1] 为各簇第一个点在排序后序列中的下标（升序，首项恒为 0）。
+    """
+    x = np.sort(np.asarray(points, dtype=np.float64))
+    n = len(x)
+    max_k = min(max_k, n)
+    if max_k <= 0:
+        return [], []
+
+    cost = _segment_cost_matrix(x, metric)
+    layer = cost[0].copy()
+    costs = [float(layer[n])]
+    choices = [np.zeros(n + 1, dtype=np.int64)]
+    for _ in range(2, max_k + 1):
+        total = layer[:, None] + cost
+        choice = np.argmin(total, axis=0)
+        layer = total[choice, np.arange(n + 1)]
+        costs.append(float(layer[n]))
+        choices.append(choice)
+
+    starts = []
+    for k in range(1, max_k + 1):
+        bounds = []
+        end = n
+        for level in range(k - 1, -1, -1):
+            end = int(choices[level][end])
+            bounds.append(end)
+        starts.append(bounds[::-1])
+    return costs, starts
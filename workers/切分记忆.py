@@ -0,0 +1,307 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# "lru": 淘汰最久未使用的条目；"lfu": 淘汰使用次数最少的条目（次数相同再按最久未使用）
+EVICTION_POLICIES = ("lru", "lfu")
+# 缓存占用的估算上限（字节），与 max_entries 同时生效
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# 两次检查算法源文件之间的最短间隔（秒）。每次调用都 stat 一遍比命中缓存本身还慢
+FINGERPRINT_CHECK_INTERVAL = 1.0
+# 估算条目大小：每个条目的固定开销（键元组、字典槽位、结果列表），以及键和结果里每个整数的开销
+_ENTRY_OVERHEAD_BYTES = 256
+_ITEM_BYTES = 36
+
+
+def _source_path(func: Callable) -> Optional[str]:
+    """算法函数所在源文件的路径，拿不到时返回 None。"""
+    try:
+        return inspect.getsourcefile(func) or None
+    except TypeError:
+        return None
+
+
+def _file_fingerprint(path: Optional[str]) -> Optional[Tuple[int, int]]:
+    """源文件的 (大小, 修改时间)，拿不到时返回 None。"""
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def _entry_bytes(key: Hashable, value: List[int]) -> int:
+    return _ENTRY_OVERHEAD_BYTES + _ITEM_BYTES * (len(key[1]) + len(value))
+
+
+class SlipStartMemo:
+    """
+    放在任意 find_slip_starts 前面的有界记忆化缓存。
+
+    - 精确键：完整坐标列表 + 联数 + 其它参数，命中时结果与重新计算完全相同；
+    - 量化键（可选，quantize>0）：坐标除以图片高度后分成 quantize 档。同一银行同一样式的回单
+      坐标往往只差一两个像素，也能命中。量化键下存的是结果在坐标列表中的下标，
+      命中时换算成当前图片自己的坐标，所以返回的仍是当前图片上真实存在的线；
+    - 条目数超过 max_entries 或估算占用超过 max_bytes 时按 LRU 或 LFU 淘汰；
+    - 算法源文件（大小或修改时间）变化时整个缓存自动清空（最多每 FINGERPRINT_CHECK_INTERVAL 秒检查一次，
+      batch 每批检查一次）；
+    - 每次调用都可以传 bypass=True 跳过缓存直接计算；
+    - batch 整批查缓存，未命中的部分可以交给算法的整批接口一次算完。
+    """
+
+    def __init__(
+            self,
+            func: Callable[..., List[int]],
+            max_entries: int = 4096,
+            policy: str = "lru",
+            quantize: Optional[int] = None,
+            max_bytes: int = DEFAULT_MAX_BYTES
+    ):
+        """
+        Args:
+            func: 被记忆化的 find_slip_starts(coords_with_boundaries, num_slips, **kwargs)。
+            max_entries: 最多缓存的条目数。
+            max_bytes: 缓存占用的估算上限（字节）。
+            policy: 淘汰策略，见 EVICTION_POLICIES。
+            quantize: 量化档数（例如 1000 表示按千分之一高度分档），None 或 0 表示只用精确键。
+        """
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"未知的淘汰策略: {policy}，可选: {EVICTION_POLICIES}")
+        self.func = func
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.policy = policy
+        self.quantize = quantize or None
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._bytes = 0
+        # LFU：使用次数 -> 该次数下的键（按最近使用排序）
+        self._counts: Dict[Hashable, int] = {}
+        self._buckets: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        self._min_count = 0
+        self._source_path = _source_path(func)
+        self._fingerprint = _file_fingerprint(self._source_path)
+        self._next_check = time.monotonic() + FINGERPRINT_CHECK_INTERVAL
+        self.exact_hits = 0
+        self.quantized_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __call__(self, coords_with_boundaries: List[int], num_slips: int, bypass: bool = False, **kwargs) -> List[int]:
+        if bypass:
+            with self._lock:
+                self.bypassed += 1
+            return self.func(coords_with_boundaries, num_slips, **kwargs)
+
+        extra = tuple(sorted(kwargs.items())) if kwargs else ()
+        keys = self._keys(coords_with_boundaries, num_slips, extra)
+        with self._lock:
+            if time.monotonic() >= self._next_check:
+                self._check_fingerprint()
+            result = self._get(coords_with_boundaries, keys)
+        if result is not None:
+            return result
+
+        result = self.func(coords_with_boundaries, num_slips, **kwargs)
+        with self._lock:
+            self._put(coords_with_boundaries, keys, result)
+        return result
+
+    def batch(
+            self,
+            coords_list: List[List[int]],
+            num_slips: int,
+            batch_fn: Optional[Callable[[List[List[int]], int], List[List[int]]]] = None,
+            **kwargs
+    ) -> List[List[int]]:
+        """
+        整批计算：算法源文件只检查一次，先整批查缓存，未命中的交给 batch_fn(坐标列表, 联数)
+        （例如包装了算法 find_slip_starts_batch 的函数）一次算完，没有 batch_fn 时逐张调用 func。
+        结果与逐张调用本对象完全相同。
+        """
+        extra = tuple(sorted(kwargs.items())) if kwargs else ()
+        keys = [self._keys(coords, num_slips, extra) for coords in coords_list]
+        results: List[Optional[List[int]]] = [None] * len(coords_list)
+        with self._lock:
+            self._check_fingerprint()
+            for i, coords in enumerate(coords_list):
+                results[i] = self._get(coords, keys[i])
+        missing = [i for i, result in enumerate(results) if result is None]
+        if not missing:
+            return results
+        # 同一批里重复的坐标只算一次
+        first: Dict[Hashable, int] = {}
+        for i in missing:
+            first.setdefault(keys[i][0], i)
+        todo = list(first.values())
+        if batch_fn is not None:
+            computed = batch_fn([coords_list[i] for i in todo], num_slips)
+        else:
+            computed = [self.func(coords_list[i], num_slips, **kwargs) for i in todo]
+        by_key = {}
+        with self._lock:
+            for i, result in zip(todo, computed):
+                self._put(coords_list[i], keys[i], result)
+                by_key[keys[i][0]] = result
+        for i in missing:
+            result = by_key[keys[i][0]]
+            results[i] = result if i == first[keys[i][0]] else list(result)
+        return results
+
+    def _keys(self, coords: List[int], num_slips: int, extra: tuple) -> Tuple[Hashable, Optional[Hashable]]:
+        return ("exact", tuple(coords), num_slips, extra), self._quantized_key(coords, num_slips, extra)
+
+    def _get(self, coords: List[int], keys: Tuple[Hashable, Optional[Hashable]]) -> Optional[List[int]]:
+        """[调用方需持有锁] 查精确键、再查量化键并计入统计，未命中返回 None。"""
+        exact_key, quantized_key = keys
+        result = self._lookup(exact_key)
+        if result is not None:
+            self.exact_hits += 1
+            return list(result)
+        if quantized_key is not None:
+            indices = self._lookup(quantized_key)
+            if indices is not None:
+                self.quantized_hits += 1
+                return [coords[i] for i in indices]
+        self.misses += 1
+        return None
+
+    def _put(self, coords: List[int], keys: Tuple[Hashable, Optional[Hashable]], result: List[int]):
+        """[调用方需持有锁]"""
+        exact_key, quantized_key = keys
+        self._store(exact_key, list(result))
+        if quantized_key is not None:
+            positions = {value: i for i, value in enumerate(coords)}
+            # 结果里有不在坐标列表中的值时无法换算，只存精确键
+            if all(value in positions for value in result):
+                self._store(quantized_key, [positions[value] for value in result])
+
+    def _quantized_key(self, coords: List[int], num_slips: int, extra: tuple) -> Optional[Hashable]:
+        if not self.quantize or len(coords) < 2 or coords[-1] <= 0:
+            return None
+        height = coords[-1]
+        buckets = tuple(round(c * self.quantize / height) for c in coords)
+        return "quantized", buckets, num_slips, extra
+
+    def _check_fingerprint(self):
+        """[调用方需持有锁] 算法源文件变了就清空缓存。"""
+        self._next_check = time.monotonic() + FINGERPRINT_CHECK_INTERVAL
+        fingerprint = _file_fingerprint(self._source_path)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._clear()
+            self.invalidations += 1
+
+    def _lookup(self, key: Hashable) -> Optional[List[int]]:
+        value = self._entries.get(key)
+        if value is None:
+            return None
+        self._entries.move_to_end(key)
+        if self.policy == "lfu":
+            self._touch(key)
+        return value
+
+    def _store(self, key: Hashable, value: List[int]):
+        size = _entry_bytes(key, value)
+        if key in self._entries:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._bytes += size - self._sizes[key]
+            self._sizes[key] = size
+            return
+        while self._entries and (len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes):
+            self._evict()
+        self._entries[key] = value
+        self._sizes[key] = size
+        self._bytes += size
+        if self.policy == "lfu":
+            self._counts[key] = 1
+            self._buckets.setdefault(1, OrderedDict())[key] = None
+            self._min_count = 1
+
+    def _touch(self, key: Hashable):
+        """[LFU] 使用次数 +1，把键挪到下一档。"""
+        count = self._counts[key]
+        bucket = self._buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[count]
+            if self._min_count == count:
+                self._min_count = count + 1
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+    def _evict(self):
+        if self.policy == "lru":
+            key, _ = self._entries.popitem(last=False)
+        else:
+            bucket = self._buckets[self._min_count]
+            key, _ = bucket.popitem(last=False)
+            if not bucket:
+                del self._buckets[self._min_count]
+                # 淘汰后最少次数那一档空了，下一个最少次数需要重新找
+                self._min_count = min(self._buckets) if self._buckets else 0
+            del self._counts[key]
+            del self._entries[key]
+        self._bytes -= self._sizes.pop(key)
+        self.evictions += 1
+
+    def _clear(self):
+        self._entries.clear()
+        self._sizes.clear()
+        self._bytes = 0
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+    def clear(self):
+        """手动清空缓存（统计数据保留）。"""
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计。"""
+        with self._lock:
+            lookups = self.exact_hits + self.quantized_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy,
+                "exact_hits": self.exact_hits,
+                "quantized_hits": self.quantized_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round((self.exact_hits + self.quantized_hits) / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def memoize_slip_starts(
+        func: Optional[Callable[..., List[int]]] = None,
+        max_entries: int = 4096,
+        policy: str = "lru",
+        quantize: Optional[int] = None,
+        max_bytes: int = DEFAULT_MAX_BYTES
+):
+    """
+    SlipStartMemo 的装饰器写法：
+
+        @memoize_slip_starts(quantize=1000)
+        def find_slip_starts(coords_with_boundaries, num_slips): ...
+
+    也可以直接包装已有函数：memoize_slip_starts(find_slip_starts, policy="lfu")。
+    """
+    if func is None:
+        return lambda f: SlipStartMemo(f, max_entries, policy, quantize, max_bytes)
+    return SlipStartMemo(func, max_entries, policy, quantize, max_bytes)
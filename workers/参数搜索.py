@@ -0,0 +1,239 @@
+import hashlib
+import inspect
+import itertools
+import json
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .算法注册 import get_algorithm, check_params
+from .调用算法main import (
+    TOURNAMENT_SLIPS, load_evaluation_records, init_evaluation_worker, evaluate_algorithm
+)
+
+# "grid": 取遍所有组合；"random": 每个算法随机抽 n_samples 组
+SEARCH_MODES = ("grid", "random")
+
+# 默认的搜索空间：各算法写死的经验常数（默认值都包含在内，便于和现状对比）。
+# 列表为离散取值；{"low", "high"} 为连续区间（grid 模式需再给 "num"，取等距的 num 个点；
+# 两端都是整数时按整数取值；"log": true 时按对数均匀取值）
+DEFAULT_SEARCH_SPACES = {
+    "结构匹配算法": {"match_threshold": [0.02, 0.03, 0.05, 0.08, 0.1, 0.15]},
+    "簇过滤算法": {"clustering_threshold": [200, 300, 400, 500, 600, 800]},
+    "奥卡姆剃刀算法": {"significant_ratio": [1.25, 1.5, 2.0, 3.0, 5.0, 8.0]},
+    "稳健间距算法": {"gap_multiplier": [2, 3, 5, 8], "min_break_gap": [100, 150, 300, 500]},
+}
+
+
+def _grid_values(space: Any) -> List[Any]:
+    if isinstance(space, list):
+        return space
+    low, high, num = space["low"], space["high"], space.get("num", 5)
+    if num <= 1:
+        return [low]
+    if space.get("log"):
+        values = [low * (high / low) ** (i / (num - 1)) for i in range(num)]
+    else:
+        values = [low + (high - low) * i / (num - 1) for i in range(num)]
+    if isinstance(low, int) and isinstance(high, int):
+        values = sorted(set(round(v) for v in values))
+    return values
+
+
+def _random_value(space: Any, rng: random.Random) -> Any:
+    if isinstance(space, list):
+        return rng.choice(space)
+    low, high = space["low"], space["high"]
+    if isinstance(low, int) and isinstance(high, int) and not space.get("log"):
+        return rng.randint(low, high)
+    if space.get("log"):
+        value = low * (high / low) ** rng.random()
+    else:
+        value = rng.uniform(low, high)
+    return round(value) if isinstance(low, int) and isinstance(high, int) else value
+
+
+def expand_search_space(space: Dict[str, Any], mode: str = "grid", n_samples: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    """把一个算法的搜索空间展开成参数组合列表（已去重，顺序固定）。"""
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"未知的搜索方式: {mode}，可选: {SEARCH_MODES}")
+    names = sorted(space)
+    if mode == "grid":
+        combos = itertools.product(*(_grid_values(space[name]) for name in names))
+    else:
+        rng = random.Random(seed)
+        combos = (tuple(_random_value(space[name], rng) for name in names) for _ in range(n_samples))
+    unique = dict.fromkeys(combos)
+    return [dict(zip(names, combo)) for combo in unique]
+
+
+def _code_digest(algorithm: str) -> str:
+    """算法模块及其引用的本包模块（如 均衡分割算法、变化点检测）源码的摘要，源码一改缓存即失效。"""
+    module = get_algorithm(algorithm).__module__
+    files = {sys.modules[module].__file__}
+    for value in vars(sys.modules[module]).values():
+        owner = value.__name__ if inspect.ismodule(value) else getattr(value, "__module__", None)
+        if isinstance(owner, str) and owner.startswith(f"{__package__}.") and owner in sys.modules:
+            files.add(sys.modules[owner].__file__)
+    digest = hashlib.sha1()
+    for path in sorted(f for f in files if f):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
+
+
+def _evaluation_key(data_digest: str, code_digest: str, algorithm: str, params: Dict[str, Any], slips: int) -> str:
+    payload = json.dumps([data_digest, code_digest, algorithm, sorted(params.items()), slips], ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _load_cache(cache_path: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    if not cache_path or not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"警告：无法读取参数搜索缓存 {cache_path}，将重新评测。原因: {e}")
+        return {}
+
+
+def _save_cache(cache_path: str, cache: Dict[str, Dict[str, Any]]):
+    os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def pareto_front(configs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """准确率越高越好、耗时越低越好，返回不被任何其它组合同时在两方面超过的组合（按耗时升序）。"""
+    front = []
+    best_accuracy = None
+    for config in sorted(configs, key=lambda c: (c["mean_ms"], -c["accuracy"])):
+        if best_accuracy is None or config["accuracy"] > best_accuracy:
+            front.append(config)
+            best_accuracy = config["accuracy"]
+    return front
+
+
+def run_sweep(
+        input_json_path: str,
+        gt_json_path: str,
+        search_spaces: Optional[Dict[str, Dict[str, Any]]] = None,
+        mode: str = "grid",
+        n_samples: int = 20,
+        seed: int = 0,
+        slips_settings: Sequence[int] = TOURNAMENT_SLIPS,
+        workers: Optional[int] = None,
+        cache_path: Optional[str] = None,
+        output_folder_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    算法常数的超参数搜索：按网格或随机方式展开每个算法的搜索空间，所有 (算法, 参数, 联数) 评测在进程池里并行，
+    最后报告每组参数的准确率与耗时，以及准确率-耗时的帕累托前沿。
+
+    相同的评测（输入数据、算法源码、参数、联数都相同）只算一次：同一次搜索内去重，
+    设置 cache_path 后结果还会落盘，下次搜索直接复用。
+
+    Args:
+        input_json_path: 输入的坐标信息JSON文件路径
+        gt_json_path: 标准答案(Ground Truth)JSON文件路径
+        search_spaces: {算法名: {参数名: 取值}}，格式见 DEFAULT_SEARCH_SPACES，None 时使用它
+        mode: 见 SEARCH_MODES
+        n_samples: random 模式下每个算法抽取的组合数
+        seed: random 模式的随机种子
+        slips_settings: 每组参数都在这些联数设置下评测，准确率按全部设置合计
+        workers: 进程数，None 为 CPU 核数，1 为在当前进程中串行执行
+        cache_path: 评测结果缓存文件（可选）
+        output_folder_path: 结果JSON文件的保存文件夹路径（可选）
+
+    Returns:
+        {"configs": [...按准确率降序...], "pareto_front": [...], "evaluations": 实际评测次数, "cached": 复用次数}
+    """
+    records = load_evaluation_records(input_json_path, gt_json_path)
+    if records is None:
+        return {}
+    search_spaces = search_spaces if search_spaces is not None else DEFAULT_SEARCH_SPACES
+
+    candidates: List[Tuple[str, Dict[str, Any]]] = []
+    for name, space in search_spaces.items():
+        try:
+            slip_fn = get_algorithm(name)
+            combos = expand_search_space(space, mode, n_samples, seed)
+            for params in combos:
+                check_params(slip_fn, params)
+        except ValueError as e:
+            print(f"跳过: {e}")
+            continue
+        candidates.extend((slip_fn.__module__.rsplit('.', 1)[-1], params) for params in combos)
+
+    data_digest = hashlib.sha1(json.dumps(records).encode('utf-8')).hexdigest()
+    code_digests = {name: _code_digest(name) for name in {name for name, _ in candidates}}
+    cache = _load_cache(cache_path)
+    cached_before = len(cache)
+
+    keys = {}
+    pending = {}
+    for name, params in candidates:
+        for slips in slips_settings:
+            key = _evaluation_key(data_digest, code_digests[name], name, params, slips)
+            keys[(name, json.dumps(params, sort_keys=True), slips)] = key
+            if key not in cache and key not in pending:
+                pending[key] = (name, params, slips)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(pending), 1))
+    print(f"\n--- 参数搜索 ({mode}): {len(candidates)} 组参数 x {len(slips_settings)} 种联数设置，"
+          f"需评测 {len(pending)} 次（其余复用缓存），{workers} 个进程 ---")
+    tasks = list(pending.items())
+    if workers <= 1:
+        init_evaluation_worker(records)
+        outcomes = [evaluate_algorithm(name, slips, params) for _, (name, params, slips) in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_evaluation_worker, initargs=(records,)) as executor:
+            futures = [executor.submit(evaluate_algorithm, name, slips, params) for _, (name, params, slips) in tasks]
+            outcomes = [future.result() for future in futures]
+    for (key, _), cell in zip(tasks, outcomes):
+        cache[key] = cell
+
+    configs = []
+    for name, params in candidates:
+        cells = [cache[keys[(name, json.dumps(params, sort_keys=True), slips)]] for slips in slips_settings]
+        correct = sum(cell["correct"] for cell in cells)
+        total = sum(cell["total"] for cell in cells)
+        configs.append({
+            "algorithm": name,
+            "params": params,
+            "accuracy": round(correct / total * 100, 2) if total else 0.0,
+            "mean_ms": round(sum(cell["mean_ms"] or 0 for cell in cells) / len(cells), 4) if cells else 0.0,
+            "errors": sum(cell["errors"] for cell in cells),
+            "by_slips": {slips: cell["accuracy"] for slips, cell in zip(slips_settings, cells)},
+        })
+    configs.sort(key=lambda c: (-c["accuracy"], c["mean_ms"]))
+    front = pareto_front(configs)
+
+    print("【帕累托前沿】（准确率 / 平均每张耗时）:")
+    for config in front:
+        print(f"  {config['accuracy']:6.2f}% / {config['mean_ms']:.4f}ms  {config['algorithm']} {config['params']}")
+
+    if cache_path and len(cache) != cached_before:
+        _save_cache(cache_path, cache)
+
+    summary = {
+        "configs": configs,
+        "pareto_front": front,
+        "evaluations": len(pending),
+        "cached": len(candidates) * len(slips_settings) - len(pending),
+    }
+    if output_folder_path:
+        full_output_path = Path(output_folder_path) / f"{Path(input_json_path).stem}_sweep_results.json"
+        try:
+            full_output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(full_output_path, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=4, ensure_ascii=False)
+            print(f"\n参数搜索结果已保存至: {full_output_path.resolve()}")
+        except IOError as e:
+            print(f"\n错误：无法写入结果文件 -> {full_output_path}。原因: {e}")
+    return summary
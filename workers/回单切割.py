@@ -0,0 +1,259 @@
+import glob
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .获取图片线信息 import _get_turbojpeg, _is_jpeg, _parse_jpeg_header, _split_pdf_task
+from .算法注册 import run_algorithm_batch
+
+# 可选依赖：PyTurboJPEG 用于JPEG的无损裁剪（只搬运压缩数据，不解码也不重新编码）
+try:
+    from turbojpeg import tjMCUHeight
+except ImportError:
+    tjMCUHeight = None
+
+# "auto": JPEG 的切割线都落在MCU行边界上时无损裁剪，否则解码后裁剪再编码；"reencode": 总是解码后再编码
+CUT_MODES = ("auto", "reencode")
+# 重新编码JPEG时的质量
+JPEG_QUALITY = 95
+# 编码线程数（OpenCV 解码与编码时都会释放 GIL，多张图片可以真正并行）
+CUT_THREADS = 4
+# 已提交但还没写完的图片数上限，决定峰值内存（每张都要整图解码）
+MAX_PENDING_IMAGES = 16
+
+
+def slip_bounds(slip_starts: List[int], height: int) -> List[Tuple[int, int]]:
+    """
+    把各联起始线换算成每联的 [y0, y1) 行范围：在第二联起的每条起始线处切一刀，
+    第一联包含上边距，最后一联一直到图片底部。
+    """
+    cuts = sorted({int(y) for y in slip_starts[1:] if 0 < y < height})
+    edges = [0] + cuts + [height]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def crop_views(image: np.ndarray, bounds: List[Tuple[int, int]]) -> List[np.ndarray]:
+    """按行范围切出每联。返回的是原图的视图（不复制像素），编码时直接读原图内存。"""
+    return [image[y0:y1] for y0, y1 in bounds]
+
+
+def _lossless_crops(buf: np.ndarray, slip_starts: List[int], snap_to_mcu: bool) -> Optional[Tuple[List[bytes], List[Tuple[int, int]]]]:
+    """
+    [无损裁剪] 用 libjpeg-turbo 直接裁出每联的JPEG数据，返回 (各联JPEG字节, 实际行范围)。
+    切割线必须落在MCU行边界上（snap_to_mcu 时往图片顶部方向对齐到边界）；库不可用、不是JPEG、
+    带旋转标记或切割线不对齐时返回 None，由调用方退回解码再编码。
+    """
+    jpeg = _get_turbojpeg()
+    if jpeg is None or tjMCUHeight is None or not _is_jpeg(buf):
+        return None
+    try:
+        width, height, subsample, _ = jpeg.decode_header(buf)
+        # 未知的采样方式（TJSAMP_UNKNOWN = -1 等）取不到MCU高度，退回重新编码
+        if _parse_jpeg_header(buf)[2] != 1 or not 0 <= subsample < len(tjMCUHeight):
+            return None
+        mcu_h = tjMCUHeight[subsample]
+        starts = [(y // mcu_h) * mcu_h for y in slip_starts] if snap_to_mcu else list(slip_starts)
+        bounds = slip_bounds(starts, height)
+        if any(y0 % mcu_h for y0, _ in bounds):
+            return None
+        crops = jpeg.crop_multiple(buf, [(0, y0, width, y1 - y0) for y0, y1 in bounds])
+    except (OSError, ValueError, IndexError, TypeError):
+        return None
+    return [bytes(crop) for crop in crops], bounds
+
+
+def slip_filename(filename: str, index: int, ext: str) -> str:
+    """第 index 联（从1开始）的输出文件名，例如 回单A.jpg -> 回单A_slip1.jpg。"""
+    return f"{os.path.splitext(filename)[0]}_slip{index}{ext}"
+
+
+def cut_image(
+        image_path: str,
+        slip_starts: List[int],
+        output_folder_path: str,
+        mode: str = "auto",
+        snap_to_mcu: bool = False,
+        quality: int = JPEG_QUALITY
+) -> Dict[str, Any]:
+    """
+    把一张回单按各联起始线切成多张图片，写入 output_folder_path。
+
+    Returns:
+        {"files": [输出路径...], "bounds": [[y0, y1]...], "lossless": 是否走了无损裁剪}
+    """
+    if mode not in CUT_MODES:
+        raise ValueError(f"未知的切割方式: {mode}，可选: {CUT_MODES}")
+    if _split_pdf_task(image_path)[1] is not None:
+        raise ValueError("PDF 页面暂不支持切割，请先导出为图片")
+    filename = os.path.basename(image_path)
+    ext = os.path.splitext(filename)[1].lower()
+    buf = np.fromfile(image_path, dtype=np.uint8)
+
+    lossless = _lossless_crops(buf, slip_starts, snap_to_mcu) if mode == "auto" else None
+    if lossless is not None:
+        encoded, bounds = lossless
+        ext = ext if ext in (".jpg", ".jpeg") else ".jpg"
+    else:
+        image = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("无法解码图片")
+        bounds = slip_bounds(slip_starts, image.shape[0])
+        if ext not in (".jpg", ".jpeg", ".png"):
+            ext = ".png"
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in (".jpg", ".jpeg") else []
+        encoded = []
+        for view in crop_views(image, bounds):
+            ok, data = cv2.imencode(ext, view, params)
+            if not ok:
+                raise ValueError(f"编码 {ext} 失败")
+            encoded.append(data)
+
+    files = []
+    for index, data in enumerate(encoded, start=1):
+        out_path = os.path.join(output_folder_path, slip_filename(filename, index, ext))
+        with open(out_path, 'wb') as f:
+            f.write(data)
+        files.append(out_path)
+    return {"files": files, "bounds": [list(b) for b in bounds], "lossless": lossless is not None}
+
+
+class SlipCutter:
+    """
+    回单切割的并行执行器：submit 提交 (图片路径, 各联起始线)，在线程池里 读取 → 解码 → 视图裁剪 → 编码 → 写出，
+    close 等待全部完成并返回统计。已提交未完成的图片数不超过 max_pending，提交过快时 submit 会等待。
+    """
+
+    def __init__(
+            self,
+            output_folder_path: str,
+            mode: str = "auto",
+            snap_to_mcu: bool = False,
+            quality: int = JPEG_QUALITY,
+            threads: int = CUT_THREADS,
+            max_pending: int = MAX_PENDING_IMAGES
+    ):
+        if mode not in CUT_MODES:
+            raise ValueError(f"未知的切割方式: {mode}，可选: {CUT_MODES}")
+        os.makedirs(output_folder_path, exist_ok=True)
+        self.output_folder_path = output_folder_path
+        self.mode = mode
+        self.snap_to_mcu = snap_to_mcu
+        self.quality = quality
+        self._executor = ThreadPoolExecutor(max_workers=max(1, threads), thread_name_prefix="slip-cut")
+        self._pending = threading.Semaphore(max(1, max_pending))
+        self._futures: Dict[str, Future] = {}
+        self._failures: Dict[str, str] = {}
+
+    def submit(self, image_path: str, slip_starts: List[int]):
+        self._pending.acquire()
+        future = self._executor.submit(
+            cut_image, image_path, slip_starts, self.output_folder_path, self.mode, self.snap_to_mcu, self.quality
+        )
+        future.add_done_callback(lambda _: self._pending.release())
+        self._futures[os.path.basename(image_path)] = future
+
+    def fail(self, filename: str, reason: str):
+        """记下没能提交切割的图片（例如分割算法出错），close 时一并列在 failures 里。"""
+        self._failures[filename] = reason
+
+    def close(self) -> Dict[str, Any]:
+        """等待全部切割完成，返回 {"images", "slips", "lossless", "files": {文件名: [输出路径]}, "failures"}。"""
+        self._executor.shutdown(wait=True)
+        summary: Dict[str, Any] = {"images": 0, "slips": 0, "lossless": 0, "files": {}, "failures": {}}
+        for filename, future in self._futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                summary["failures"][filename] = str(e)
+                continue
+            summary["images"] += 1
+            summary["slips"] += len(result["files"])
+            summary["lossless"] += result["lossless"]
+            summary["files"][filename] = result["files"]
+        summary["failures"].update(self._failures)
+        return summary
+
+
+def cut_slips(
+        image_paths: Dict[str, str],
+        slip_starts: Dict[str, List[int]],
+        output_folder_path: str,
+        mode: str = "auto",
+        snap_to_mcu: bool = False,
+        quality: int = JPEG_QUALITY,
+        threads: int = CUT_THREADS
+) -> Dict[str, Any]:
+    """
+    按 {文件名: 各联起始线} 切割整批图片。
+
+    Args:
+        image_paths: {文件名: 图片路径}。
+        slip_starts: {文件名: 各联起始线}，通常是分割算法的输出。
+        output_folder_path: 输出文件夹，每联一张 原文件名_slipN.扩展名。
+        mode: 见 CUT_MODES。
+        snap_to_mcu: 无损裁剪时把切割线往图片顶部方向对齐到MCU行边界（最多移动 7 或 15 像素，落在上一联的下边距里），
+                     这样几乎所有JPEG都能走无损裁剪。
+        quality: 重新编码JPEG时的质量。
+        threads: 并行的线程数。
+
+    Returns:
+        SlipCutter.close 的统计，找不到图片的文件名记在 failures 里。
+    """
+    cutter = SlipCutter(output_folder_path, mode, snap_to_mcu, quality, threads)
+    missing = {}
+    for filename, starts in slip_starts.items():
+        path = image_paths.get(filename)
+        if path is None:
+            missing[filename] = "找不到对应的图片"
+            continue
+        cutter.submit(path, starts)
+    summary = cutter.close()
+    summary["failures"].update(missing)
+    print(f">>> 切割完成：{summary['images']} 张图片切出 {summary['slips']} 联"
+          f"（无损裁剪 {summary['lossless']} 张），失败 {len(summary['failures'])} 张")
+    return summary
+
+
+def cut_folder(
+        source_folder_path: str,
+        output_folder_path: str,
+        slip_starts: Optional[Dict[str, List[int]]] = None,
+        info_json_path: Optional[str] = None,
+        expected_slips: int = 0,
+        algorithm: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        mode: str = "auto",
+        snap_to_mcu: bool = False,
+        quality: int = JPEG_QUALITY,
+        threads: int = CUT_THREADS
+) -> Dict[str, Any]:
+    """
+    切割文件夹中的回单。各联起始线直接给出（slip_starts），或者由 image_info.json 的线坐标
+    （info_json_path）经分割算法整批算出（见 算法注册.run_algorithm_batch）。
+
+    Returns:
+        cut_slips 的统计；参数无效时抛出 ValueError。
+    """
+    if not os.path.isdir(source_folder_path):
+        raise ValueError(f"输入文件夹 '{source_folder_path}' 不存在或不是有效目录")
+    image_paths = {
+        os.path.basename(path): path
+        for fmt in ("*.jpg", "*.jpeg", "*.png") for path in glob.glob(os.path.join(source_folder_path, fmt))
+    }
+    if slip_starts is None:
+        if not info_json_path:
+            raise ValueError("需要提供各联起始线，或者线坐标文件 image_info.json 的路径")
+        try:
+            with open(info_json_path, 'r', encoding='utf-8') as f:
+                coords = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"无法读取线坐标文件 {info_json_path}。原因: {e}")
+        names = list(coords)
+        starts, _ = run_algorithm_batch(algorithm, [coords[name] for name in names], expected_slips, params)
+        slip_starts = dict(zip(names, starts))
+    return cut_slips(image_paths, slip_starts, output_folder_path, mode, snap_to_mcu, quality, threads)
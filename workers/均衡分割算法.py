@@ -1,4 +1,7 @@
-from typing import List
+from typing import List, Tuple
+
+# 置信度的容差：理想位置与实际线条的平均偏差达到总高度的该比例时，置信度降为 0
+CONFIDENCE_TOLERANCE = 0.05
 
 
 def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
@@ -51,4 +54,32 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
         slip_starts.add(closest_line)
 
     # 4. 返回排序后的结果列表
-    return sorted(list(slip_starts))
\ No newline at end of file
+    return sorted(list(slip_starts))
+
+
+def equal_split_confidence(coords_with_boundaries: List[int], num_slips: int) -> float:
+    """
+    均衡分割结果的置信度（0~1）：各理想位置到最近实际线条的平均相对偏差越小越可靠。
+    其它算法的强制模式都是均衡分割，也用这个函数评估。
+    """
+    actual_lines = coords_with_boundaries[1:-1]
+    if not actual_lines or num_slips <= 1:
+        return 1.0
+    anchor_point = actual_lines[0]
+    total_height = coords_with_boundaries[-1] - anchor_point
+    if total_height <= 0:
+        return 0.0
+    average_height = total_height / num_slips
+    deviation = 0.0
+    for i in range(1, num_slips):
+        ideal_position = anchor_point + i * average_height
+        deviation += min(abs(line - ideal_position) for line in actual_lines) / total_height
+    return max(0.0, 1 - deviation / (num_slips - 1) / CONFIDENCE_TOLERANCE)
+
+
+def find_slip_starts_scored(coords_with_boundaries: List[int], num_slips: int) -> Tuple[List[int], float]:
+    """与 find_slip_starts 相同，额外返回置信度（见 equal_split_confidence）。"""
+    lines = find_slip_starts(coords_with_boundaries, num_slips)
+    if not lines:
+        return lines, 0.0 if num_slips <= 0 and coords_with_boundaries[1:-1] else 1.0
+    return lines, equal_split_confidence(coords_with_boundaries, num_slips)
@@ -0,0 +1,396 @@
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .获取图片线信息 import extract_image_data, DECODE_MODES, DETECTOR_ENGINES
+from .算法注册 import available_algorithms, get_algorithm, get_batch_algorithm
+
+# 基线结果文件：与之后的运行逐项对比，发现性能或准确率的回退
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "benchmark_baseline.json")
+# 吞吐量下降超过该比例视为回退（同一台机器上重复运行的计时也有 10%~20% 的波动，阈值不宜太小）
+REGRESSION_TOLERANCE = 0.25
+
+# 合成数据的取值范围，尽量贴近真实回单：
+# 每联有一条起始线和一条表头线（起始线下方 100~200 像素），联内另有 0~2 条随机线，最后一联底部常有一条页脚线
+MIN_HEIGHT = 1000
+MAX_HEIGHT = 9000
+MAX_SLIPS = 3
+
+# 坐标列表按块生成列表再交给算法，避免 10^6 条记录一次性变成 Python 列表占满内存
+_CHUNK_RECORDS = 10000
+# 吞吐量取第一块重复计时 TIMING_REPEAT 次中最快的一次（与 timeit 的做法相同，排除机器负载的干扰）
+TIMING_REPEAT = 3
+
+
+def generate_coord_records(
+        n_records: int,
+        seed: int = 0,
+        max_height: int = MAX_HEIGHT
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    生成 n_records 条合成的坐标列表（全程向量化，10^6 条也只需几秒）。
+
+    Returns:
+        (values, offsets, gt_values, gt_offsets)，均为 CSR 结构（与 结构匹配算法.pack_coords 相同）：
+        第 i 条坐标列表 [0, ...y, 高度] 为 values[offsets[i]:offsets[i + 1]]，
+        其各联起始线（标准答案）为 gt_values[gt_offsets[i]:gt_offsets[i + 1]]。
+    """
+    rng = np.random.default_rng(seed)
+    slips = rng.integers(1, MAX_SLIPS + 1, n_records)
+    height = rng.integers(MIN_HEIGHT, max_height + 1, n_records)
+    margin = rng.integers(10, 60, n_records)
+    slip_height = (height - margin) / slips
+
+    slot = np.arange(MAX_SLIPS)[None, :]
+    valid_slip = slot < slips[:, None]
+    jitter = rng.integers(-3, 4, (n_records, MAX_SLIPS))
+    jitter[:, 0] = 0
+    starts = np.round(margin[:, None] + slot * slip_height[:, None]).astype(np.int64) + jitter
+    header = starts + rng.integers(100, 200, (n_records, MAX_SLIPS))
+    # 联内随机线：落在表头线之后、本联 85% 高度之前，各以 50% 的概率出现
+    inner_span = np.maximum(slip_height[:, None] * 0.85 - (header - starts) - 20, 1)
+    extras = header[:, :, None] + 20 + (rng.random((n_records, MAX_SLIPS, 2)) * inner_span[:, :, None]).astype(np.int64)
+    extras_valid = valid_slip[:, :, None] & (rng.random((n_records, MAX_SLIPS, 2)) < 0.5)
+    footer = height - rng.integers(20, 60, n_records)
+    footer_valid = rng.random(n_records) < 0.7
+
+    lines = np.concatenate([starts, header, extras.reshape(n_records, -1), footer[:, None]], axis=1)
+    valid = np.concatenate([valid_slip, valid_slip, extras_valid.reshape(n_records, -1), footer_valid[:, None]], axis=1)
+    valid &= (lines > 0) & (lines < height[:, None])
+    sentinel = np.iinfo(np.int64).max
+    lines = np.sort(np.where(valid, lines, sentinel), axis=1)
+    counts = valid.sum(axis=1)
+
+    # 每条记录: [0] + 有效线 + [高度]
+    widths = counts + 2
+    offsets = np.zeros(n_records + 1, dtype=np.int64)
+    np.cumsum(widths, out=offsets[1:])
+    values = np.empty(offsets[-1], dtype=np.int64)
+    values[offsets[:-1]] = 0
+    values[offsets[1:] - 1] = height
+    # 排序后有效线都在每行的前 counts 列
+    rows, cols = np.nonzero(np.arange(lines.shape[1])[None, :] < counts[:, None])
+    values[offsets[rows] + 1 + cols] = lines[rows, cols]
+
+    gt_offsets = np.zeros(n_records + 1, dtype=np.int64)
+    np.cumsum(slips, out=gt_offsets[1:])
+    gt_values = starts[valid_slip]
+    return values, offsets, gt_values, gt_offsets
+
+
+def generate_receipt_image(
+        coords_with_boundaries: Sequence[int],
+        width: int = 1240,
+        thickness: int = 3,
+        noise: float = 4.0,
+        seed: int = 0
+) -> np.ndarray:
+    """
+    按坐标列表画一张合成回单（BGR）：白底，每个坐标处一条从左边缘开始的绿线，右侧随机“文字”块，再叠加高斯噪声。
+    """
+    rng = np.random.default_rng(seed)
+    height = int(coords_with_boundaries[-1])
+    image = np.full((height, width, 3), 255, dtype=np.uint8)
+    # 模拟文字：左侧 CROP_WIDTH 以外的深色小块
+    for _ in range(height // 40):
+        x, y = int(rng.integers(60, width - 200)), int(rng.integers(0, height - 20))
+        image[y:y + int(rng.integers(8, 18)), x:x + int(rng.integers(40, 180))] = int(rng.integers(0, 80))
+    for y in coords_with_boundaries[1:-1]:
+        color = (int(rng.integers(0, 60)), int(rng.integers(160, 230)), int(rng.integers(0, 60)))
+        image[int(y):int(y) + thickness, :width - 40] = color
+    if noise > 0:
+        noisy = image.astype(np.int16) + rng.normal(0, noise, image.shape).astype(np.int16)
+        image = np.clip(noisy, 0, 255).astype(np.uint8)
+    return image
+
+
+def _iter_record_chunks(values: np.ndarray, offsets: np.ndarray, chunk: int = _CHUNK_RECORDS):
+    """按块把 CSR 结构转成 Python 列表，逐块产出 (起始序号, [坐标列表, ...])。"""
+    for first in range(0, len(offsets) - 1, chunk):
+        last = min(first + chunk, len(offsets) - 1)
+        flat = values[offsets[first]:offsets[last]].tolist()
+        bounds = (offsets[first:last + 1] - offsets[first]).tolist()
+        yield first, [flat[bounds[i]:bounds[i + 1]] for i in range(last - first)]
+
+
+def benchmark_algorithms(
+        n_records: int = 100000,
+        seed: int = 0,
+        algorithms: Optional[Sequence[str]] = None,
+        max_seconds: float = 5.0
+) -> Dict[str, Any]:
+    """
+    各算法 find_slip_starts 的吞吐量（条/秒）与在合成数据上的准确率。
+    "auto" 为自动判断联数（num_slips=0），"forced" 为传入真实联数。
+    吞吐量按第一块记录重复 TIMING_REPEAT 次取最快；准确率统计 max_seconds 秒内能跑完的所有记录，
+    10^6 条的数据也能在可控时间内跑完。提供整批接口的算法额外报告整批处理全部记录的吞吐量。
+    """
+    start = time.perf_counter()
+    values, offsets, gt_values, gt_offsets = generate_coord_records(n_records, seed)
+    report: Dict[str, Any] = {
+        "records": n_records,
+        "generate_seconds": round(time.perf_counter() - start, 3),
+        "algorithms": {},
+    }
+    gt_slips = np.diff(gt_offsets)
+    gt_bounds = gt_offsets.tolist()
+    gt_flat = gt_values.tolist()
+
+    for name in (algorithms if algorithms is not None else available_algorithms()):
+        try:
+            slip_fn = get_algorithm(name)
+        except ValueError as e:
+            print(f"跳过: {e}")
+            continue
+        name = slip_fn.__module__.rsplit('.', 1)[-1]
+        result = {}
+        for mode in ("auto", "forced"):
+            processed = correct = errors = 0
+            elapsed = 0.0
+            best_rate = None
+            for first, records in _iter_record_chunks(values, offsets):
+                slips_list = gt_slips[first:first + len(records)].tolist() if mode == "forced" else [0] * len(records)
+                # 整块计时，不在每次调用前后取时间，避免计时本身的开销淹没快速算法的耗时
+                outputs = None
+                for _ in range(TIMING_REPEAT if first == 0 else 1):
+                    # 与 timeit 一样，计时期间关闭垃圾回收，避免前面积累的对象让回收停顿落在某个算法头上
+                    gc.disable()
+                    t0 = time.perf_counter()
+                    try:
+                        outputs = [slip_fn(coords, num_slips) for coords, num_slips in zip(records, slips_list)]
+                    except Exception:
+                        outputs = None
+                        break
+                    finally:
+                        gc.enable()
+                    seconds = time.perf_counter() - t0
+                    elapsed += seconds
+                    if first == 0 and seconds > 0:
+                        best_rate = max(best_rate or 0.0, len(records) / seconds)
+                if outputs is None:
+                    # 有异常时逐条重跑，分别记录
+                    t0 = time.perf_counter()
+                    outputs = []
+                    for coords, num_slips in zip(records, slips_list):
+                        try:
+                            outputs.append(slip_fn(coords, num_slips))
+                        except Exception:
+                            outputs.append(None)
+                            errors += 1
+                    elapsed += time.perf_counter() - t0
+                processed += len(records)
+                correct += sum(
+                    1 for i, raw in enumerate(outputs, first) if raw == gt_flat[gt_bounds[i]:gt_bounds[i + 1]]
+                )
+                if elapsed >= max_seconds:
+                    break
+            result[mode] = {
+                "records": processed,
+                "records_per_sec": round(best_rate, 1) if best_rate else None,
+                "accuracy": round(correct / processed * 100, 2) if processed else None,
+                "errors": errors,
+            }
+
+        batch_fn = get_batch_algorithm(name)
+        if batch_fn is not None:
+            t0 = time.perf_counter()
+            batch_fn(values, offsets, 0)
+            elapsed = time.perf_counter() - t0
+            result["batch_auto"] = {"records": n_records, "records_per_sec": round(n_records / elapsed, 1) if elapsed else None}
+        report["algorithms"][name] = result
+        print(f"  > {name}: {result}")
+    return report
+
+
+def benchmark_extraction(
+        n_images: int = 12,
+        seed: int = 0,
+        max_height: int = MAX_HEIGHT,
+        decode_modes: Sequence[str] = DECODE_MODES,
+        engines: Sequence[str] = DETECTOR_ENGINES
+) -> Dict[str, Any]:
+    """
+    extract_image_data 的吞吐量（张/秒）：合成图片（1~3 联、不同绿线粗细与噪声、高度最多 max_height）
+    先编码为 JPEG 写入临时文件夹，再按各解码模式 x 检测引擎逐张提取，并检查检出的线与画上去的线是否一致。
+    注意 1 像素粗的绿线经 JPEG 色度下采样后饱和度会低于阈值，可能检测不到，所以 matched 不一定等于图片数。
+    """
+    values, offsets, _, _ = generate_coord_records(n_images, seed, max_height)
+    rng = np.random.default_rng(seed)
+    report: Dict[str, Any] = {"images": n_images, "max_height": max_height, "runs": {}}
+    with tempfile.TemporaryDirectory() as folder:
+        paths = []
+        truths = []
+        total_pixels = 0
+        for i, (_, (coords,)) in enumerate(_iter_record_chunks(values, offsets, 1)):
+            image = generate_receipt_image(
+                coords, thickness=int(rng.integers(1, 7)), noise=float(rng.uniform(0, 8)), seed=seed + i
+            )
+            path = os.path.join(folder, f"synthetic_{i:04d}.jpg")
+            ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+            if not ok:
+                raise IOError(f"合成图片编码失败: {path}")
+            encoded.tofile(path)
+            paths.append(path)
+            truths.append(coords)
+            total_pixels += image.shape[0] * image.shape[1]
+        report["megapixels"] = round(total_pixels / 1e6, 2)
+
+        for decode_mode in decode_modes:
+            for engine in engines:
+                elapsed = None
+                for _ in range(TIMING_REPEAT):
+                    start = time.perf_counter()
+                    outputs = [extract_image_data(path, decode_mode=decode_mode, engine=engine) for path in paths]
+                    seconds = time.perf_counter() - start
+                    elapsed = seconds if elapsed is None else min(elapsed, seconds)
+                # 检出的线与画上去的线逐条相差不超过 1 像素（JPEG 压缩可能让线的边缘移动一个像素）视为一致
+                matched = sum(
+                    1 for (ys, height), coords in zip(outputs, truths)
+                    if ys is not None and height == coords[-1] and len(ys) == len(coords) - 2
+                    and all(abs(a - b) <= 1 for a, b in zip(ys, coords[1:-1]))
+                )
+                report["runs"][f"{decode_mode}/{engine}"] = {
+                    "images_per_sec": round(n_images / elapsed, 2),
+                    "megapixels_per_sec": round(total_pixels / 1e6 / elapsed, 2),
+                    "matched": matched,
+                }
+                print(f"  > {decode_mode}/{engine}: {report['runs'][f'{decode_mode}/{engine}']}")
+    return report
+
+
+def calibration_score(repeat: int = TIMING_REPEAT) -> float:
+    """
+    固定的参考负载（纯 Python 排序 + NumPy 运算）每秒能跑的次数，与结果一起保存。
+    对比基线时吞吐量先除以各自的校准分，抵消机器整体变快或变慢（换机器、CPU 降频、虚拟机被限速）的影响。
+    """
+    rng = np.random.default_rng(0)
+    items = rng.integers(0, 10 ** 6, 20000).tolist()
+    array = rng.random(200000)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(10):
+            sorted(items)
+            np.sort(array)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return round(10 / best, 2)
+
+
+def run_benchmark(
+        n_records: int = 100000,
+        n_images: int = 12,
+        seed: int = 0,
+        max_seconds: float = 5.0,
+        output_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """跑完整的基准测试（提取 + 分割算法），可选地保存为 JSON（例如作为基线）。"""
+    calibration = calibration_score()
+    print(f"\n--- 基准测试：提取 {n_images} 张合成图片 ---")
+    extraction = benchmark_extraction(n_images, seed)
+    print(f"\n--- 基准测试：分割算法 {n_records} 条合成坐标 ---")
+    algorithms = benchmark_algorithms(n_records, seed, max_seconds=max_seconds)
+    # 前后各测一次校准分取平均，更贴近测试期间机器的实际速度
+    calibration = round((calibration + calibration_score()) / 2, 2)
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+        },
+        "seed": seed,
+        "calibration": calibration,
+        "extraction": extraction,
+        "algorithms": algorithms,
+    }
+    if output_path:
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"\n基准测试结果已保存至: {os.path.abspath(output_path)}")
+    return results
+
+
+def compare_with_baseline(
+        results: Dict[str, Any],
+        baseline_path: str = DEFAULT_BASELINE_PATH,
+        tolerance: float = REGRESSION_TOLERANCE
+) -> List[str]:
+    """
+    与基线对比，返回回退项的描述列表（空列表表示没有回退）：
+    吞吐量（按各自的校准分归一化后）下降超过 tolerance，或准确率/一致张数下降。两次运行的种子或规模不同时只比吞吐量；
+    准确率只在两次统计的记录数相同时比较（记录数受 max_seconds 限制，慢的算法可能只跑了一部分）。
+    """
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions = []
+    # 两边都有校准分时，吞吐量之比再除以校准分之比
+    speed_factor = 1.0
+    if baseline.get("calibration") and results.get("calibration"):
+        speed_factor = results["calibration"] / baseline["calibration"]
+    same_data = (
+        baseline.get("seed") == results.get("seed")
+        and baseline["algorithms"].get("records") == results["algorithms"].get("records")
+        and baseline["extraction"].get("images") == results["extraction"].get("images")
+    )
+
+    def check(label: str, old: Dict[str, Any], new: Dict[str, Any], speed_key: str, quality_key: Optional[str]):
+        if old.get(speed_key) and new.get(speed_key) is not None:
+            ratio = new[speed_key] / old[speed_key] / speed_factor
+            if ratio < 1 - tolerance:
+                regressions.append(
+                    f"{label}: {speed_key} {old[speed_key]} -> {new[speed_key]} (校准后 {(ratio - 1) * 100:.1f}%)"
+                )
+        if (same_data and quality_key and old.get(quality_key) is not None and new.get(quality_key) is not None
+                and old.get("records") == new.get("records")):
+            if new[quality_key] < old[quality_key]:
+                regressions.append(f"{label}: {quality_key} {old[quality_key]} -> {new[quality_key]}")
+
+    for run, old in baseline["extraction"]["runs"].items():
+        new = results["extraction"]["runs"].get(run)
+        if new is not None:
+            check(f"提取 {run}", old, new, "images_per_sec", "matched")
+    for name, old_modes in baseline["algorithms"]["algorithms"].items():
+        new_modes = results["algorithms"]["algorithms"].get(name, {})
+        for mode, old in old_modes.items():
+            if mode in new_modes:
+                check(f"{name} {mode}", old, new_modes[mode], "records_per_sec", "accuracy")
+    return regressions
+
+
+def main():
+    """主入口：没有基线时生成基线，有基线时与之对比。"""
+    # ==================== 用户配置区 ====================
+    N_RECORDS = 100000  # 合成坐标列表条数，可加到 10^6
+    N_IMAGES = 12  # 合成图片张数
+    SEED = 0
+    MAX_SECONDS = 5.0  # 每个算法每种模式最多计时的秒数
+    BASELINE_PATH = DEFAULT_BASELINE_PATH
+    # ====================================================
+
+    if not os.path.isfile(BASELINE_PATH):
+        run_benchmark(N_RECORDS, N_IMAGES, SEED, MAX_SECONDS, output_path=BASELINE_PATH)
+        return
+
+    results = run_benchmark(N_RECORDS, N_IMAGES, SEED, MAX_SECONDS)
+    regressions = compare_with_baseline(results, BASELINE_PATH)
+    if regressions:
+        print("\n【性能回退】")
+        for item in regressions:
+            print(f"  - {item}")
+    else:
+        print("\n【与基线对比】没有发现回退。")
+
+
+if __name__ == "__main__":
+    main()
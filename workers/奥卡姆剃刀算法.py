@@ -1,6 +1,10 @@
 import numpy as np
-from typing import List
+from typing import List, Tuple
 
+from .均衡分割算法 import equal_split_confidence
+
+# 最大间距是次大间距的多少倍才算“鹤立鸡群”，相邻间距之比达到多少才算“断层”
+SIGNIFICANT_RATIO = 2.0
 
 # ... _run_forced_mode 保持不变 ...
 def _run_forced_mode(actual_lines: List[int], y_max: int, num_slips: int) -> List[int]:
@@ -24,18 +28,18 @@ def _run_forced_mode(actual_lines: List[int], y_max: int, num_slips: int) -> Lis
     return sorted(list(centers))
 
 
-def _run_auto_mode(actual_lines: List[int]) -> List[int]:
+def _run_auto_mode(actual_lines: List[int], significant_ratio: float = SIGNIFICANT_RATIO) -> Tuple[List[int], float]:
     """
     [自动模式] 最终版奥卡姆剃刀算法：
     首先判断是否存在一个“鹤立鸡群”的最大间距，这覆盖了绝大多数二联单的情况。
     如果不存在，再使用更通用的“断层”分析来处理多联或单联。
     """
     if len(actual_lines) <= 1:
-        return actual_lines
+        return actual_lines, 1.0
 
     gaps = np.diff(actual_lines)
     if len(gaps) < 2:
-        return [actual_lines[0]]
+        return [actual_lines[0]], 1.0
 
     sorted_gaps = np.sort(gaps)[::-1]
 
@@ -43,25 +47,28 @@ def _run_auto_mode(actual_lines: List[int]) -> List[int]:
     max_gap = sorted_gaps[0]
     second_max_gap = sorted_gaps[1]
 
-    # 定义一个“显著”的比率阈值
-    SIGNIFICANT_RATIO = 2.0
-
     # 场景1：存在一个“鹤立鸡群”的唯一最大间距（最常见的情况）
-    if max_gap / (second_max_gap + 1e-9) > SIGNIFICANT_RATIO:
+    # 置信度：做决定所依据的间距比离“显著”的比率阈值有多远
+    top_ratio = max_gap / (second_max_gap + 1e-9)
+    if top_ratio > significant_ratio:
         num_splits = 1
+        decision_ratio = top_ratio
     # 场景2：不存在唯一王者，需要寻找“断层”来确定有几个分割点
     else:
         ratios = sorted_gaps[:-1] / (sorted_gaps[1:] + 1e-9)
         # 如果连断层都不显著，那就是单联
-        if np.max(ratios) < SIGNIFICANT_RATIO:
+        decision_ratio = np.max(ratios)
+        if np.max(ratios) < significant_ratio:
             num_splits = 0
         else:
             # 分割点的数量 = 断层的位置 + 1
             num_splits = np.argmax(ratios) + 1
 
+    confidence = float(min(1.0, abs(decision_ratio - significant_ratio) / significant_ratio))
+
     # --- 根据决策结果，找出分割线 ---
     if num_splits == 0:
-        return [actual_lines[0]]
+        return [actual_lines[0]], confidence
 
     # 分割阈值是第 num_splits 个最大间距
     threshold = sorted_gaps[num_splits - 1]
@@ -72,15 +79,32 @@ def _run_auto_mode(actual_lines: List[int]) -> List[int]:
     start_lines = [actual_lines[i + 1] for i in break_indices]
 
     final_result = sorted(list(set([actual_lines[0]] + start_lines)))
-    return final_result
+    return final_result, confidence
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        significant_ratio: float = SIGNIFICANT_RATIO
+) -> List[int]:
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, significant_ratio)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        significant_ratio: float = SIGNIFICANT_RATIO
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    自动模式下为做决定所依据的间距比与 significant_ratio 的相对距离；强制模式见 equal_split_confidence。
+    """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
 
     if num_slips > 0:
-        return _run_forced_mode(actual_lines, coords_with_boundaries[-1], num_slips)
+        lines = _run_forced_mode(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, equal_split_confidence(coords_with_boundaries, num_slips)
     else:
-        return _run_auto_mode(actual_lines)
\ No newline at end of file
+        return _run_auto_mode(actual_lines, significant_ratio)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .获取图片线信息 import get_images_lines_info, PDF_DPI, _split_pdf_task
+from .调用算法main import find_slip_starts, compare_results, is_correct
+from .模板索引 import TemplateIndex
+from .切分记忆 import SlipStartMemo
+from .算法注册 import get_algorithm, check_params
+
+
+def _result_order(name: str):
+    file_name, page_number = _split_pdf_task(name)
+    return file_name, page_number or 0
+
+
+def extract_and_split(
+        source_folder_path: str,
+        expected_slips: int,
+        algorithm: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        gt_json_path: Optional[str] = None,
+        output_folder_path: Optional[str] = None,
+        save_intermediate: bool = False,
+        template_index: Optional[TemplateIndex] = None,
+        memo: Optional[SlipStartMemo] = None,
+        workers: int = 1,
+        chunk_size: int = 16,
+        decode_mode: str = "full",
+        engine: str = "contour",
+        cache_path: Optional[str] = None,
+        io_threads: int = 0,
+        queue_size: int = 16,
+        pdf_dpi: int = PDF_DPI,
+        progress_callback: Optional[Callable[[int, int, Optional[str], Optional[Dict[str, Any]]], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    一体化处理：提取每张图片的线坐标后直接在内存中交给分割算法，不再经过 image_info.json 的写出与重新解析。
+    等价于先调用 get_images_lines_info、再对生成的 image_info.json 调用 process_and_compare。
+
+    Args:
+        source_folder_path: 图片所在文件夹。
+        expected_slips: 期望分割出的回单联数，<=0 为自动判断。
+        algorithm: 算法名，None 为默认的结构匹配算法（见 算法注册.py）。
+        params: 传给算法 find_slip_starts 的额外关键字参数。
+        gt_json_path: 标准答案JSON文件路径（可选），设置后逐张与GT比较并统计准确率。
+        output_folder_path: 结果保存文件夹（可选）。有GT时写出与两步流程相同的 image_info_comparison_results.json，
+                            否则写出 image_slip_starts.json（{文件名: 起始线}）。
+        save_intermediate: 是否同时在 output_folder_path 写出 image_info.json（此时每张结果也会追加到中间文件）。
+        template_index: 可选的模板索引，已知模板且校验通过的图片直接查表。
+        memo: 可选的记忆化缓存（见 切分记忆.SlipStartMemo，须包装同一算法），设置后经缓存计算，
+              统计中另含 "memo": memo.stats()。
+        其余参数与 get_images_lines_info 相同。
+        progress_callback: 进度回调 (已完成数, 总数, 文件名, {"lines", "slip_starts"[, "GT", "Val"]})，
+                           开始前以文件名 None 调用一次，提取失败的图片结果为 None。
+        cancel_event: 设置后在下一张图片处停止。
+
+    Returns:
+        get_images_lines_info 的处理统计，另含 "results": {文件名: {"lines", "slip_starts"[, "GT", "Val"]}}；
+        有GT时再含 "correct" / "compared" / "accuracy"。参数无效时返回空字典。
+    """
+    try:
+        slip_fn = find_slip_starts if algorithm is None else get_algorithm(algorithm)
+        params = check_params(slip_fn, params)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return {}
+    if not os.path.isdir(source_folder_path):
+        print(f"错误：输入文件夹 '{source_folder_path}' 不存在或不是有效目录。")
+        return {}
+    if save_intermediate and not output_folder_path:
+        print("错误：save_intermediate 需要同时设置 output_folder_path。")
+        return {}
+
+    gt_data = None
+    if gt_json_path:
+        try:
+            with open(gt_json_path, 'r', encoding='utf-8') as f:
+                gt_data = json.load(f)
+        except FileNotFoundError:
+            print(f"警告：GT文件不存在 -> {gt_json_path}。将无法进行比较。")
+            gt_data = {}
+        except json.JSONDecodeError as e:
+            print(f"错误：GT文件 {gt_json_path} 格式无效。原因: {e}")
+            return {}
+
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def split(done: int, total: int, filename: Optional[str], lines: Optional[List[int]]):
+        item = None
+        if filename is not None and lines is not None:
+            starts = template_index.lookup(filename, lines, expected_slips) if template_index is not None else None
+            if starts is None:
+                starts = (memo or slip_fn)(lines, expected_slips, **params)
+            item = {"lines": lines, "slip_starts": starts}
+            if gt_data is not None:
+                comparison = compare_results(starts, gt_data.get(filename))
+                item["GT"], item["Val"] = comparison["GT"], comparison["Val"]
+            results[filename] = item
+        if progress_callback is not None:
+            progress_callback(done, total, filename, item)
+
+    summary = get_images_lines_info(
+        source_folder_path=source_folder_path,
+        output_folder_path=output_folder_path if save_intermediate else None,
+        workers=workers,
+        chunk_size=chunk_size,
+        decode_mode=decode_mode,
+        engine=engine,
+        cache_path=cache_path,
+        # 断点续跑沿用的图片不会再经过回调，拿不到坐标，所以一体化处理总是从头开始
+        resume=False,
+        io_threads=io_threads,
+        queue_size=queue_size,
+        pdf_dpi=pdf_dpi,
+        progress_callback=split,
+        cancel_event=cancel_event
+    )
+    if not summary:
+        return {}
+    # 坐标已经在 results 里了；按 image_info.json 的顺序（文件名，PDF 再按页码）排列
+    summary.pop("results", None)
+    summary["results"] = {name: results[name] for name in sorted(results, key=_result_order)}
+    if memo is not None:
+        summary["memo"] = memo.stats()
+
+    if gt_data is not None:
+        compared = [item for item in summary["results"].values() if isinstance(item["GT"], list)]
+        correct = sum(is_correct(item) for item in compared)
+        summary.update(correct=correct, compared=len(compared),
+                       accuracy=round(correct / len(compared) * 100, 2) if compared else None)
+        if compared:
+            print(f"【准确率统计】: {correct} / {len(compared)} 正确 ({summary['accuracy']:.2f}%)")
+        else:
+            print("【准确率统计】: 未找到可比较的GT数据。")
+
+    if output_folder_path and summary["results"] and not summary.get("cancelled"):
+        if gt_data is not None:
+            output_path = Path(output_folder_path) / "image_info_comparison_results.json"
+            payload = {name: {"raw": item["slip_starts"], "GT": item["GT"], "Val": item["Val"]}
+                       for name, item in summary["results"].items()}
+        else:
+            output_path = Path(output_folder_path) / "image_slip_starts.json"
+            payload = {name: item["slip_starts"] for name, item in summary["results"].items()}
+        try:
+            os.makedirs(output_folder_path, exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(payload, indent=4, ensure_ascii=False))
+            summary["output_path"] = str(output_path.resolve())
+            print(f"\n结果已保存至: {output_path.resolve()}")
+        except IOError as e:
+            print(f"\n错误：无法写入结果文件 -> {output_path}。原因: {e}")
+    return summary
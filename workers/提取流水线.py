@@ -0,0 +1,215 @@
+import heapq
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 阻塞操作的轮询间隔（秒），用于在下游出错时让各线程及时退出
+_POLL_INTERVAL = 0.1
+_SENTINEL = None
+
+
+class _StageStats:
+    """单个阶段的统计：处理条数与累计忙碌时间（多个线程的忙碌时间相加）。"""
+
+    def __init__(self, threads: int):
+        self.threads = threads
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self.items += 1
+            self.busy += seconds
+
+    def report(self, wall: float) -> Dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "items": self.items,
+            "busy_seconds": round(self.busy, 4),
+            # 利用率接近 1 的阶段就是瓶颈
+            "utilization": round(self.busy / (wall * self.threads), 3) if wall > 0 else 0.0,
+        }
+
+
+class _QueueStats:
+    """有界队列的深度统计，在每次入队时采样。"""
+
+    def __init__(self, q: queue.Queue):
+        self.q = q
+        self.samples = 0
+        self.total_depth = 0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+
+    def sample(self):
+        depth = self.q.qsize()
+        with self._lock:
+            self.samples += 1
+            self.total_depth += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.q.maxsize,
+            "max_depth": self.max_depth,
+            "mean_depth": round(self.total_depth / self.samples, 2) if self.samples else 0.0,
+        }
+
+
+class ExtractionPipeline:
+    """
+    读取 → 解码+检测 → 有序写出 的分阶段流水线，让网络盘的读取延迟与CPU计算重叠。
+
+    - 读取阶段：io_threads 个线程预读文件字节；
+    - 计算阶段：cpu_workers 个线程做解码与检测（OpenCV/NumPy 在计算时会释放 GIL）；
+    - 写出阶段：调用方所在线程，按输入顺序逐条产出结果。
+
+    阶段之间是容量为 queue_size 的有界队列；此外用信号量把“已读入但还没写出”的图片数
+    限制在 max_in_flight 以内（包括等待重排序的结果），峰值内存与文件夹大小无关。
+    """
+
+    def __init__(
+            self,
+            read_fn: Callable[[str], Any],
+            process_fn: Callable[[str, Any], Tuple[str, Optional[List[int]], Optional[str]]],
+            io_threads: int = 4,
+            cpu_workers: int = 4,
+            queue_size: int = 16
+    ):
+        """
+        Args:
+            read_fn: 读取阶段函数，path -> 原始字节。
+            process_fn: 计算阶段函数，(path, 原始字节) -> (文件名, [0, ...y, 高度], 错误原因)。
+            io_threads: 读取线程数。
+            cpu_workers: 计算线程数。
+            queue_size: 每个阶段间队列的容量。
+        """
+        self.read_fn = read_fn
+        self.process_fn = process_fn
+        self.io_threads = max(1, io_threads)
+        self.cpu_workers = max(1, cpu_workers)
+        self.queue_size = max(1, queue_size)
+        self.max_in_flight = 2 * self.queue_size + self.io_threads + self.cpu_workers
+        self._stats: Dict[str, Any] = {}
+
+    def run(self, image_paths: List[str]) -> Iterator[Tuple[str, Optional[List[int]], Optional[str]]]:
+        """
+        按 image_paths 的顺序逐条产出 (文件名, [0, ...y, 高度], 错误原因)。
+        """
+        decode_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        result_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        decode_depth, result_depth = _QueueStats(decode_queue), _QueueStats(result_queue)
+        read_stats, cpu_stats, write_stats = (
+            _StageStats(self.io_threads), _StageStats(self.cpu_workers), _StageStats(1)
+        )
+        in_flight = threading.Semaphore(self.max_in_flight)
+        abort = threading.Event()
+        source = iter(enumerate(image_paths))
+        source_lock = threading.Lock()
+        readers_left = [self.io_threads]
+
+        def _put(q: queue.Queue, item, depth: _QueueStats) -> bool:
+            while not abort.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    depth.sample()
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _reader():
+            try:
+                while not abort.is_set():
+                    if not in_flight.acquire(timeout=_POLL_INTERVAL):
+                        continue
+                    with source_lock:
+                        item = next(source, None)
+                    if item is None:
+                        in_flight.release()
+                        return
+                    index, path = item
+                    start = time.perf_counter()
+                    try:
+                        payload, error = self.read_fn(path), None
+                    except Exception as e:
+                        payload, error = None, str(e)
+                    read_stats.add(time.perf_counter() - start)
+                    if not _put(decode_queue, (index, path, payload, error), decode_depth):
+                        return
+            finally:
+                with source_lock:
+                    readers_left[0] -= 1
+                    last_reader = readers_left[0] == 0
+                if last_reader:
+                    for _ in range(self.cpu_workers):
+                        _put(decode_queue, _SENTINEL, decode_depth)
+
+        def _worker():
+            while not abort.is_set():
+                try:
+                    item = decode_queue.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is _SENTINEL:
+                    _put(result_queue, _SENTINEL, result_depth)
+                    return
+                index, path, payload, error = item
+                start = time.perf_counter()
+                if error is None:
+                    result = self.process_fn(path, payload)
+                else:
+                    result = (os.path.basename(path), None, error)
+                cpu_stats.add(time.perf_counter() - start)
+                if not _put(result_queue, (index, result), result_depth):
+                    return
+
+        threads = [threading.Thread(target=_reader, daemon=True) for _ in range(self.io_threads)]
+        threads += [threading.Thread(target=_worker, daemon=True) for _ in range(self.cpu_workers)]
+        wall_start = time.perf_counter()
+        for t in threads:
+            t.start()
+
+        # --- 写出阶段：小顶堆按序号重排，保证输出顺序与输入一致 ---
+        pending: List[Tuple[int, Any]] = []
+        next_index = 0
+        workers_left = self.cpu_workers
+        try:
+            while workers_left:
+                item = result_queue.get()
+                if item is _SENTINEL:
+                    workers_left -= 1
+                    continue
+                heapq.heappush(pending, item)
+                while pending and pending[0][0] == next_index:
+                    _, result = heapq.heappop(pending)
+                    start = time.perf_counter()
+                    yield result
+                    write_stats.add(time.perf_counter() - start)
+                    in_flight.release()
+                    next_index += 1
+        finally:
+            abort.set()
+            for t in threads:
+                t.join()
+            wall = time.perf_counter() - wall_start
+            self._stats = {
+                "wall_seconds": round(wall, 4),
+                "stages": {
+                    "read": read_stats.report(wall),
+                    "decode_detect": cpu_stats.report(wall),
+                    "write": write_stats.report(wall),
+                },
+                "queues": {
+                    "decode": decode_depth.report(),
+                    "result": result_depth.report(),
+                },
+                "max_in_flight": self.max_in_flight,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """最近一次 run 的各阶段忙碌时间与队列深度。"""
+        return self._stats
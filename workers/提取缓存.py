@@ -0,0 +1,204 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 缓存值（JSON 文本）总字节数的默认上限，超过后按最近最少使用淘汰
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 表结构版本（PRAGMA user_version）。旧版本的缓存直接丢弃重建，缓存内容随时可以重新提取
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (path, params)
+);
+CREATE INDEX IF NOT EXISTS idx_entries_hash ON entries (content_hash, params);
+"""
+
+_INSERT = (
+    "INSERT OR REPLACE INTO entries "
+    "(path, params, content_hash, size, mtime_ns, value, nbytes, last_used) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+
+def _file_digest(path: str) -> str:
+    """计算文件内容的哈希，作为 size+mtime 失配时的兜底键。"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _member_key(key: str, member: Optional[str]) -> str:
+    """文件级的键加上成员后缀，例如 PDF 的 "xxx.pdf#3@200"。"""
+    return key if member is None else f"{key}#{member}"
+
+
+class ExtractionCache:
+    """
+    图片线信息的持久化增量缓存，每张图片存一份 [0, ...y, 高度]。
+
+    - 主键：路径 + 检测参数，每个路径一行；文件大小 + 修改时间（纳秒）都对得上才算命中，不用读文件；
+    - 兜底：内容哈希（带索引）。文件被复制、touch 过但内容没变时仍能命中，并为这个路径写入自己的一行，
+      内容相同的多个副本各自保留自己的 size+mtime，不会互相覆盖；
+    - 检测参数（HSV阈值、CROP_WIDTH、合并间距、检测引擎、解码模式）是键的一部分，参数一变自然全部失配；
+    - PDF 的每一页作为一个成员单独缓存（member="页码@分辨率"），共用整个文件的 size+mtime 与内容哈希；
+    - 按值的总字节数做 LRU 淘汰；
+    - 底层是 SQLite（WAL 模式），多个 API 请求、多个进程同时读写同一个缓存文件是安全的。
+      每个请求各自创建一个实例即可。每次写入都是单独的短事务（WAL + synchronous=NORMAL 下提交不落盘同步，
+      开销很小），写锁不会跨图片持有；命中时刷新的使用时间攒在内存里，close 时一次写入。
+      数据库忙或出错时，读当作未命中、写直接跳过，不影响提取本身。
+    """
+
+    def __init__(self, db_path: str, params: Dict[str, Any], max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db_path = db_path
+        self.params = json.dumps(params, sort_keys=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        # 按路径直接命中时要刷新使用时间的 (last_used, path, params)
+        self._touched: List[tuple] = []
+        # 靠内容哈希命中时要为该路径补写的整行
+        self._adopted: List[tuple] = []
+        self._digests: Dict[str, str] = {}
+        self._file_digests: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+        parent = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(parent, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS entries")
+                self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._conn.executescript(_SCHEMA)
+
+    def get(self, image_path: str, member: Optional[str] = None) -> Optional[List[int]]:
+        """查询一张图片（或 PDF 的一页，见 member）的缓存结果，未命中返回 None。"""
+        file_path = os.path.abspath(image_path)
+        st = os.stat(file_path)
+        path = _member_key(file_path, member)
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value FROM entries WHERE path=? AND params=? AND size=? AND mtime_ns=?",
+                    (path, self.params, st.st_size, st.st_mtime_ns)
+                ).fetchone()
+                adopted = None
+                if row is None:
+                    # 这个路径没有记录或 size+mtime 失配，退回内容哈希（可能是别的路径上的同一份内容）
+                    digest = _member_key(self._digest(file_path, st), member)
+                    self._digests[path] = digest
+                    row = self._conn.execute(
+                        "SELECT value FROM entries WHERE content_hash=? AND params=? LIMIT 1",
+                        (digest, self.params)
+                    ).fetchone()
+                    adopted = digest
+            except sqlite3.Error as e:
+                self._report_error("读取", e)
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            now = time.time()
+            if adopted is None:
+                self._touched.append((now, path, self.params))
+            else:
+                value = row[0]
+                self._adopted.append(
+                    (path, self.params, adopted, st.st_size, st.st_mtime_ns, value, len(value), now)
+                )
+            return json.loads(row[0])
+
+    def put(self, image_path: str, value: List[int], member: Optional[str] = None):
+        """写入一张图片（或 PDF 的一页）的结果。"""
+        file_path = os.path.abspath(image_path)
+        st = os.stat(file_path)
+        path = _member_key(file_path, member)
+        digest = self._digests.pop(path, None) or _member_key(self._digest(file_path, st), member)
+        text = json.dumps(value)
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        _INSERT,
+                        (path, self.params, digest, st.st_size, st.st_mtime_ns, text, len(text), time.time())
+                    )
+            except sqlite3.Error as e:
+                self._report_error("写入", e)
+
+    def _digest(self, file_path: str, st: os.stat_result) -> str:
+        """同一个 PDF 的各页共用一次内容哈希，不必每页重读整个文件。"""
+        key = (file_path, st.st_size, st.st_mtime_ns)
+        digest = self._file_digests.get(key)
+        if digest is None:
+            digest = self._file_digests[key] = _file_digest(file_path)
+        return digest
+
+    def _report_error(self, action: str, error: sqlite3.Error):
+        # 只提示第一次，避免数据库一直忙时刷屏
+        if self.errors == 0:
+            print(f"警告：缓存{action}失败（{error}），本次按未缓存处理。")
+        self.errors += 1
+
+    def _evict(self):
+        """总字节数超过上限时，从最久未使用的条目开始删除。"""
+        total = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        victims = []
+        for rowid, nbytes in self._conn.execute("SELECT rowid, nbytes FROM entries ORDER BY last_used"):
+            victims.append((rowid,))
+            to_free -= nbytes
+            if to_free <= 0:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE rowid=?", victims)
+
+    def stats(self) -> Dict[str, int]:
+        stats = {"hits": self.hits, "misses": self.misses}
+        if self.errors:
+            stats["errors"] = self.errors
+        return stats
+
+    def close(self):
+        """写入命中条目的使用时间、执行淘汰并关闭连接。"""
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "UPDATE entries SET last_used=? WHERE path=? AND params=?",
+                        self._touched
+                    )
+                    self._conn.executemany(_INSERT, self._adopted)
+                    self._evict()
+            except sqlite3.Error as e:
+                self._report_error("整理", e)
+            self._touched = []
+            self._adopted = []
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
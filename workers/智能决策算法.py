@@ -1,5 +1,14 @@
 import numpy as np
-from typing import List
+from typing import List, Tuple
+
+from .一维K均值 import optimal_kmeans_1d
+from .均衡分割算法 import equal_split_confidence
+
+# "equal": 原有实现，按等高理想位置猜中心点，只比较 K=1,2,3；
+# "kmeans": 用精确最优一维 K-Means（动态规划）得到每个 K 的最小 RSS，再按 BIC 选 K
+CLUSTER_ENGINES = ("equal", "kmeans")
+# 最佳模型领先次佳模型的 BIC 差达到该值时置信度为 1（BIC 差 >10 通常视为“决定性证据”）
+BIC_DECISIVE_MARGIN = 10.0
 
 
 def _calculate_for_n_slips(actual_lines: List[int], y_max: int, num_slips: int) -> List[int]:
@@ -43,6 +52,13 @@ def _calculate_bic(actual_lines: List[int], centers: List[int]) -> float:
         rss += min_distance ** 2
 
     # 2. 计算 BIC
+    return _bic_from_rss(n, k, rss)
+
+
+def _bic_from_rss(n: int, k: int, rss: float) -> float:
+    """
+    BIC = n * log(RSS/n) + k * log(n)
+    """
     # 为了避免 log(0) 的数学错误，如果 rss 为 0，给它一个极小值。
     if rss == 0:
         rss = 1e-9
@@ -52,18 +68,72 @@ def _calculate_bic(actual_lines: List[int], centers: List[int]) -> float:
     return bic_score
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def _bic_confidence(bic: dict) -> float:
+    """最佳与次佳模型的 BIC 差，按 BIC_DECISIVE_MARGIN 归一化到 0~1。"""
+    ranked = sorted(bic.values())
+    if len(ranked) < 2:
+        return 1.0
+    return float(min(1.0, (ranked[1] - ranked[0]) / BIC_DECISIVE_MARGIN))
+
+
+def _find_with_kmeans(actual_lines: List[int], num_slips: int, max_slips: int) -> Tuple[List[int], float]:
+    """
+    [kmeans 引擎] 一次动态规划得到 K=1..max_slips 各自的最优分段与最小 RSS，
+    按 BIC 选出最佳 K，每段的第一条线就是该联的起始线。
+    """
+    lines = sorted(actual_lines)
+    max_k = num_slips if num_slips > 0 else max_slips
+    costs, starts = optimal_kmeans_1d(lines, max_k, metric="l2")
+    if num_slips > 0:
+        best_k, confidence = len(costs), 1.0
+    else:
+        bic = {k: _bic_from_rss(len(lines), k, costs[k - 1]) for k in range(1, len(costs) + 1)}
+        best_k = min(bic, key=bic.get)
+        confidence = _bic_confidence(bic)
+    return [lines[i] for i in starts[best_k - 1]], confidence
+
+
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        engine: str = "equal",
+        max_slips: int = 3
+) -> List[int]:
     """
     通过 "BIC模型选择" 与 "均衡分割" 结合，智能判断并找出回单的起始线。
     这是迄今最稳健、理论最扎实的版本。
+
+    Args:
+        engine: "equal"（默认，原有实现）或 "kmeans"（精确最优聚类，见 CLUSTER_ENGINES）。
+        max_slips: kmeans 引擎自动模式下尝试的最大联数，K=1..max_slips 在一次动态规划中全部算出。
+    """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, engine, max_slips)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        engine: str = "equal",
+        max_slips: int = 3
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    自动模式为最佳模型领先次佳模型的 BIC 差（见 BIC_DECISIVE_MARGIN）；
+    强制模式见 equal_split_confidence（kmeans 引擎的强制模式没有需要判断的地方，置信度为 1）。
     """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
+
+    if engine == "kmeans":
+        return _find_with_kmeans(actual_lines, num_slips, max_slips)
+    if engine != "equal":
+        raise ValueError(f"未知的聚类引擎: {engine}，可选: {CLUSTER_ENGINES}")
 
     # 强制模式：直接调用均衡分割算法
     if num_slips in [1, 2, 3]:
-        return _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        lines = _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, equal_split_confidence(coords_with_boundaries, num_slips)
 
     # --- 自动判断模式 ---
     scores = {}
@@ -81,7 +151,7 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     # 3. 找到 BIC 分数最低的最佳联数
     best_k = min(scores, key=lambda k: scores[k]['bic'])
 
-    return scores[best_k]['lines']
+    return scores[best_k]['lines'], _bic_confidence({k: score['bic'] for k, score in scores.items()})
 
 
 '''
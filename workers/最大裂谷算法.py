@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 
 def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
@@ -18,14 +18,21 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     Returns:
         一个包含每个回单联起始线y坐标的有序列表。
     """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips)[0]
+
+
+def find_slip_starts_scored(coords_with_boundaries: List[int], num_slips: int) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    选中的最小“裂谷”比落选的最大间距宽得越多越可靠。
+    本算法无法自行判断联数，num_slips<=0 的自动模式下（只有一条线时除外）置信度恒为 0。
+    """
     # 1. 提取出实际的线条坐标（排除列表头尾的 0 和 ymax）
     actual_lines = coords_with_boundaries[1:-1]
 
     # 2. 处理边界情况：如果无需分割或数据不足，则返回第一条线
     if not actual_lines:
-        return []
-    if num_slips <= 1:
-        return [actual_lines[0]]
+        return [], 1.0
 
     # 3. 核心逻辑：计算所有间距，并与间距后的坐标配对
     gaps = [
@@ -35,12 +42,22 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
 
     # 4. 排序并筛选出最大的 N-1 个“裂谷”作为分割点
     gaps.sort(key=lambda x: x[0], reverse=True)
+    if num_slips <= 1:
+        if num_slips == 1 or len(actual_lines) == 1:
+            return [actual_lines[0]], 1.0
+        return [actual_lines[0]], 0.0
+
     num_dividers = num_slips - 1
     divider_coords = [coord for gap, coord in gaps[:num_dividers]]
+    if len(gaps) > num_dividers and gaps[num_dividers - 1][0] > 0:
+        confidence = 1 - max(0, gaps[num_dividers][0]) / gaps[num_dividers - 1][0]
+    else:
+        # 间距不够分，或选中的“裂谷”宽度为 0，结果不可靠
+        confidence = 0.0
 
     # 5. 组合最终结果：第一条线 + 所有分割点，并排序
     start_lines = sorted(list(set([actual_lines[0]] + divider_coords)))
 
-    return start_lines
+    return start_lines, confidence
 
 
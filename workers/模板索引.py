@@ -0,0 +1,160 @@
+import bisect
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# 默认的模板索引文件
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "template_index.json")
+# 校验容差：查到的每条起始线与模板预测位置的偏差不超过 图片高度 x 该比例
+DEFAULT_TOLERANCE = 0.01
+
+# 文件名中 "_page" 之前的部分就是模板（银行_批次回单_样式_联数），例如
+# "招商银行_0906回单_样式2_多联_page0_1867_1.jpg" -> "招商银行_0906回单_样式2_多联"
+_TEMPLATE_PATTERN = re.compile(r"^(.+?)_page\d+")
+
+
+def template_key(filename: str) -> Optional[str]:
+    """从文件名中提取模板名，提取不到时返回 None。"""
+    match = _TEMPLATE_PATTERN.match(os.path.basename(filename))
+    return match.group(1) if match else None
+
+
+class TemplateIndex:
+    """
+    按 银行/样式 模板记录各联起始线的相对位置（起始线 / 图片高度），
+    已知模板的新图片直接按比例查表，不再跑完整的分割算法。
+
+    - 从 image_GT.json 学习：同一模板的多张样本取平均比例；
+    - 查表后逐条校验：每个预测位置附近（容差内）必须真的有一条检测到的线，否则视为未命中；
+    - 持久化为 JSON，第一次查询时才读盘（懒加载），服务启动不受影响。
+    """
+
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH, tolerance: float = DEFAULT_TOLERANCE):
+        self.index_path = index_path
+        self.tolerance = tolerance
+        self._templates: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+        # 同一个索引被多个请求线程、后台任务同时查询，计数单独加锁（不与读写索引文件的锁争用）
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def _ensure_loaded(self) -> Dict[str, Dict[str, Any]]:
+        if self._templates is None:
+            with self._lock:
+                if self._templates is None:
+                    self._templates = self._load()
+        return self._templates
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.isfile(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"警告：无法读取模板索引 {self.index_path}，将不使用模板。原因: {e}")
+            return {}
+
+    def learn_from_gt(self, gt_json_path: str) -> int:
+        """
+        从标准答案学习各模板的分割比例（覆盖同名模板的旧记录），返回学到的模板数。
+        同一模板内联数不一致时，按多数样本的联数为准。
+        """
+        with open(gt_json_path, 'r', encoding='utf-8') as f:
+            gt_data = json.load(f)
+        if not isinstance(gt_data, dict):
+            raise ValueError(f"GT文件 {gt_json_path} 应为 {{文件名: [0, ...起始线, 高度]}} 格式")
+
+        samples: Dict[str, List[List[float]]] = {}
+        for filename, gt in gt_data.items():
+            key = template_key(filename)
+            if key is None or not isinstance(gt, list) or len(gt) < 3 or gt[-1] <= 0:
+                continue
+            samples.setdefault(key, []).append([line / gt[-1] for line in gt[1:-1]])
+
+        learned = {}
+        for key, ratio_lists in samples.items():
+            slips, _ = Counter(len(r) for r in ratio_lists).most_common(1)[0]
+            kept = [r for r in ratio_lists if len(r) == slips]
+            ratios = [sum(column) / len(kept) for column in zip(*kept)]
+            spread = max(abs(r[i] - ratios[i]) for r in kept for i in range(slips))
+            learned[key] = {"ratios": ratios, "samples": len(kept), "spread": spread}
+
+        templates = self._ensure_loaded()
+        with self._lock:
+            templates.update(learned)
+        return len(learned)
+
+    def save(self):
+        """写回索引文件（先写临时文件再替换）。"""
+        templates = self._ensure_loaded()
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(templates, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, filename: str, coords_with_boundaries: List[int], num_slips: int = 0) -> Optional[List[int]]:
+        """
+        按模板直接给出各联起始线；模板未知、联数不符或校验失败时返回 None，由调用方退回完整算法。
+
+        Args:
+            filename: 图片文件名，用于提取模板名。
+            coords_with_boundaries: [0, ...y, 高度]，要求已升序。
+            num_slips: >0 时只接受联数相同的模板。
+        """
+        templates = self._ensure_loaded()
+        key = template_key(filename)
+        template = templates.get(key) if key is not None else None
+        actual_lines = coords_with_boundaries[1:-1]
+        if template is None or not actual_lines or (num_slips > 0 and num_slips != len(template["ratios"])):
+            self._count("misses")
+            return None
+
+        height = coords_with_boundaries[-1]
+        tolerance = self.tolerance * height
+        starts = []
+        for ratio in template["ratios"]:
+            expected = ratio * height
+            # 二分找离预测位置最近的线
+            i = bisect.bisect_left(actual_lines, expected)
+            candidates = actual_lines[max(0, i - 1):i + 1]
+            closest = min(candidates, key=lambda line: abs(line - expected))
+            if abs(closest - expected) > tolerance:
+                self._count("rejected")
+                return None
+            starts.append(closest)
+
+        if len(set(starts)) != len(starts):
+            self._count("rejected")
+            return None
+        self._count("hits")
+        return starts
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "templates": len(self._templates) if self._templates is not None else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+            }
+
+
+def build_template_index(gt_json_path: str, index_path: str = DEFAULT_INDEX_PATH) -> TemplateIndex:
+    """从标准答案学习模板并保存到 index_path。"""
+    index = TemplateIndex(index_path)
+    count = index.learn_from_gt(gt_json_path)
+    index.save()
+    print(f"模板索引已保存至: {os.path.abspath(index_path)}（本次学习 {count} 个模板）")
+    return index
@@ -1,5 +1,11 @@
 import numpy as np
-from typing import List
+from typing import List, Tuple
+
+from .均衡分割算法 import equal_split_confidence
+
+# 自动模式的分割阈值 = max(间距中位数 x GAP_MULTIPLIER, MIN_BREAK_GAP)
+GAP_MULTIPLIER = 5
+MIN_BREAK_GAP = 150
 
 
 def _run_forced_mode(actual_lines: List[int], y_max: int, num_slips: int) -> List[int]:
@@ -23,17 +29,21 @@ def _run_forced_mode(actual_lines: List[int], y_max: int, num_slips: int) -> Lis
     return sorted(list(centers))
 
 
-def _run_auto_mode(actual_lines: List[int]) -> List[int]:
+def _run_auto_mode(
+        actual_lines: List[int],
+        gap_multiplier: float = GAP_MULTIPLIER,
+        min_break_gap: float = MIN_BREAK_GAP
+) -> Tuple[List[int], float]:
     """
     [自动模式] 使用基于间距中位数的稳健、自适应算法。
     """
     if len(actual_lines) <= 1:
-        return actual_lines
+        return actual_lines, 1.0
 
     # 1. 计算所有连续线条之间的间距
     gaps = np.diff(actual_lines)
     if len(gaps) == 0:
-        return [actual_lines[0]]
+        return [actual_lines[0]], 1.0
 
     # 2. 计算间距的中位数，这是一个对异常值稳健的“正常”间距基准
     median_gap = np.median(gaps)
@@ -41,7 +51,7 @@ def _run_auto_mode(actual_lines: List[int]) -> List[int]:
     # 3. 设定一个自适应阈值。一个间距如果大于中位数的5倍，就极有可能是分割点。
     #    同时设定一个最小绝对阈值（如150），防止在所有间距都很小的情况下误判。
     #    这个乘数(5)和最小阈值(150)是可调整的经验参数，但通用性很强。
-    adaptive_threshold = max(median_gap * 5, 150)
+    adaptive_threshold = max(median_gap * gap_multiplier, min_break_gap)
 
     # 4. 找到所有超过阈值的间距的索引
     break_indices = np.where(gaps > adaptive_threshold)[0]
@@ -53,20 +63,42 @@ def _run_auto_mode(actual_lines: List[int]) -> List[int]:
     # 最终结果总是包含第一条线
     final_result = sorted(list(set([actual_lines[0]] + start_lines)))
 
-    return final_result
+    # 置信度：离自适应阈值最近的那个间距，相对阈值还有多远
+    confidence = float(min(1.0, np.min(np.abs(gaps - adaptive_threshold)) / adaptive_threshold))
+    return final_result, confidence
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        gap_multiplier: float = GAP_MULTIPLIER,
+        min_break_gap: float = MIN_BREAK_GAP
+) -> List[int]:
     """
     最终版混合算法：
     - 强制模式 (num_slips > 0): 使用100%准确的均衡分割算法。
-    - 自动模式 (num_slips <= 0): 使用稳健的、基于间距中位数的自适应算法。
+    - 自动模式 (num_slips <= 0): 使用稳健的、基于间距中位数的自适应算法，
+      分割阈值为 max(间距中位数 x gap_multiplier, min_break_gap)。
+    """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, gap_multiplier, min_break_gap)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        gap_multiplier: float = GAP_MULTIPLIER,
+        min_break_gap: float = MIN_BREAK_GAP
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    自动模式下为离自适应阈值最近的间距与阈值的相对距离；强制模式见 equal_split_confidence。
     """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
 
     if num_slips > 0:
-        return _run_forced_mode(actual_lines, coords_with_boundaries[-1], num_slips)
+        lines = _run_forced_mode(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, equal_split_confidence(coords_with_boundaries, num_slips)
     else:
-        return _run_auto_mode(actual_lines)
\ No newline at end of file
+        return _run_auto_mode(actual_lines, gap_multiplier, min_break_gap)
\ No newline at end of file
@@ -0,0 +1,171 @@
+import importlib
+import inspect
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 文件名以此结尾的模块视为分割算法（例如 结构匹配算法.py）
+ALGORITHM_SUFFIX = "算法"
+# 未指定算法时使用的默认算法
+DEFAULT_ALGORITHM = "结构匹配算法"
+# 没有整批接口的算法，整批图片数达到该值且 workers > 1 时才用进程池（进程启动本身要几十到上百毫秒）
+POOL_MIN_RECORDS = 2000
+# 进程池模式下每个子任务的图片数
+POOL_CHUNK_SIZE = 500
+
+_WORKERS_DIR = Path(__file__).resolve().parent
+# 模块顶层定义（或赋值）了 find_slip_starts 才能用于分割，例如 领头羊算法 只有辅助函数，不在可选之列
+_ENTRY_PATTERN = re.compile(r"^(def find_slip_starts\(|find_slip_starts\s*=)", re.MULTILINE)
+_lock = threading.Lock()
+_modules: Dict[str, Any] = {}
+
+
+def _has_entry(path: Path) -> bool:
+    try:
+        return _ENTRY_PATTERN.search(path.read_text(encoding="utf-8")) is not None
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def available_algorithms() -> List[str]:
+    """
+    扫描 workers 目录下所有 *算法.py，返回提供了 find_slip_starts 的模块名列表
+    （只看文件名与源码文本，不导入）。
+    """
+    return sorted(
+        path.stem for path in _WORKERS_DIR.glob(f"*{ALGORITHM_SUFFIX}.py") if _has_entry(path)
+    )
+
+
+def _normalize(name: str) -> str:
+    """允许省略 "算法" 后缀，例如 "结构匹配" 等同于 "结构匹配算法"。"""
+    name = name.strip()
+    return name if name.endswith(ALGORITHM_SUFFIX) else name + ALGORITHM_SUFFIX
+
+
+def _load(name: Optional[str]):
+    """按名称导入算法模块，第一次用到时才导入，之后直接复用。"""
+    module_name = _normalize(name or DEFAULT_ALGORITHM)
+    module = _modules.get(module_name)
+    if module is not None:
+        return module
+    # 只允许导入扫描到的算法模块，避免请求里传入任意模块名
+    if module_name not in available_algorithms():
+        raise ValueError(f"未知的算法: {name}，可选: {available_algorithms()}")
+    with _lock:
+        module = _modules.get(module_name)
+        if module is None:
+            module = importlib.import_module(f".{module_name}", package=__package__)
+            if not callable(getattr(module, "find_slip_starts", None)):
+                raise ValueError(f"算法模块 {module_name} 没有提供 find_slip_starts(coords_with_boundaries, num_slips)，不能用于分割")
+            _modules[module_name] = module
+    return module
+
+
+def get_algorithm(name: Optional[str] = None) -> Callable[..., List[int]]:
+    """取出算法的 find_slip_starts，name 为 None 时返回默认算法。"""
+    return _load(name).find_slip_starts
+
+
+def get_batch_algorithm(name: Optional[str] = None) -> Optional[Callable[..., List[List[int]]]]:
+    """算法提供整批接口（find_slip_starts_batch）时返回它，否则返回 None。"""
+    return getattr(_load(name), "find_slip_starts_batch", None)
+
+
+def get_scored_algorithm(name: Optional[str] = None) -> Optional[Callable[..., Tuple[List[int], float]]]:
+    """算法提供带置信度的接口（find_slip_starts_scored）时返回它，否则返回 None。"""
+    return getattr(_load(name), "find_slip_starts_scored", None)
+
+
+def check_params(func: Callable, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    检查额外参数是否都是算法函数能接收的关键字参数，返回可直接 **展开 的字典。
+    不符合时抛出 ValueError，而不是等到逐张计算时才报 TypeError。
+    """
+    params = dict(params or {})
+    if not params:
+        return params
+    signature = inspect.signature(func)
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in signature.parameters.values()):
+        return params
+    accepted = [
+        p.name for i, p in enumerate(signature.parameters.values())
+        if i >= 2 and p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+    ]
+    unknown = [key for key in params if key not in accepted]
+    if unknown:
+        raise ValueError(f"算法 {func.__module__} 不支持参数: {unknown}，可用参数: {accepted}")
+    return params
+
+
+def run_algorithm(
+        name: Optional[str],
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        params: Optional[Dict[str, Any]] = None
+) -> List[int]:
+    """用指定算法（及其额外参数）计算一张图片的各联起始线。"""
+    func = get_algorithm(name)
+    return func(coords_with_boundaries, num_slips, **check_params(func, params))
+
+
+def _accepts_params(func: Callable, params: Dict[str, Any], skip: int) -> bool:
+    """func 去掉前 skip 个位置参数后，是否能接收 params 里的全部关键字参数。"""
+    names = list(inspect.signature(func).parameters)[skip:]
+    return all(key in names for key in params)
+
+
+def _run_chunk(name: Optional[str], coords_list: List[List[int]], num_slips: int, params: Dict[str, Any]) -> List[List[int]]:
+    """[进程池子任务] 逐张计算一批图片。"""
+    func = get_algorithm(name)
+    return [func(coords, num_slips, **params) for coords in coords_list]
+
+
+def run_algorithm_batch(
+        name: Optional[str],
+        coords_list: List[List[int]],
+        num_slips: int,
+        params: Optional[Dict[str, Any]] = None,
+        workers: int = 1,
+        memo: Optional[Any] = None
+) -> Tuple[List[List[int]], str]:
+    """
+    用指定算法计算整批图片的各联起始线，结果顺序与输入一致，与逐张调用 find_slip_starts 完全相同。
+
+    算法提供整批接口（find_slip_starts_batch）且能接收 params 时一次向量化算完；
+    否则图片数达到 POOL_MIN_RECORDS 且 workers > 1 时分块交给进程池（进程数不超过CPU核数）；其余情况逐张计算。
+    设置 memo（包装同一算法的 切分记忆.SlipStartMemo）时先整批查缓存，只有未命中的图片按上面的方式计算。
+
+    Returns:
+        (每张图片的起始线列表, 实际使用的方式 "batch" / "pool" / "serial"；全部命中缓存时为 "memo")
+    """
+    func = get_algorithm(name)
+    params = check_params(func, params)
+    batch_fn = get_batch_algorithm(name)
+    workers = min(workers, os.cpu_count() or 1)
+
+    def compute(records: List[List[int]]) -> Tuple[List[List[int]], str]:
+        if batch_fn is not None and _accepts_params(batch_fn, params, skip=3):
+            # 整批接口统一接收 pack_coords 打包的 CSR 结构
+            from .结构匹配算法 import pack_coords
+            return batch_fn(*pack_coords(records), num_slips, **params), "batch"
+        if workers > 1 and len(records) >= POOL_MIN_RECORDS:
+            chunks = [records[i:i + POOL_CHUNK_SIZE] for i in range(0, len(records), POOL_CHUNK_SIZE)]
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                futures = [executor.submit(_run_chunk, name, chunk, num_slips, params) for chunk in chunks]
+                return [starts for future in futures for starts in future.result()], "pool"
+        return [func(coords, num_slips, **params) for coords in records], "serial"
+
+    if memo is None:
+        return compute(coords_list)
+    modes = []
+
+    def compute_misses(records: List[List[int]], _num_slips: int) -> List[List[int]]:
+        results, mode = compute(records)
+        modes.append(mode)
+        return results
+
+    return memo.batch(coords_list, num_slips, compute_misses, **params), modes[0] if modes else "memo"
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 # --- 算法核心配置 ---
 # 这个阈值是新算法的关键。
@@ -29,7 +29,11 @@ def _filter_clusters(nums: List[int], threshold: int) -> List[int]:
     return representatives
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        clustering_threshold: int = CLUSTERING_THRESHOLD
+) -> List[int]:
     """
     新算法的包装器，保持与旧版 "最大裂谷算法" 相同的接口。
 
@@ -39,24 +43,39 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
         coords_with_boundaries: 一个已排序的坐标列表，
                                 必须以 0 开始，以图片高度 ymax 结束。
         num_slips: 期望分割出的回单联数。算法将确保返回的结果不超过这个数量。
+        clustering_threshold: 开启新簇的最小间距，默认 CLUSTERING_THRESHOLD。
 
     Returns:
         一个包含每个回单联起始线y坐标的有序列表。
     """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, clustering_threshold)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        clustering_threshold: int = CLUSTERING_THRESHOLD
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    所有相邻间距离 clustering_threshold 越远，“是否开启新簇”的判断越不含糊。
+    """
     # 1. 提取出实际的线条坐标（排除列表头尾的 0 和 ymax）
     actual_lines = coords_with_boundaries[1:-1]
 
     # 2. 如果没有实际线条，返回空列表
     if not actual_lines:
-        return []
+        return [], 1.0
+    gaps = [b - a for a, b in zip(actual_lines, actual_lines[1:])]
+    confidence = min([abs(gap - clustering_threshold) / clustering_threshold for gap in gaps] + [1.0])
 
     # 3. 调用核心的簇过滤算法
-    # 注意：这里使用了在本文件顶部定义的 CLUSTERING_THRESHOLD
-    slip_starts = _filter_clusters(actual_lines, CLUSTERING_THRESHOLD)
+    # 注意：默认使用在本文件顶部定义的 CLUSTERING_THRESHOLD
+    slip_starts = _filter_clusters(actual_lines, clustering_threshold)
 
     # 4. 确保返回的结果数量不超过预期的联数
     # 这是为了匹配业务需求，例如，即使检测到3个可能的联，如果预期是2，也只返回前2个。
     if num_slips > 0 and len(slip_starts) > num_slips:
-        return slip_starts[:num_slips]
+        return slip_starts[:num_slips], confidence
 
-    return slip_starts
\ No newline at end of file
+    return slip_starts, confidence
\ No newline at end of file
@@ -0,0 +1,114 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .算法注册 import get_scored_algorithm
+
+# 默认的级联顺序：从便宜到昂贵。结构匹配最便宜，且在样例数据上答对时置信度都不低于 0.4
+DEFAULT_TIERS = ("结构匹配算法", "稳健间距算法", "智能决策算法", "高级分割算法")
+# 置信度达到该值即采纳，不再往下一级走
+DEFAULT_THRESHOLD = 0.35
+
+
+def load_scored(module_name: str) -> Callable[[List[int], int], Tuple[List[int], float]]:
+    """按算法名（如 "结构匹配算法"，可省略"算法"后缀）取出其 find_slip_starts_scored，无效时抛出 ValueError。"""
+    scored = get_scored_algorithm(module_name)
+    if scored is None:
+        raise ValueError(f"算法模块 {module_name} 没有提供 find_slip_starts_scored，无法参与级联")
+    return scored
+
+
+class _TierStats:
+    def __init__(self):
+        self.reached = 0
+        self.accepted = 0
+        self.seconds = 0.0
+
+
+class CascadeScheduler:
+    """
+    按成本从低到高依次尝试各算法，第一个置信度达到阈值的结果即被采纳；
+    都达不到时采用置信度最高的那个（置信度相同取靠前的）。
+
+    用法与普通的 find_slip_starts 相同（可以直接交给 SlipStartMemo 包装，或作为 process_and_compare 的 cascade 参数），
+    run() 额外返回置信度与采纳的层级。stats() 报告每一层被走到、被采纳的次数，
+    以及相比每张图片都跑完所有层估算节省的耗时。
+    """
+
+    def __init__(
+            self,
+            tiers: Sequence[Any] = DEFAULT_TIERS,
+            threshold: float = DEFAULT_THRESHOLD
+    ):
+        """
+        Args:
+            tiers: 按成本升序排列的层级。每一项可以是算法模块名（取其 find_slip_starts_scored），
+                   也可以是 (名称, scored 函数) 元组。
+            threshold: 采纳结果所需的最低置信度（0~1）。
+        """
+        self.tiers: List[Tuple[str, Callable]] = [
+            (tier, load_scored(tier)) if isinstance(tier, str) else tuple(tier) for tier in tiers
+        ]
+        if not self.tiers:
+            raise ValueError("级联至少需要一个算法")
+        self.threshold = threshold
+        self.calls = 0
+        self._stats = {name: _TierStats() for name, _ in self.tiers}
+        self._lock = threading.Lock()
+
+    def run(self, coords_with_boundaries: List[int], num_slips: int) -> Tuple[List[int], float, str]:
+        """返回 (起始线, 置信度, 采纳的算法名)。"""
+        best: Optional[Tuple[List[int], float, str]] = None
+        timings = []
+        for name, scored in self.tiers:
+            start = time.perf_counter()
+            lines, confidence = scored(coords_with_boundaries, num_slips)
+            timings.append((name, time.perf_counter() - start))
+            if best is None or confidence > best[1]:
+                best = (lines, confidence, name)
+            if confidence >= self.threshold:
+                break
+
+        with self._lock:
+            self.calls += 1
+            for name, seconds in timings:
+                tier = self._stats[name]
+                tier.reached += 1
+                tier.seconds += seconds
+            self._stats[best[2]].accepted += 1
+        return best
+
+    def __call__(self, coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+        return self.run(coords_with_boundaries, num_slips)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        各层统计。节省的耗时按“没走到某层的次数 x 该层的平均耗时”估算；
+        从未被走到的层没有耗时样本，不计入估算，在 unmeasured 中列出。
+        """
+        with self._lock:
+            tiers = {}
+            saved = 0.0
+            unmeasured = []
+            for name, _ in self.tiers:
+                tier = self._stats[name]
+                mean = tier.seconds / tier.reached if tier.reached else None
+                if mean is None:
+                    unmeasured.append(name)
+                else:
+                    saved += (self.calls - tier.reached) * mean
+                tiers[name] = {
+                    "reached": tier.reached,
+                    "reached_rate": round(tier.reached / self.calls, 4) if self.calls else 0.0,
+                    "accepted": tier.accepted,
+                    "mean_ms": round(mean * 1000, 4) if mean is not None else None,
+                }
+            spent = sum(self._stats[name].seconds for name, _ in self.tiers)
+            return {
+                "calls": self.calls,
+                "threshold": self.threshold,
+                "tiers": tiers,
+                "spent_ms": round(spent * 1000, 3),
+                "estimated_saved_ms": round(saved * 1000, 3),
+                "unmeasured": unmeasured,
+            }
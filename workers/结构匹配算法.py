@@ -1,5 +1,11 @@
+from itertools import chain
 from typing import List, Tuple, Optional
 
+import numpy as np
+
+# 自动模式下判定“符合标准结构”的平均偏差阈值
+MATCH_THRESHOLD = 0.05
+
 
 def _calculate_match_score(actual_lines: List[int], y_max: int, num_slips: int) -> Tuple[float, List[int]]:
     """
@@ -31,35 +37,211 @@ def _calculate_match_score(actual_lines: List[int], y_max: int, num_slips: int)
     return average_score, sorted(list(matched_lines))
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        match_threshold: float = MATCH_THRESHOLD
+) -> List[int]:
     """
     基于 "结构匹配" 的终极算法。
     它利用了 "回单通常是均分的" 这一强先验知识，具有极高的稳健性。
+
+    Args:
+        match_threshold: 自动模式下判定“符合标准结构”的平均偏差阈值，默认 MATCH_THRESHOLD。
+    """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, match_threshold)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        match_threshold: float = MATCH_THRESHOLD
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    采纳的假设其匹配得分离 match_threshold 越远越可靠；判为单联时，最好的假设得分超出阈值越多越可靠。
     """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
 
     # --- 强制模式 ---
     if num_slips > 0:
-        _, lines = _calculate_match_score(actual_lines, coords_with_boundaries[-1], num_slips)
-        return lines
+        score, lines = _calculate_match_score(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, _clip01(1 - score / match_threshold)
 
     # --- 自动模式 ---
     # 核心逻辑：优先检查是否符合2联或3联的“标准结构”。
-    # 如果某个假设的平均偏差小于 5% (0.05)，我们就认为找到了正确答案。
-
-    MATCH_THRESHOLD = 0.05  # 5% 的容错率，非常稳健
+    # 如果某个假设的平均偏差小于 5% (MATCH_THRESHOLD)，我们就认为找到了正确答案。
 
     # 1. 测试 2 联假设 (最常见情况)
     score_2, lines_2 = _calculate_match_score(actual_lines, coords_with_boundaries[-1], 2)
-    if score_2 < MATCH_THRESHOLD:
-        return lines_2
+    if score_2 < match_threshold:
+        return lines_2, _clip01(1 - score_2 / match_threshold)
 
     # 2. 测试 3 联假设
     score_3, lines_3 = _calculate_match_score(actual_lines, coords_with_boundaries[-1], 3)
-    if score_3 < MATCH_THRESHOLD:
-        return lines_3
+    if score_3 < match_threshold:
+        return lines_3, _clip01(1 - score_3 / match_threshold)
 
     # 3. 如果都不符合标准结构，则认为是单联
-    return [actual_lines[0]]
\ No newline at end of file
+    return [actual_lines[0]], _clip01(min(score_2, score_3) / match_threshold - 1)
+
+
+def _clip01(value: float) -> float:
+    return float(min(1.0, max(0.0, value)))
+
+
+def pack_coords(coords_list: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    把多张图片的坐标列表打包为 CSR 结构：第 i 张图片的坐标是 values[offsets[i]:offsets[i + 1]]。
+    """
+    offsets = np.zeros(len(coords_list) + 1, dtype=np.int64)
+    np.cumsum([len(coords) for coords in coords_list], out=offsets[1:])
+    values = np.array(list(chain.from_iterable(coords_list)))
+    if values.size == 0:
+        values = values.astype(np.int64)
+    return values, offsets
+
+
+def _batch_match(
+        lines: np.ndarray,
+        line_offsets: np.ndarray,
+        y_max: np.ndarray,
+        num_slips: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    _calculate_match_score 的批量版本（num_slips >= 2），逐位复现其浮点运算。
+
+    Args:
+        lines: 各图片去掉首尾边界后的坐标拼接而成的数组，每段都已升序。
+        line_offsets: lines 的 CSR 偏移。
+        y_max: 各图片的最后一个坐标（图片高度）。
+
+    Returns:
+        (得分数组, 匹配到的线矩阵)。矩阵第 0 列是锚点，其余列依次是离各理想位置最近的线。
+    """
+    starts, ends = line_offsets[:-1], line_offsets[1:]
+    anchor = lines[starts]
+    total_height = y_max - anchor
+    average_height = total_height / num_slips
+    ideal_pos = anchor[:, None] + np.arange(1, num_slips)[None, :] * average_height[:, None]
+
+    # 坐标都是整数，“第一条 >= 理想位置的线”就是“第一条 >= ceil(理想位置) 的线”，可以全程用整数二分。
+    # 给每张图片的坐标加上 图片序号*跨度，把所有分段拼成一个全局有序数组，一次 searchsorted 查完整批
+    target = np.ceil(ideal_pos).astype(np.int64)
+    low = min(lines.min(), target.min())
+    span = max(lines.max(), target.max()) - low + 1
+    record_ids = np.arange(len(anchor), dtype=np.int64)
+    shifted = lines - low + np.repeat(record_ids, ends - starts) * span
+    pos = np.searchsorted(shifted, target - low + record_ids[:, None] * span, side='left')
+
+    # 候选只有两个：理想位置左边最近的线和右边最近的线。距离相等时取较小的那条，
+    # 与 min() 在升序列表上返回第一个最小值的行为一致
+    right = np.minimum(pos, ends[:, None] - 1)
+    left = np.maximum(pos - 1, starts[:, None])
+    left_lines, right_lines = lines[left], lines[right]
+    closest = np.where(
+        np.abs(left_lines - ideal_pos) <= np.abs(right_lines - ideal_pos), left_lines, right_lines
+    )
+
+    # 与标量版本相同的顺序逐列累加，保证得分与阈值比较的结果完全一致
+    error_ratio = np.abs(closest - ideal_pos) / total_height[:, None]
+    total_error_ratio = np.zeros(len(anchor))
+    for i in range(num_slips - 1):
+        total_error_ratio = total_error_ratio + error_ratio[:, i]
+    scores = total_error_ratio / (num_slips - 1)
+    return scores, np.concatenate([anchor[:, None], closest], axis=1)
+
+
+def find_slip_starts_batch(
+        values: np.ndarray,
+        offsets: np.ndarray,
+        num_slips: int,
+        match_threshold: float = MATCH_THRESHOLD
+) -> List[List[int]]:
+    """
+    find_slip_starts 的批量版本：一次处理整批图片，结果与逐张调用 find_slip_starts 完全相同。
+
+    Args:
+        values, offsets: pack_coords 生成的 CSR 结构，每段为一张图片的 [0, ...y, 高度]。
+        num_slips: 同 find_slip_starts，<=0 为自动模式。
+        match_threshold: 同 find_slip_starts。
+
+    Returns:
+        每张图片的起始线列表，顺序与输入一致。
+    """
+    values = np.asarray(values)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    count = len(offsets) - 1
+    if values.dtype.kind not in "iu":
+        # 非整数坐标不满足整数二分的前提，逐张计算
+        return [
+            find_slip_starts(values[offsets[i]:offsets[i + 1]].tolist(), num_slips, match_threshold) for i in range(count)
+        ]
+
+    results: List[List[int]] = [[] for _ in range(count)]
+    starts, ends = offsets[:-1] + 1, offsets[1:] - 1
+    has_lines = ends > starts
+    if not has_lines.any():
+        return results
+    values = values.astype(np.int64, copy=False)
+    first_line = np.zeros(count, dtype=np.int64)
+    first_line[has_lines] = values[starts[has_lines]]
+    if num_slips == 1:
+        for i in np.flatnonzero(has_lines):
+            results[i] = [int(first_line[i])]
+        return results
+
+    y_max = np.zeros(count, dtype=np.int64)
+    y_max[has_lines] = values[ends[has_lines]]
+
+    # 内部坐标不是升序、或锚点与高度重合（标量版本会除零）的图片交给标量版本，行为保持一致
+    descending = np.flatnonzero(np.diff(values) < 0)
+    owner = np.searchsorted(offsets, descending, side='right') - 1
+    inside = (descending >= starts[owner]) & (descending + 1 < ends[owner])
+    fallback = np.zeros(count, dtype=bool)
+    fallback[owner[inside]] = True
+    fallback |= has_lines & (y_max == first_line)
+    for i in np.flatnonzero(fallback):
+        results[i] = find_slip_starts(values[offsets[i]:offsets[i + 1]].tolist(), num_slips, match_threshold)
+
+    batch = np.flatnonzero(has_lines & ~fallback)
+    if batch.size == 0:
+        return results
+    lengths = ends[batch] - starts[batch]
+    line_offsets = np.zeros(len(batch) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=line_offsets[1:])
+    gather = np.repeat(starts[batch] - line_offsets[:-1], lengths) + np.arange(line_offsets[-1])
+    lines = values[gather]
+    y_max = y_max[batch]
+
+    if num_slips > 0:
+        _, matched = _batch_match(lines, line_offsets, y_max, num_slips)
+        for i, row in zip(batch.tolist(), _sorted_unique_rows(matched)):
+            results[i] = row
+        return results
+
+    # 自动模式：先试 2 联，不符合的再试 3 联，都不符合视为单联
+    score_2, matched_2 = _batch_match(lines, line_offsets, y_max, 2)
+    is_2 = score_2 < match_threshold
+    for i, row in zip(batch[is_2].tolist(), _sorted_unique_rows(matched_2[is_2])):
+        results[i] = row
+    rest = ~is_2
+    score_3, matched_3 = _batch_match(lines, line_offsets, y_max, 3)
+    is_3 = rest & (score_3 < match_threshold)
+    for i, row in zip(batch[is_3].tolist(), _sorted_unique_rows(matched_3[is_3])):
+        results[i] = row
+    for i in batch[rest & ~is_3].tolist():
+        results[i] = [int(first_line[i])]
+    return results
+
+
+def _sorted_unique_rows(matched: np.ndarray) -> List[List[int]]:
+    """逐行去重并升序，等价于对每行做 sorted(set(row))。"""
+    matched = np.sort(matched, axis=1)
+    rows = matched.tolist()
+    has_duplicate = (np.diff(matched, axis=1) == 0).any(axis=1)
+    for j in np.flatnonzero(has_duplicate).tolist():
+        rows[j] = sorted(set(rows[j]))
+    return rows
@@ -1,4 +1,13 @@
-from typing import List
+from typing import List, Tuple
+
+from .一维K均值 import optimal_kmeans_1d
+from .均衡分割算法 import equal_split_confidence
+
+# "equal": 原有实现，按等高理想位置猜中心点，只比较 K=1,2,3；
+# "kmeans": 对排序后的线条做精确最优一维 K-Medians（动态规划），再用肘部法则选 K
+CLUSTER_ENGINES = ("equal", "kmeans")
+# 肘部法则：只要再多分一簇还能让成本至少下降这个比例，就继续增加 K
+ELBOW_MIN_DROP = 0.5
 
 
 def _calculate_for_n_slips(actual_lines: List[int], y_max: int, num_slips: int) -> List[int]:
@@ -38,24 +47,97 @@ def _calculate_clustering_cost(actual_lines: List[int], centers: List[int]) -> f
     return total_cost
 
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+def _select_elbow(costs: List[float], min_drop: float = ELBOW_MIN_DROP) -> int:
+    """
+    [肘部法则] 从 K=1 开始，多分一簇带来的成本下降不足 min_drop 时停下，返回此时的 K。
+    """
+    best_k = 1
+    for k in range(2, len(costs) + 1):
+        if costs[k - 2] <= 0 or costs[k - 1] > costs[k - 2] * (1 - min_drop):
+            break
+        best_k = k
+    return best_k
+
+
+def _elbow_confidence(costs: List[float], best_k: int, min_drop: float = ELBOW_MIN_DROP) -> float:
+    """肘部法则每一步的判断（下降比例是否达到 min_drop）离阈值越远越可靠，取最含糊的一步。"""
+    margins = []
+    for k in range(2, min(best_k + 1, len(costs)) + 1):
+        if costs[k - 2] <= 0:
+            break
+        drop = 1 - costs[k - 1] / costs[k - 2]
+        margins.append(abs(drop - min_drop) / min_drop)
+    return min(margins + [1.0])
+
+
+def _find_with_kmeans(
+        actual_lines: List[int],
+        num_slips: int,
+        max_slips: int,
+        min_drop: float = ELBOW_MIN_DROP
+) -> Tuple[List[int], float]:
+    """
+    [kmeans 引擎] 最优一维 K-Medians 把线条切成 K 段，每段的第一条线就是该联的起始线。
+    """
+    lines = sorted(actual_lines)
+    max_k = num_slips if num_slips > 0 else max_slips
+    costs, starts = optimal_kmeans_1d(lines, max_k, metric="l1")
+    if num_slips > 0:
+        best_k, confidence = len(costs), 1.0
+    else:
+        best_k = _select_elbow(costs, min_drop)
+        confidence = min(1.0, _elbow_confidence(costs, best_k, min_drop))
+    return [lines[i] for i in starts[best_k - 1]], confidence
+
+
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        engine: str = "equal",
+        max_slips: int = 3,
+        elbow_min_drop: float = ELBOW_MIN_DROP
+) -> List[int]:
     """
     通过 "聚类拟合" 思想，自动判断并找出回单的起始线。
 
     Args:
         coords_with_boundaries: 一个已排序的坐标列表。
         num_slips: 如果 > 0，则强制使用该联数；如果 <= 0，则触发自动判断模式。
+        engine: "equal"（默认，原有实现）或 "kmeans"（精确最优聚类，见 CLUSTER_ENGINES）。
+        max_slips: kmeans 引擎自动模式下尝试的最大联数，K=1..max_slips 在一次动态规划中全部算出。
+        elbow_min_drop: kmeans 引擎肘部法则的最小成本下降比例，默认 ELBOW_MIN_DROP。
 
     Returns:
         一个包含每个回单联起始线y坐标的有序列表。
     """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, engine, max_slips, elbow_min_drop)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        engine: str = "equal",
+        max_slips: int = 3,
+        elbow_min_drop: float = ELBOW_MIN_DROP
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    "equal" 引擎为最低成本相对次低成本的优势，"kmeans" 引擎为肘部判断离阈值的距离；
+    强制模式见 equal_split_confidence（kmeans 引擎的强制模式没有需要判断的地方，置信度为 1）。
+    """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
+
+    if engine == "kmeans":
+        return _find_with_kmeans(actual_lines, num_slips, max_slips, elbow_min_drop)
+    if engine != "equal":
+        raise ValueError(f"未知的聚类引擎: {engine}，可选: {CLUSTER_ENGINES}")
 
     # 强制模式：直接调用均衡分割算法
     if num_slips in [1, 2, 3]:
-        return _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        lines = _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, equal_split_confidence(coords_with_boundaries, num_slips)
 
     # --- 自动判断模式 ---
     scores = {}
@@ -73,7 +155,9 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     # 3. 找到成本最低的最佳联数
     best_n = min(scores, key=lambda n: scores[n]['cost'])
 
-    return scores[best_n]['lines']
+    ranked = sorted(score['cost'] for score in scores.values())
+    confidence = 1 - ranked[0] / ranked[1] if ranked[1] > 0 else 0.0
+    return scores[best_n]['lines'], confidence
 
 
 '''
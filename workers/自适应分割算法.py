@@ -1,4 +1,6 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+
+from .均衡分割算法 import equal_split_confidence
 
 
 def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
@@ -20,14 +22,23 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     Returns:
         一个包含每个回单联起始线y坐标的有序列表。
     """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips)[0]
+
+
+def find_slip_starts_scored(coords_with_boundaries: List[int], num_slips: int) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    自动模式下为最佳假设相对次佳假设的误差优势；强制模式见 equal_split_confidence。
+    """
     actual_lines = coords_with_boundaries[1:-1]
 
     if not actual_lines:
-        return []
+        return [], 1.0
 
     # 如果用户强制指定了联数，则直接使用均衡分割算法计算
     if num_slips in [1, 2, 3]:
-        return _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        lines = _calculate_for_n_slips(actual_lines, coords_with_boundaries[-1], num_slips)
+        return lines, equal_split_confidence(coords_with_boundaries, num_slips)
 
     # --- 自动判断模式 ---
     possible_slips = [1, 2, 3]
@@ -59,7 +70,9 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     # min函数的key参数是用来比较的依据，这里我们用字典里的'error'值
     best_n = min(scores, key=lambda n: scores[n]['error'])
 
-    return scores[best_n]['lines']
+    ranked = sorted(score['error'] for score in scores.values())
+    confidence = 1 - ranked[0] / ranked[1] if ranked[1] > 0 else 0.0
+    return scores[best_n]['lines'], confidence
 
 
 def _calculate_for_n_slips(actual_lines: List[int], y_max: int, num_slips: int) -> List[int]:
@@ -1,17 +1,94 @@
 import os
+import time
 import cv2
 import numpy as np
 import json
 import glob
+import re
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional, Tuple, Callable
 
+from .提取缓存 import ExtractionCache, DEFAULT_MAX_BYTES
+from .提取流水线 import ExtractionPipeline
 
-def extract_image_data(image_path):
+# 可选依赖：PyTurboJPEG 用于“只解码左侧窄条”。没有安装时自动退回整图解码。
+try:
+    from turbojpeg import TurboJPEG, tjMCUHeight
+except ImportError:
+    TurboJPEG = None
+
+# 可选依赖：PyMuPDF 用于直接从 PDF 页面光栅化左侧窄条，不再经过中间JPEG文件
+try:
+    import pymupdf
+except ImportError:
+    pymupdf = None
+
+# 定义要裁剪的宽度，10个像素足以避开所有文字干扰
+CROP_WIDTH = 10
+# 窄条解码时在 CROP_WIDTH 右侧多保留的像素（>= 最大MCU宽度32），
+# 保证色度上采样用到的相邻块都在裁剪范围内，左侧 CROP_WIDTH 列的像素与整图解码逐位一致
+STRIP_DECODE_MARGIN = 32
+
+# "full": 整图解码；"strip": 只解码左侧窄条；"coarse": 先缩小解码找候选绿带，再只精查这些带。
+# strip 与 coarse 都依赖 PyTurboJPEG + libturbojpeg 动态库：没有它们时 coarse 要缩小解码一遍再整图解码一遍，
+# 反而比 full 慢，所以两者都直接按 full 解码（进程内只提示一次）
+DECODE_MODES = ("full", "strip", "coarse")
+
+# 粗检测按 1/4 比例缩小解码（OpenCV 的 IMREAD_REDUCED_COLOR_4，在DCT域缩放，远快于整图解码）
+COARSE_SCALE = 4
+# 粗检测的候选条件：G 通道比 R、B 都至少高出该值。缩小解码会把细线与白底平均，
+# 所以这里远比正式阈值宽松，宁可多报候选带也不能漏
+COARSE_GREEN_MARGIN = 4
+# 候选带上下各扩展的全分辨率像素
+COARSE_BAND_PAD = 8
+
+# 绿色的 HSV 阈值（OpenCV 8位 HSV：H∈[0,180)，S/V∈[0,255]）
+LOWER_GREEN = (35, 100, 100)
+UPPER_GREEN = (85, 255, 255)
+# 两个Y坐标相距不超过该像素数时视为同一条线
+MERGE_GAP = 5
+
+# "contour": HSV + findContours（原始实现）；"projection": NumPy 行投影 + 游程编码
+DETECTOR_ENGINES = ("contour", "projection")
+
+# 逐张追加写入的中间结果文件（JSONL），处理完成后压缩为 image_info.json 并删除
+PARTIAL_FILENAME = "image_info.partial.jsonl"
+
+# 与 OpenCV 的 8 位 BGR->HSV 整数算法完全相同的查找表（hsv_shift=12），
+# 用于在 NumPy 中逐位复现 cvtColor 的结果
+_HSV_SHIFT = 12
+_SDIV_TABLE = np.zeros(256, dtype=np.int32)
+_SDIV_TABLE[1:] = np.round((255 << _HSV_SHIFT) / np.arange(1, 256, dtype=np.float64))
+_HDIV_TABLE = np.zeros(256, dtype=np.int32)
+_HDIV_TABLE[1:] = np.round((180 << _HSV_SHIFT) / (6.0 * np.arange(1, 256, dtype=np.float64)))
+
+# PDF 页面的光栅化分辨率（DPI），应与原先导出JPEG时使用的分辨率一致，Y坐标才可比
+PDF_DPI = 200
+# PDF 的每一页作为一个任务，任务路径与结果的键都是 "文件名.pdf#页码"（页码从1开始）
+_PDF_TASK_PATTERN = re.compile(r"^(.*\.pdf)#(\d+)$", re.IGNORECASE)
+
+_turbojpeg = None
+_turbojpeg_warned = False
+# PyMuPDF 不是线程安全的：同一进程内所有的 PDF 操作都串行执行，并复用最近打开的一个文档
+_pdf_lock = threading.Lock()
+_pdf_doc = None
+
+
+def extract_image_data(image_path, decode_mode: str = "full", engine: str = "contour"):
     """
     【严格按照您的要求】
     先裁剪图片最左侧的极窄区域，然后仅在该区域内检测绿色线条的Y坐标。
 
     Args:
         image_path (str): 图片的完整文件路径。
+        decode_mode (str): "full" 整图解码后裁剪；"strip" 只解码左侧窄条（需要 PyTurboJPEG，
+                           非JPEG或不满足条件时自动退回整图解码），两种模式结果完全一致；
+                           "coarse" 先缩小解码找候选绿带，再只精查这些带，适合特别高的长图
+                           （同样需要 PyTurboJPEG，没有时按 "full" 解码）。
+        engine (str): 检测引擎，"contour"（默认）或 "projection"，见 DETECTOR_ENGINES。
 
     Returns:
         tuple: 一个包含 (y_positions, height) 的元组。
@@ -19,32 +96,355 @@ def extract_image_data(image_path):
                - height (int): 图片的总高度。
                如果图片无法读取，则返回 (None, None)。
     """
-    # 使用 imdecode 来正确处理包含非ASCII字符（如中文）的路径
     try:
-        image_data = cv2.imdecode(np.fromfile(image_path, dtype=np.uint8), cv2.IMREAD_COLOR)
-        if image_data is None:
-            raise IOError("解码后的图像数据为空")
+        left_strip = _decode_left_strip(_read_image_bytes(image_path), decode_mode)
     except Exception as e:
         print(f"警告：无法读取或解码图片 '{os.path.basename(image_path)}'，原因: {e}。已跳过。")
         return None, None
 
-    # 获取图片总高度和宽度
-    height, width = image_data.shape[:2]
+    return _detect_green_lines(left_strip, engine)
+
+
+def extract_image_bytes(image_bytes: bytes, decode_mode: str = "full", engine: str = "contour") -> Tuple[List[int], int]:
+    """
+    与 extract_image_data 相同，但直接处理内存中的图片字节，不经过任何临时文件。
+
+    Returns:
+        (y_positions, height)，含义同 extract_image_data。
+
+    Raises:
+        IOError: 图片字节无法解码。
+    """
+    left_strip = _decode_left_strip(np.frombuffer(image_bytes, dtype=np.uint8), decode_mode)
+    return _detect_green_lines(left_strip, engine)
+
+
+def _read_image_bytes(image_path: str) -> np.ndarray:
+    """
+    读取图片文件的原始字节。使用 np.fromfile 来正确处理包含非ASCII字符（如中文）的路径。
+    """
+    return np.fromfile(image_path, dtype=np.uint8)
+
+
+def pdf_available() -> bool:
+    """当前环境是否支持直接读取 PDF。"""
+    return pymupdf is not None
 
-    # --- 核心步骤：裁剪图片最左侧的极窄区域 ---
-    # 定义要裁剪的宽度，10个像素足以避开所有文字干扰
-    CROP_WIDTH = 10
+
+def _split_pdf_task(task: str) -> Tuple[str, Optional[int]]:
+    """把 "xxx.pdf#3" 拆成 (PDF路径, 页码)；普通图片返回 (路径, None)。"""
+    match = _PDF_TASK_PATTERN.match(task)
+    if match is None:
+        return task, None
+    return match.group(1), int(match.group(2))
+
+
+def _open_pdf(pdf_path: str):
+    """[调用方需持有 _pdf_lock] 打开 PDF，连续处理同一文件的各页时不重复打开。"""
+    global _pdf_doc
+    if _pdf_doc is not None and _pdf_doc[0] == pdf_path:
+        return _pdf_doc[1]
+    if _pdf_doc is not None:
+        _pdf_doc[1].close()
+        _pdf_doc = None
+    with open(pdf_path, 'rb') as f:
+        doc = pymupdf.open(stream=f.read(), filetype="pdf")
+    _pdf_doc = (pdf_path, doc)
+    return doc
+
+
+def _pdf_page_count(pdf_path: str) -> int:
+    """PDF 的页数，打不开时抛出异常。"""
+    if pymupdf is None:
+        raise ImportError("未安装 PyMuPDF（pip install pymupdf），无法读取 PDF")
+    with _pdf_lock:
+        return _open_pdf(pdf_path).page_count
+
+
+def _render_pdf_strip(pdf_path: str, page_number: int, dpi: int = PDF_DPI) -> np.ndarray:
+    """
+    只光栅化 PDF 某一页最左侧 CROP_WIDTH 列，返回 BGR 窄条。
+    窄条的高度与整页按同样 DPI 光栅化的高度一致，与原先“PDF→JPEG→整图解码”的坐标系相同。
+    """
+    if pymupdf is None:
+        raise ImportError("未安装 PyMuPDF（pip install pymupdf），无法读取 PDF")
+    zoom = dpi / 72.0
+    matrix = pymupdf.Matrix(zoom, zoom)
+    with _pdf_lock:
+        doc = _open_pdf(pdf_path)
+        if not 1 <= page_number <= doc.page_count:
+            raise IndexError(f"页码 {page_number} 超出范围（共 {doc.page_count} 页）")
+        page = doc[page_number - 1]
+        rect = page.rect
+        height = (rect * matrix).irect.height
+        clip = pymupdf.Rect(rect.x0, rect.y0, min(rect.x1, rect.x0 + CROP_WIDTH / zoom), rect.y1)
+        pix = page.get_pixmap(matrix=matrix, clip=clip, colorspace=pymupdf.csRGB, alpha=False)
+        rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    if pix.height != height:
+        raise IOError(f"光栅化高度 {pix.height} 与整页高度 {height} 不一致")
+    rgb = rgb[:, :pix.width * 3].reshape(pix.height, pix.width, 3)
+    # RGB -> BGR，与 cv2.imdecode 的通道顺序一致
+    return np.ascontiguousarray(rgb[:, :CROP_WIDTH, ::-1])
+
+
+def extract_pdf_pages(pdf_path: str, dpi: int = PDF_DPI, engine: str = "contour"):
+    """
+    逐页处理一个 PDF，不生成任何中间图片文件。
+
+    Yields:
+        ("文件名.pdf#页码", y_positions, height)，y_positions 与 height 的含义同 extract_image_data。
+    """
+    filename = os.path.basename(pdf_path)
+    for page_number in range(1, _pdf_page_count(pdf_path) + 1):
+        y_coords, img_height = _detect_green_lines(_render_pdf_strip(pdf_path, page_number, dpi), engine)
+        yield f"{filename}#{page_number}", y_coords, img_height
+
+
+def _read_task(task: str, pdf_dpi: int = PDF_DPI) -> np.ndarray:
+    """
+    [读取阶段] 普通图片返回原始字节；PDF 页面直接返回光栅化好的左侧窄条。
+    """
+    pdf_path, page_number = _split_pdf_task(task)
+    if page_number is None:
+        return _read_image_bytes(task)
+    return _render_pdf_strip(pdf_path, page_number, pdf_dpi)
+
+
+def _crop_left_strip(image_data: np.ndarray) -> np.ndarray:
+    """
+    裁剪图片最左侧的极窄区域。
+    """
     # 防止图片本身过窄
-    if width < CROP_WIDTH:
-        left_strip = image_data
-    else:
-        # 裁剪操作：只取从第0列到第CROP_WIDTH列的像素
-        left_strip = image_data[:, 0:CROP_WIDTH]
+    if image_data.shape[1] < CROP_WIDTH:
+        return image_data
+    # 裁剪操作：只取从第0列到第CROP_WIDTH列的像素
+    return image_data[:, 0:CROP_WIDTH]
+
+
+def _get_turbojpeg():
+    """
+    [懒加载] 每个进程只初始化一次 TurboJPEG；库不可用时返回 None。
+    """
+    global _turbojpeg
+    if _turbojpeg is None and TurboJPEG is not None:
+        try:
+            _turbojpeg = TurboJPEG()
+        except (OSError, RuntimeError):
+            # 安装了 PyTurboJPEG 但找不到 libturbojpeg 动态库
+            _turbojpeg = False
+    return _turbojpeg or None
+
+
+def _effective_decode_mode(decode_mode: str) -> str:
+    """实际使用的解码模式：libturbojpeg 不可用时 strip/coarse 都按 full 解码，第一次退回时提示。"""
+    global _turbojpeg_warned
+    if decode_mode in ("strip", "coarse") and not strip_decode_available():
+        if not _turbojpeg_warned:
+            _turbojpeg_warned = True
+            print(f"提示：未安装 PyTurboJPEG 或找不到 libturbojpeg，解码模式 {decode_mode} 将按整图解码（full）执行。")
+        return "full"
+    return decode_mode
+
+
+def strip_decode_available() -> bool:
+    """当前环境是否支持只解码左侧窄条。"""
+    return _get_turbojpeg() is not None
+
+
+def _parse_jpeg_header(buf: np.ndarray) -> Tuple[int, int, int]:
+    """
+    只扫描JPEG的头部段，返回 (高度, 宽度, Exif方向标记)；找不到尺寸时高宽为 0，没有方向标记时为 1。
+    整图解码时 OpenCV 会按方向标记旋转图片，窄条/粗检测解码只能处理不需要旋转的图片。
+    """
+    data = buf.tobytes()
+    height, width, orientation = 0, 0, 1
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xFF:  # 填充字节
+            pos += 1
+            continue
+        if marker in (0xD9, 0xDA):  # EOI / SOS：后面已是图像数据
+            break
+        seg_len = int.from_bytes(data[pos + 2:pos + 4], "big")
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):  # SOFn
+            height = int.from_bytes(data[pos + 5:pos + 7], "big")
+            width = int.from_bytes(data[pos + 7:pos + 9], "big")
+        elif marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            tiff = data[pos + 10:pos + 2 + seg_len]
+            order = "little" if tiff[:2] == b"II" else "big"
+            ifd = int.from_bytes(tiff[4:8], order)
+            count = int.from_bytes(tiff[ifd:ifd + 2], order)
+            for k in range(count):
+                entry = tiff[ifd + 2 + 12 * k:ifd + 14 + 12 * k]
+                if int.from_bytes(entry[0:2], order) == 0x0112:
+                    orientation = int.from_bytes(entry[8:10], order)
+                    break
+        pos += 2 + seg_len
+    return height, width, orientation
+
+
+def _is_jpeg(buf: np.ndarray) -> bool:
+    return buf.size >= 4 and buf[0] == 0xFF and buf[1] == 0xD8
+
+
+def _decode_strip_turbo(buf: np.ndarray) -> Optional[np.ndarray]:
+    """
+    [窄条解码] 用 libjpeg-turbo 无损裁出左侧一列MCU组成的小JPEG，再用 OpenCV 解码。
+    裁剪只做熵解码、不做IDCT和颜色转换，且解码器仍是 OpenCV 自带的那一个，
+    所以左侧 CROP_WIDTH 列与整图解码后再裁剪的结果逐位一致。
+    不满足条件（非JPEG、图片过窄、带旋转标记、库不可用）时返回 None。
+    """
+    jpeg = _get_turbojpeg()
+    if jpeg is None or not _is_jpeg(buf):
+        return None
+    try:
+        width, height, _, _ = jpeg.decode_header(buf)
+        if width <= CROP_WIDTH + STRIP_DECODE_MARGIN or _parse_jpeg_header(buf)[2] != 1:
+            return None
+        strip_jpeg = jpeg.crop(buf, 0, 0, CROP_WIDTH + STRIP_DECODE_MARGIN, height, copynone=True)
+    except (OSError, ValueError):
+        return None
+    strip = cv2.imdecode(np.frombuffer(strip_jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if strip is None or strip.shape[0] != height:
+        return None
+    return strip[:, 0:CROP_WIDTH]
+
+
+def _coarse_green_bands(buf: np.ndarray, height: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    [粗检测] 按 1/COARSE_SCALE 缩小解码，用宽松条件找出可能含绿线的行，
+    返回全分辨率下的候选带 [(y0, y1), ...]（左闭右开，已合并重叠）。无法解码时返回 None。
+    """
+    reduced = cv2.imdecode(buf, cv2.IMREAD_REDUCED_COLOR_4)
+    if reduced is None:
+        return None
+    strip = reduced[:, 0:-(-CROP_WIDTH // COARSE_SCALE)].astype(np.int16)
+    greenness = strip[..., 1] - np.maximum(strip[..., 0], strip[..., 2])
+    rows = (greenness >= COARSE_GREEN_MARGIN).any(axis=1)
+
+    # 连续候选行 -> 游程 -> 映射回全分辨率并上下扩展
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+    bands: List[Tuple[int, int]] = []
+    for r0, r1 in zip(edges[0::2], edges[1::2]):
+        y0 = max(0, int(r0) * COARSE_SCALE - COARSE_BAND_PAD)
+        y1 = min(height, int(r1) * COARSE_SCALE + COARSE_BAND_PAD)
+        if bands and y0 <= bands[-1][1]:
+            bands[-1] = (bands[-1][0], max(bands[-1][1], y1))
+        else:
+            bands.append((y0, y1))
+    return bands
+
+
+def _decode_bands_turbo(buf: np.ndarray, bands: List[Tuple[int, int]], width: int) -> Optional[List[np.ndarray]]:
+    """
+    [精查] 用 libjpeg-turbo 一次性无损裁出所有候选带的左侧窄条，再用 OpenCV 逐个解码，
+    返回与 bands 一一对应的全分辨率窄条。库不可用或失败时返回 None。
+
+    每个带在上下各多裁一个MCU行，只取中间部分：带的上下边缘处色度上采样看不到相邻行，
+    多裁的这一圈保证取用的像素与整图解码逐位一致。
+    """
+    jpeg = _get_turbojpeg()
+    if jpeg is None or width <= CROP_WIDTH + STRIP_DECODE_MARGIN:
+        return None
+    try:
+        _, height, subsample, _ = jpeg.decode_header(buf)
+        mcu_h = tjMCUHeight[subsample]
+        crops = []
+        for y0, y1 in bands:
+            ya = max(0, (y0 // mcu_h - 1) * mcu_h)
+            yb = min(height, (-(-y1 // mcu_h) + 1) * mcu_h)
+            crops.append((0, ya, CROP_WIDTH + STRIP_DECODE_MARGIN, yb - ya))
+        band_jpegs = jpeg.crop_multiple(buf, crops, copynone=True)
+    except (OSError, ValueError):
+        return None
+
+    strips = []
+    for (y0, y1), (_, ya, _, _), band_jpeg in zip(bands, crops, band_jpegs):
+        band = cv2.imdecode(np.frombuffer(band_jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if band is None or band.shape[0] < y1 - ya:
+            return None
+        strips.append(band[y0 - ya:y1 - ya, 0:CROP_WIDTH])
+    return strips
+
+
+def _decode_strip_coarse(buf: np.ndarray) -> Optional[np.ndarray]:
+    """
+    [粗到细解码] 先在缩小图上找候选绿带，再只在这些带内取全分辨率像素，
+    拼成一张与原窄条同尺寸的图（候选带以外填黑，黑色不会被判为绿色）。
+
+    只要粗检测没有漏掉任何绿色像素，检测结果就与整图解码完全一致；
+    可用 benchmark_decode_modes 在真实数据上核对。不满足条件时返回 None。
+    """
+    if not _is_jpeg(buf):
+        return None
+    height, width, orientation = _parse_jpeg_header(buf)
+    if height == 0 or width == 0 or orientation != 1:
+        return None
+    bands = _coarse_green_bands(buf, height)
+    if bands is None:
+        return None
+
+    strip = np.zeros((height, min(width, CROP_WIDTH), 3), dtype=np.uint8)
+    if not bands:
+        return strip
+
+    band_strips = _decode_bands_turbo(buf, bands, width)
+    if band_strips is None:
+        # 分带解码失败时只能整图解码取像素，检测仍只看候选带
+        image_data = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        if image_data is None or image_data.shape[0] != height:
+            return None
+        full_strip = _crop_left_strip(image_data)
+        band_strips = [full_strip[y0:y1] for y0, y1 in bands]
+    for (y0, y1), band_strip in zip(bands, band_strips):
+        strip[y0:y1] = band_strip
+    return strip
+
+
+def _decode_left_strip(buf: np.ndarray, decode_mode: str = "full") -> np.ndarray:
+    """
+    把图片字节解码为左侧窄条。失败时抛出异常。
+    """
+    if decode_mode not in DECODE_MODES:
+        raise ValueError(f"未知的解码模式: {decode_mode}，可选: {DECODE_MODES}")
+    decode_mode = _effective_decode_mode(decode_mode)
+    if decode_mode == "strip":
+        strip = _decode_strip_turbo(buf)
+        if strip is not None:
+            return strip
+    elif decode_mode == "coarse":
+        strip = _decode_strip_coarse(buf)
+        if strip is not None:
+            return strip
+
+    image_data = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if image_data is None:
+        raise IOError("解码后的图像数据为空")
+    return _crop_left_strip(image_data)
+
+
+def _detect_green_lines(left_strip: np.ndarray, engine: str = "contour") -> Tuple[List[int], int]:
+    """
+    在左侧窄条上检测绿色线条，返回 (合并后的Y坐标列表, 图片高度)。
+    """
+    if engine == "contour":
+        return _detect_contour(left_strip)
+    if engine == "projection":
+        return _detect_projection(left_strip)
+    raise ValueError(f"未知的检测引擎: {engine}，可选: {DETECTOR_ENGINES}")
+
+
+def _detect_contour(left_strip: np.ndarray) -> Tuple[List[int], int]:
+    """
+    [contour 引擎] HSV 阈值 + findContours，取每个绿色区域外接矩形的Y坐标。
+    """
+    height = left_strip.shape[0]
 
     # --- 在裁剪后的窄条上，执行最原始的绿色检测 ---
     hsv_image = cv2.cvtColor(left_strip, cv2.COLOR_BGR2HSV)
-    lower_green = np.array([35, 100, 100])
-    upper_green = np.array([85, 255, 255])
+    lower_green = np.array(LOWER_GREEN)
+    upper_green = np.array(UPPER_GREEN)
     mask = cv2.inRange(hsv_image, lower_green, upper_green)
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -67,55 +467,562 @@ def extract_image_data(image_path):
     merged_y = [y_positions[0]]
     for y in y_positions:
         # 如果当前坐标与上一个已合并坐标的距离大于5像素，才视为一条新线
-        if y - merged_y[-1] > 5:
+        if y - merged_y[-1] > MERGE_GAP:
             merged_y.append(y)
 
     return merged_y, height
 
 
-def get_images_lines_info(source_folder_path: str, output_folder_path: str):
+def _green_row_mask(left_strip: np.ndarray) -> np.ndarray:
+    """
+    直接在 BGR 窄条上计算每一行是否含有绿色像素。
+    H/S/V 的整数运算与 OpenCV 的 cvtColor(COLOR_BGR2HSV) 逐位一致，阈值判断等价于 inRange。
+    """
+    b, g, r = left_strip[..., 0], left_strip[..., 1], left_strip[..., 2]
+    # 预筛：H 在 [35, 85]（即 70°~170°）只可能出现在 G 为唯一最大通道（G>R 且 G>=B）时，
+    # 此时 V 就是 G。先用 uint8 比较排除绝大多数白底/黑字像素，只对候选像素做精确计算。
+    candidates = (g > r) & (g >= b) & (g >= LOWER_GREEN[2])
+    ys, xs = np.nonzero(candidates)
+    rows = np.zeros(left_strip.shape[0], dtype=bool)
+    if ys.size == 0:
+        return rows
+
+    b = b[ys, xs].astype(np.int32)
+    g = g[ys, xs].astype(np.int32)
+    r = r[ys, xs].astype(np.int32)
+    diff = g - np.minimum(b, r)
+    s = (diff * _SDIV_TABLE[g] + (1 << (_HSV_SHIFT - 1))) >> _HSV_SHIFT
+    # G 为最大通道时 OpenCV 的色相公式为 (B - R + 2*diff)，结果恒为非负
+    h = ((b - r + 2 * diff) * _HDIV_TABLE[diff] + (1 << (_HSV_SHIFT - 1))) >> _HSV_SHIFT
+
+    green = ((h >= LOWER_GREEN[0]) & (h <= UPPER_GREEN[0])
+             & (s >= LOWER_GREEN[1]) & (s <= UPPER_GREEN[1])
+             & (g <= UPPER_GREEN[2]))
+    rows[ys[green]] = True
+    return rows
+
+
+def _merge_close_positions(positions: np.ndarray, gap: int = MERGE_GAP) -> List[int]:
+    """
+    对升序的Y坐标做与 contour 引擎相同的贪心合并（与上一个保留坐标相距 > gap 才保留）。
+    """
+    if positions.size == 0:
+        return []
+    # 绝大多数情况下相邻坐标都相距很远，一次比较即可全部保留
+    if positions.size == 1 or np.all(np.diff(positions) > gap):
+        return positions.tolist()
+
+    # 存在相近坐标：每次用 searchsorted 直接跳到第一个与当前保留坐标相距 > gap 的位置，
+    # 循环次数等于最终保留的线条数
+    merged_y = []
+    i = 0
+    while i < positions.size:
+        merged_y.append(int(positions[i]))
+        i = int(np.searchsorted(positions, positions[i] + gap, side="right"))
+    return merged_y
+
+
+def _detect_projection(left_strip: np.ndarray) -> Tuple[List[int], int]:
+    """
+    [projection 引擎] 行投影 + 游程编码：把每一行压缩成一个“是否为绿色”的布尔值，
+    每段连续绿色行的起点即为一条线的Y坐标，不构造任何轮廓对象。
+
+    与 contour 引擎的差异：contour 取的是每个连通区域的最上沿，如果同一段绿色行里
+    有多个互不相连、且上沿相差超过 MERGE_GAP 的区域，contour 会多报坐标，而本引擎只报一个。
+    可用 benchmark_detector_engines 在真实数据上比对。
+    """
+    height = left_strip.shape[0]
+    rows = _green_row_mask(left_strip)
+    # 游程起点：当前行为绿色且上一行不是
+    starts = np.flatnonzero(rows & ~np.concatenate(([False], rows[:-1])))
+    return _merge_close_positions(starts), height
+
+
+def detector_params(engine: str = "contour", decode_mode: str = "full") -> Dict[str, Any]:
+    """
+    决定检测结果的全部参数，作为缓存键的一部分：任何一项变化都会使旧缓存失效。
+    coarse 只在候选带里检测，结果可能与 full/strip 不同，所以解码模式也算在内。
+    """
+    return {
+        "crop_width": CROP_WIDTH,
+        "lower_green": list(LOWER_GREEN),
+        "upper_green": list(UPPER_GREEN),
+        "merge_gap": MERGE_GAP,
+        "engine": engine,
+        "decode_mode": decode_mode,
+    }
+
+
+def _init_pool_worker():
+    """
+    [进程池初始化] 每个子进程只用单线程跑OpenCV，避免 N 个进程 x M 个线程的超额订阅。
+    """
+    cv2.setNumThreads(1)
+
+
+def _extract_task(
+        img_path: str,
+        decode_mode: str = "full",
+        engine: str = "contour",
+        pdf_dpi: int = PDF_DPI
+) -> Tuple[str, Optional[List[int]], Optional[str]]:
+    """
+    [单图任务] 处理一张图片（或 "xxx.pdf#页码" 表示的一页 PDF），返回 (文件名, [0, ...y, 高度], 错误原因)。
+    失败时不打印，而是把原因带回给主进程统一收集。
+    """
+    try:
+        buf = _read_task(img_path, pdf_dpi)
+    except Exception as e:
+        return os.path.basename(img_path), None, str(e)
+    return _process_buffer(img_path, buf, decode_mode, engine)
+
+
+def _process_buffer(
+        img_path: str,
+        buf: np.ndarray,
+        decode_mode: str = "full",
+        engine: str = "contour"
+) -> Tuple[str, Optional[List[int]], Optional[str]]:
+    """
+    [解码+检测] 对已读入内存的图片字节做解码与检测，返回值同 _extract_task。
+    PDF 页面在读取阶段已经光栅化为窄条（三维数组），直接检测。
+    """
+    filename = os.path.basename(img_path)
+    try:
+        left_strip = buf if buf.ndim == 3 else _decode_left_strip(buf, decode_mode)
+        y_coords, img_height = _detect_green_lines(left_strip, engine)
+    except Exception as e:
+        return filename, None, str(e)
+    return filename, [0] + y_coords + [img_height], None
+
+
+def _iter_serial(
+        image_paths: List[str],
+        decode_mode: str = "full",
+        engine: str = "contour",
+        pdf_dpi: int = PDF_DPI
+):
+    """
+    [串行模式] 逐张处理，保持原有的逐张打印。
+    """
+    for img_path in image_paths:
+        print(f"--- 正在处理: {os.path.basename(img_path)} ---")
+        yield _extract_task(img_path, decode_mode, engine, pdf_dpi)
+
+
+def _expand_tasks(file_paths: List[str], failures: Dict[str, str]) -> List[str]:
+    """
+    把文件列表展开为任务列表：图片原样保留，PDF 按页展开为 "xxx.pdf#1", "xxx.pdf#2", ...
+    打不开的 PDF 记入 failures。
+    """
+    tasks = []
+    for path in file_paths:
+        if not path.lower().endswith(".pdf"):
+            tasks.append(path)
+            continue
+        try:
+            page_count = _pdf_page_count(path)
+        except Exception as e:
+            failures[os.path.basename(path)] = str(e)
+            continue
+        tasks.extend(f"{path}#{page_number}" for page_number in range(1, page_count + 1))
+    return tasks
+
+
+def _file_signature(task_path: str) -> Optional[List[int]]:
+    """任务对应文件（PDF 页取整个 PDF）的 [大小, 修改时间(纳秒)]，用来判断中间结果是否过期；读不到时返回 None。"""
+    try:
+        st = os.stat(_split_pdf_task(task_path)[0])
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _load_partial(partial_path: str, header: Dict[str, Any]) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    读取上次中断留下的中间结果文件。
+
+    Returns:
+        已记录的 {文件名: {"lines": [0, ...y, 高度], "stat": [大小, 修改时间] 或 None}}；
+        文件不存在、或是用不同文件夹/检测参数生成的，返回 None。
+        末尾被截断的半行会从文件中切掉，之后可以直接追加。
+    """
+    if not os.path.isfile(partial_path):
+        return None
+
+    recorded = {}
+    valid_end = 0
+    with open(partial_path, 'rb') as f:
+        first_line = f.readline()
+        try:
+            if json.loads(first_line) != header:
+                return None
+        except json.JSONDecodeError:
+            return None
+        valid_end = f.tell()
+        for line in f:
+            try:
+                record = json.loads(line)
+                recorded[record["file"]] = {"lines": record["lines"], "stat": record.get("stat")}
+            except (json.JSONDecodeError, KeyError, TypeError):
+                break
+            valid_end += len(line)
+
+    with open(partial_path, 'r+b') as f:
+        f.truncate(valid_end)
+    return recorded
+
+
+def _write_json_atomic(output_json_path: str, final_results: Dict[str, List[int]]):
+    """
+    先写临时文件再替换，避免中途失败留下半个 image_info.json。
+    """
+    tmp_path = output_json_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(final_results, f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, output_json_path)
+
+
+def get_images_lines_info(
+        source_folder_path: str,
+        output_folder_path: Optional[str],
+        workers: int = 1,
+        chunk_size: int = 16,
+        decode_mode: str = "full",
+        engine: str = "contour",
+        cache_path: Optional[str] = None,
+        cache_max_bytes: int = DEFAULT_MAX_BYTES,
+        resume: bool = True,
+        io_threads: int = 0,
+        queue_size: int = 16,
+        pdf_dpi: int = PDF_DPI,
+        progress_callback: Optional[Callable[[int, int, Optional[str], Optional[List[int]]], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        cut_folder_path: Optional[str] = None,
+        cut_slips: int = 0,
+        cut_algorithm: Optional[str] = None,
+        cut_mode: str = "auto"
+) -> Dict[str, Any]:
     """
     主执行函数：遍历图片文件夹，处理数据，并在输出文件夹生成JSON结果。
+
+    Args:
+        source_folder_path: 图片所在文件夹。也可以直接放 PDF（需要安装 PyMuPDF）：
+                            每一页在内存中只光栅化左侧窄条，结果的键为 "文件名.pdf#页码"。
+        output_folder_path: 输出文件夹（会生成 image_info.json）。为 None 时不读写任何文件（也就没有断点续跑），
+                            结果放在返回值的 "results" 中，供调用方在内存中直接使用。
+        workers: 进程数。<=1 为串行模式；>1 时用进程池并行执行 extract_image_data 的逻辑。
+                 流水线模式下为解码+检测的线程数。
+        chunk_size: 并行模式下每次派发给子进程的图片数，图片越多可以设得越大以减少调度开销。
+        decode_mode: "full" 整图解码；"strip" 只解码左侧窄条，结果与 "full" 完全一致；
+                     "coarse" 粗到细两遍检测。strip/coarse 需要 PyTurboJPEG，没有时按 "full" 执行
+                     （缓存与断点续跑也按 "full" 记录）。
+        engine: 绿线检测引擎，"contour" 或 "projection"。
+        cache_path: 增量缓存文件（SQLite）路径。设置后只解码新增或改动过的图片。
+        cache_max_bytes: 缓存值的总字节数上限，超出后淘汰最久未用的条目。
+        resume: 每处理完一张图片就追加到输出文件夹的 image_info.partial.jsonl，
+                全部完成后再压缩为 image_info.json。为 True 时，如果发现上次中断留下的中间文件，
+                直接跳过其中已记录、且文件大小与修改时间都没变的图片；为 False 时丢弃旧的中间文件从头开始。
+        io_threads: >0 时启用 读取→解码检测→写出 的流水线模式，该值为预读文件的线程数，
+                    适合图片放在网络盘、读取延迟高的场景。
+        queue_size: 流水线各阶段之间有界队列的容量，决定峰值内存。
+        pdf_dpi: PDF 页面的光栅化分辨率，应与原先导出JPEG时的分辨率一致。
+        progress_callback: 进度回调 (已完成数, 总数, 文件名, [0, ...y, 高度])。开始处理前先以文件名 None 调用一次
+                           （此时的已完成数为断点续跑直接沿用的图片数），之后每完成一张调用一次，失败的图片结果为 None。
+        cancel_event: 设置后在下一张图片处停止，不生成 image_info.json，中间结果文件保留，之后可以断点续跑。
+        cut_folder_path: 设置后顺带切割回单：每张图片得到线坐标后立即用 cut_algorithm 计算各联起始线（联数为 cut_slips），
+                         在后台线程里切成每联一张图片写入该文件夹（见 回单切割.py）。
+        cut_slips: 切割时的联数，<=0 为自动判断。
+        cut_algorithm: 切割时使用的分割算法，None 为默认算法。
+        cut_mode: 见 回单切割.CUT_MODES。
+
+    Returns:
+        处理统计：{"total": 图片总数（PDF 按页计）, "processed": 成功数, "failures": {文件名: 失败原因}}，
+        启用缓存时额外包含 "cache": {"hits": 命中数, "misses": 未命中数}；
+        从中断处恢复时额外包含 "resumed": 直接沿用的图片数；
+        流水线模式额外包含 "pipeline": 各阶段忙碌时间与队列深度；
+        被 cancel_event 取消时额外包含 "cancelled": True；
+        设置 cut_folder_path 时额外包含 "cut": 切割统计（见 回单切割.SlipCutter.close）；
+        output_folder_path 为 None 时额外包含 "results": {文件名: [0, ...y, 高度]}（顺序与 image_info.json 相同）。
+        无论串行还是并行，输出的 image_info.json 内容与顺序都完全一致。
     """
+    summary: Dict[str, Any] = {"total": 0, "processed": 0, "failures": {}}
+
     if not os.path.isdir(source_folder_path):
         print(f"错误：输入文件夹 '{source_folder_path}' 不存在或不是有效目录。")
-        return
+        return summary
 
     print(f">>> 开始处理文件夹: {source_folder_path}")
 
-    supported_formats = ["*.jpg", "*.jpeg", "*.png"]
-    image_paths = []
+    supported_formats = ["*.jpg", "*.jpeg", "*.png", "*.pdf"]
+    file_paths = []
     for fmt in supported_formats:
-        image_paths.extend(glob.glob(os.path.join(source_folder_path, fmt)))
+        file_paths.extend(glob.glob(os.path.join(source_folder_path, fmt)))
 
-    if not image_paths:
+    if not file_paths:
         print("警告：指定文件夹中未找到任何支持的图片文件。")
-        return
+        return summary
 
-    final_results = {}
-    for img_path in sorted(image_paths):
-        filename = os.path.basename(img_path)
-        print(f"--- 正在处理: {filename} ---")
+    failures = summary["failures"]
+    has_pdf = any(p.lower().endswith(".pdf") for p in file_paths)
+    if has_pdf and not pdf_available():
+        print("警告：文件夹中有 PDF，但未安装 PyMuPDF（pip install pymupdf），这些 PDF 将被跳过。")
+    image_paths = _expand_tasks(sorted(file_paths), failures)
+    summary["total"] = len(image_paths)
 
-        y_coords, img_height = extract_image_data(img_path)
-        if y_coords is None or img_height is None:
-            continue
+    decode_mode = _effective_decode_mode(decode_mode)
+    task = partial(_extract_task, decode_mode=decode_mode, engine=engine, pdf_dpi=pdf_dpi)
+
+    if output_folder_path is not None:
+        try:
+            os.makedirs(output_folder_path, exist_ok=True)
+        except OSError as e:
+            print(f"错误：无法创建输出文件夹 '{output_folder_path}'。原因: {e}")
+            return summary
+
+    results = {}
+    path_by_name = {os.path.basename(p): p for p in image_paths}
+
+    # --- 断点续跑：读取上次中断留下的中间结果 ---
+    partial_path = os.path.join(output_folder_path, PARTIAL_FILENAME) if output_folder_path is not None else None
+    header = {"source": os.path.abspath(source_folder_path), "params": detector_params(engine, decode_mode)}
+    if has_pdf:
+        header["pdf_dpi"] = pdf_dpi
+    recorded = _load_partial(partial_path, header) if resume and partial_path else None
+    if recorded is not None:
+        # 只沿用文件大小与修改时间都没变的结果；中断后被替换或编辑过的图片重新提取
+        stale = 0
+        for name, record in recorded.items():
+            if name not in path_by_name:
+                continue
+            if record["stat"] is not None and record["stat"] == _file_signature(path_by_name[name]):
+                results[name] = record["lines"]
+            else:
+                stale += 1
+        summary["resumed"] = len(results)
+        print(f">>> 从中断处恢复：已有 {len(results)} 张图片的结果，直接跳过")
+        if stale:
+            print(f">>> 有 {stale} 张图片在中断后发生了变化（或记录里没有文件信息），将重新提取")
+    cutter = None
+    if cut_folder_path:
+        # 回单切割.py 依赖本模块的JPEG工具函数，这里用到时再导入
+        from .回单切割 import SlipCutter
+        from .算法注册 import get_algorithm
+        try:
+            cut_fn = get_algorithm(cut_algorithm)
+            cutter = SlipCutter(cut_folder_path, cut_mode)
+        except (ValueError, OSError) as e:
+            print(f"错误：无法切割回单。原因: {e}")
+            return summary
+
+    def _cut(filename, lines):
+        # 分割算法在某张图片上出错时只记为这张图片切割失败，不影响线信息的提取
+        try:
+            starts = cut_fn(lines, cut_slips)
+        except Exception as e:
+            cutter.fail(filename, f"分割算法出错: {e}")
+            return
+        cutter.submit(path_by_name[filename], starts)
+
+    if cutter is not None:
+        for name, lines in results.items():
+            _cut(name, lines)
+    cache = None
+    if cache_path:
+        try:
+            cache = ExtractionCache(cache_path, detector_params(engine, decode_mode), cache_max_bytes)
+        except (sqlite3.Error, OSError) as e:
+            print(f"警告：无法打开缓存 '{cache_path}'（{e}），本次不使用缓存。")
+    partial_file = None
+    if partial_path is not None:
+        partial_file = open(partial_path, 'a' if recorded is not None else 'w', encoding='utf-8')
+        if recorded is None:
+            partial_file.write(json.dumps(header, ensure_ascii=False) + "\n")
+            partial_file.flush()
+
+    def _report(filename, final_data):
+        if progress_callback is not None:
+            progress_callback(len(results) + len(failures), summary["total"], filename, final_data)
+
+    def _cancelled():
+        if cancel_event is not None and cancel_event.is_set():
+            summary["cancelled"] = True
+        return summary.get("cancelled", False)
+
+    def _record(filename, final_data):
+        results[filename] = final_data
+        if partial_file is not None:
+            record = {"file": filename, "lines": final_data, "stat": _file_signature(path_by_name[filename])}
+            partial_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            partial_file.flush()
+        if cutter is not None:
+            _cut(filename, final_data)
+        _report(filename, final_data)
 
-        final_data = [0] + y_coords + [img_height]
-        final_results[filename] = final_data
+    def _collect(task_results):
+        for filename, final_data, error in task_results:
+            if error is not None:
+                failures[filename] = error
+                _report(filename, None)
+            else:
+                _record(filename, final_data)
+                if cache is not None:
+                    file_path, member = _cache_key(path_by_name[filename])
+                    cache.put(file_path, final_data, member)
+            if _cancelled():
+                return
+
+    def _cache_key(img_path):
+        file_path, page_number = _split_pdf_task(img_path)
+        return file_path, None if page_number is None else f"{page_number}@{pdf_dpi}"
+
+    _report(None, None)
+    try:
+        pending_paths = [p for p in image_paths if os.path.basename(p) not in results]
+        if cache is not None:
+            uncached_paths = []
+            for img_path in pending_paths:
+                if _cancelled():
+                    break
+                try:
+                    cached = cache.get(*_cache_key(img_path))
+                except OSError:
+                    cached = None
+                if cached is None:
+                    uncached_paths.append(img_path)
+                else:
+                    _record(os.path.basename(img_path), cached)
+            pending_paths = uncached_paths
+            print(f">>> 缓存命中 {cache.hits} 张，需要重新解码 {cache.misses} 张")
+
+        if _cancelled():
+            pending_paths = []
+        if io_threads > 0 and pending_paths:
+            cpu_workers = max(1, workers)
+            print(f">>> 流水线模式: {io_threads} 个读取线程, {cpu_workers} 个计算线程, 队列容量 {queue_size}")
+            pipeline = ExtractionPipeline(
+                read_fn=partial(_read_task, pdf_dpi=pdf_dpi),
+                process_fn=partial(_process_buffer, decode_mode=decode_mode, engine=engine),
+                io_threads=io_threads,
+                cpu_workers=cpu_workers,
+                queue_size=queue_size
+            )
+            try:
+                _collect(pipeline.run(pending_paths))
+            finally:
+                summary["pipeline"] = pipeline.stats()
+        elif workers > 1 and pending_paths:
+            print(f">>> 并行模式: {workers} 个进程, chunk_size={chunk_size}")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker) as executor:
+                # executor.map 按提交顺序返回结果，保证与串行模式输出顺序一致
+                _collect(executor.map(task, pending_paths, chunksize=max(1, chunk_size)))
+                if _cancelled():
+                    executor.shutdown(cancel_futures=True)
+        else:
+            _collect(_iter_serial(pending_paths, decode_mode, engine, pdf_dpi))
+    finally:
+        if partial_file is not None:
+            partial_file.close()
+        if cache is not None:
+            cache.close()
+            summary["cache"] = cache.stats()
+        if cutter is not None:
+            summary["cut"] = cutter.close()
+
+    if _cancelled():
+        summary["processed"] = len(results)
+        if partial_path is not None:
+            print(f"\n已取消：完成 {len(results)} / {summary['total']} 张，中间结果保留在 {partial_path}，可断点续跑。")
+        else:
+            print(f"\n已取消：完成 {len(results)} / {summary['total']} 张。")
+        return summary
+
+    # 按文件名排序输出，缓存命中与新解码的结果混在一起时顺序也保持不变
+    final_results = {name: results[name] for name in path_by_name if name in results}
+    summary["processed"] = len(final_results)
+    if failures:
+        print(f"\n警告：{len(failures)} 张图片无法读取或解码，已跳过（详见返回结果中的 failures）。")
+
+    if partial_path is None:
+        summary["results"] = final_results
+        print(f"\n处理完成！共 {len(final_results)} 张（未写入文件）")
+        return summary
 
     if not final_results:
+        os.remove(partial_path)
         print("\n处理结束，但未成功处理任何图片。")
-        return
+        return summary
 
+    # --- 全部完成：把中间结果压缩为原有的 image_info.json 格式 ---
     output_json_path = os.path.join(output_folder_path, "image_info.json")
     try:
-        os.makedirs(output_folder_path, exist_ok=True)
-        with open(output_json_path, 'w', encoding='utf-8') as f:
-            json.dump(final_results, f, indent=4, ensure_ascii=False)
+        _write_json_atomic(output_json_path, final_results)
+        os.remove(partial_path)
         print(f"\n处理完成！结果已保存至: {os.path.abspath(output_json_path)}")
     except IOError as e:
-        print(f"\n错误：无法写入JSON文件。原因: {e}")
+        print(f"\n错误：无法写入JSON文件（中间结果保留在 {partial_path}）。原因: {e}")
+
+    return summary
+
+
+def benchmark_decode_modes(source_folder_path: str, repeat: int = 3) -> Dict[str, Any]:
+    """
+    对比各解码模式：检查结果是否与 "full" 逐张一致，并报告每秒处理的图片数。
+    """
+    image_paths = sorted(
+        p for fmt in ("*.jpg", "*.jpeg", "*.png") for p in glob.glob(os.path.join(source_folder_path, fmt))
+    )
+    if not image_paths:
+        print("警告：指定文件夹中未找到任何支持的图片文件。")
+        return {}
+
+    # 预先读入内存，只比较解码+检测的耗时，排除磁盘读取的干扰
+    buffers = [_read_image_bytes(p) for p in image_paths]
+    report: Dict[str, Any] = {"images": len(buffers), "strip_available": strip_decode_available()}
+    outputs = {}
+    for mode in DECODE_MODES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs[mode] = [_detect_green_lines(_decode_left_strip(buf, mode)) for buf in buffers]
+        elapsed = time.perf_counter() - start
+        report[f"{mode}_images_per_sec"] = round(len(buffers) * repeat / elapsed, 2)
+
+    for mode in DECODE_MODES[1:]:
+        report[f"{mode}_identical"] = outputs[mode] == outputs["full"]
+        report[f"{mode}_speedup"] = round(report[f"{mode}_images_per_sec"] / report["full_images_per_sec"], 2)
+    print(f"【解码模式对比】{report}")
+    return report
+
+
+def benchmark_detector_engines(source_folder_path: str, repeat: int = 10) -> Dict[str, Any]:
+    """
+    A/B 对比 "contour" 与 "projection" 两个检测引擎：只计检测耗时（窄条预先解码好），
+    报告每秒处理的图片数，以及结果不一致的文件。
+    """
+    image_paths = sorted(
+        p for fmt in ("*.jpg", "*.jpeg", "*.png") for p in glob.glob(os.path.join(source_folder_path, fmt))
+    )
+    if not image_paths:
+        print("警告：指定文件夹中未找到任何支持的图片文件。")
+        return {}
+
+    strips = [_decode_left_strip(_read_image_bytes(p)) for p in image_paths]
+    report: Dict[str, Any] = {"images": len(strips)}
+    outputs = {}
+    for engine in DETECTOR_ENGINES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs[engine] = [_detect_green_lines(strip, engine) for strip in strips]
+        elapsed = time.perf_counter() - start
+        report[f"{engine}_images_per_sec"] = round(len(strips) * repeat / elapsed, 2)
+
+    report["mismatches"] = [
+        os.path.basename(path)
+        for path, a, b in zip(image_paths, outputs["contour"], outputs["projection"]) if a != b
+    ]
+    report["identical"] = not report["mismatches"]
+    print(f"【检测引擎对比】{report}")
+    return report
 
 
 # 脚本主入口
@@ -1,8 +1,14 @@
+import itertools
 import json
 import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional
-# 保留算法导入，根据需要启用
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Iterator, Callable
+# 保留算法导入，根据需要启用（也可以不改代码，直接给 process_and_compare 传 algorithm，见 算法注册.py）
 # from 最大裂谷算法 import find_slip_starts
 # from 簇过滤算法 import find_slip_starts
 # from .均衡分割算法 import find_slip_starts   # 全对了  # 2的联数强制为2全部正确，设置联数=0全错
@@ -13,6 +19,22 @@ from typing import List, Dict, Any, Optional
 # from 稳健间距算法 import find_slip_starts # 自动大部分错，强制联数=2全部正确
 # from 奥卡姆剃刀算法 import find_slip_starts # 自动大部分错，强制联数=2全部正确
 from .结构匹配算法 import find_slip_starts  # 全对了  # 2的联数强制为2全部正确，设置联数=0全错
+from .结构匹配算法 import find_slip_starts_batch, pack_coords
+from .切分记忆 import SlipStartMemo
+from .级联调度 import CascadeScheduler
+from .模板索引 import TemplateIndex
+from .算法注册 import available_algorithms, get_algorithm, get_batch_algorithm, check_params
+
+# 锦标赛模式默认评测的联数设置（0 为自动判断联数）
+TOURNAMENT_SLIPS = (0, 1, 2, 3)
+# 流式评测每次从文件读入的字符数
+STREAM_READ_SIZE = 1 << 20
+# 流式评测时攒够这么多张再整批计算（整批接口比逐张调用快得多，内存仍与文件大小无关）
+STREAM_BATCH_SIZE = 1000
+# 流式评测在控制台最多打印的不一致条目数
+STREAM_MAX_PRINTED_MISMATCHES = 100
+
+_JSON_WHITESPACE = re.compile(r'[ \t\r\n]*')
 
 
 def compare_results(raw_result: List[int], gt_result: List[int] | None) -> Dict[str, Any]:
@@ -44,11 +66,44 @@ def compare_results(raw_result: List[int], gt_result: List[int] | None) -> Dict[
     }
 
 
+def is_correct(result: Dict[str, Any]) -> bool:
+    """compare_results 的结果是否算作正确：Val 为 True 或 [True, True, ...]。"""
+    # all()函数对于空列表返回True，对于[True, False]返回False，对于[True, True]返回True
+    return result["Val"] is True or (isinstance(result["Val"], list) and all(result["Val"]))
+
+
+def _batch_fn_for(
+        slip_fn: Callable,
+        algorithm: Optional[str],
+        memo: Optional[SlipStartMemo],
+        cascade: Optional[CascadeScheduler],
+        params: Dict[str, Any]
+):
+    """整批接口（只接收联数，所以带额外参数时不用）；memo 包装的算法从它所在的模块里找，级联逐张调度没有整批接口。"""
+    if params or (cascade is not None and memo is None):
+        return None
+    if memo is not None:
+        return getattr(sys.modules.get(slip_fn.__module__), "find_slip_starts_batch", None)
+    return find_slip_starts_batch if algorithm is None else get_batch_algorithm(algorithm)
+
+
+def _packed(batch_fn: Optional[Callable]) -> Optional[Callable[[List[List[int]], int], List[List[int]]]]:
+    """把 batch_fn(*pack_coords(坐标列表), 联数) 包装成 SlipStartMemo.batch 需要的 (坐标列表, 联数) 形式。"""
+    if batch_fn is None:
+        return None
+    return lambda coords_list, num_slips: batch_fn(*pack_coords(coords_list), num_slips)
+
+
 def process_and_compare(
         input_json_path: str,
         gt_json_path: str,
         expected_slips: int,
-        output_folder_path: Optional[str] = None
+        output_folder_path: Optional[str] = None,
+        memo: Optional[SlipStartMemo] = None,
+        template_index: Optional[TemplateIndex] = None,
+        algorithm: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        cascade: Optional[CascadeScheduler] = None
 ) -> Dict[str, Dict[str, Any]]:
     """
     核心处理函数：读取JSON文件，调用算法，与GT比较，并按需保存结果。
@@ -58,6 +113,15 @@ def process_and_compare(
         gt_json_path: 标准答案(Ground Truth)JSON文件路径
         expected_slips: 期望分割出的回单联数
         output_folder_path: 结果JSON文件的保存文件夹路径（可选）
+        memo: 可选的记忆化缓存（见 切分记忆.SlipStartMemo），设置后整批经缓存计算（未命中的仍走整批接口），
+              相同或（开启量化时）几乎相同的坐标列表直接复用结果。此时使用 memo 包装的算法，algorithm 不起作用
+        template_index: 可选的模板索引（见 模板索引.TemplateIndex），已知模板且校验通过的图片
+                        直接按模板比例查表，其余图片再走完整算法
+        algorithm: 算法名（如 "聚类拟合算法"，可省略 "算法" 后缀），None 为默认的结构匹配算法。
+                   算法模块第一次用到时才导入，切换算法不需要改代码或重启服务
+        params: 传给算法 find_slip_starts 的额外关键字参数（如 {"engine": "kmeans"}）
+        cascade: 可选的级联调度器（见 级联调度.CascadeScheduler），设置后逐张按成本从低到高尝试各层算法，
+                 algorithm 不起作用；结束时打印各层统计（cascade.stats()）
 
     Returns:
         结构化的比较结果字典
@@ -85,12 +149,43 @@ def process_and_compare(
         print(f"错误：GT文件 {gt_json_path} 格式无效。原因: {e}")
         return {}
 
+    try:
+        if memo is not None:
+            slip_fn = memo.func
+        elif cascade is not None:
+            slip_fn = cascade
+        else:
+            slip_fn = find_slip_starts if algorithm is None else get_algorithm(algorithm)
+        params = check_params(slip_fn, params)
+        # 只有不带额外参数时才走整批接口（整批接口只接收联数）
+        batch_fn = _batch_fn_for(slip_fn, algorithm, memo, cascade, params)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return {}
+
     comparison_results = {}
     run_mode = f"自动判断模式" if expected_slips <= 0 else f"强制 {expected_slips} 联模式"
-    print(f"\n--- 开始处理 ({run_mode}) ---")
+    print(f"\n--- 开始处理 ({run_mode}，算法: {slip_fn.__module__.rsplit('.', 1)[-1]}) ---")
 
+    # 先按模板查表，剩下的整批一次算完（结果与逐张调用 find_slip_starts 完全相同），再逐张与GT比较
+    raw_results = {}
+    if template_index is not None:
+        for filename, data_list in input_data.items():
+            starts = template_index.lookup(filename, data_list, expected_slips)
+            if starts is not None:
+                raw_results[filename] = starts
+    remaining = [filename for filename in input_data if filename not in raw_results]
+    if memo is not None:
+        memo_results = memo.batch([input_data[f] for f in remaining], expected_slips, _packed(batch_fn), **params)
+        raw_results.update(zip(remaining, memo_results))
+    elif batch_fn is not None:
+        batch_results = batch_fn(*pack_coords([input_data[f] for f in remaining]), expected_slips)
+        raw_results.update(zip(remaining, batch_results))
+    else:
+        for filename in remaining:
+            raw_results[filename] = slip_fn(input_data[filename], expected_slips, **params)
     for filename, data_list in input_data.items():
-        raw_result = find_slip_starts(data_list, expected_slips)
+        raw_result = raw_results[filename]
         gt_result = gt_data.get(filename)
         comparison_results[filename] = compare_results(raw_result, gt_result)
         print(f"  > 已处理并比较: {filename}")
@@ -106,9 +201,7 @@ def process_and_compare(
         if isinstance(result["GT"], list):
             total_files += 1
             # 检查Val字段是否为True或[True, True, ...]
-            # all()函数对于空列表返回True，对于[True, False]返回False，对于[True, True]返回True
-            is_correct = result["Val"] is True or (isinstance(result["Val"], list) and all(result["Val"]))
-            if is_correct:
+            if is_correct(result):
                 correct_files += 1
 
     formatted_results = json.dumps(comparison_results, indent=4, ensure_ascii=False)
@@ -120,6 +213,12 @@ def process_and_compare(
         print(f"【准确率统计】: {correct_files} / {total_files} 正确 ({accuracy:.2f}%)")
     else:
         print("【准确率统计】: 未找到可比较的GT数据。")
+    if memo is not None:
+        print(f"【记忆化缓存】: {memo.stats()}")
+    if cascade is not None:
+        print(f"【级联调度】: {cascade.stats()}")
+    if template_index is not None:
+        print(f"【模板索引】: {template_index.stats()}")
     # --- 新增结束 ---
 
 
@@ -134,6 +233,403 @@ def process_and_compare(
 
     return comparison_results
 
+
+def iter_json_items(json_path: str, read_size: int = STREAM_READ_SIZE) -> Iterator[Tuple[str, Any]]:
+    """
+    增量读取顶层为对象的JSON文件，逐个产出 (键, 值)，内存占用只与单个条目的大小有关。
+    文件格式无效时抛出 json.JSONDecodeError。
+    """
+    decoder = json.JSONDecoder()
+    with open(json_path, 'r', encoding='utf-8') as f:
+        buf, pos, eof = "", 0, False
+
+        def more() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            chunk = f.read(read_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+            return not eof
+
+        def skip_ws() -> str:
+            nonlocal pos
+            while True:
+                pos = _JSON_WHITESPACE.match(buf, pos).end()
+                if pos < len(buf) or not more():
+                    return buf[pos] if pos < len(buf) else ""
+
+        def decode() -> Any:
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if more():
+                        continue
+                    raise
+                # 恰好解析到缓冲区末尾时，数字等值可能还没读完整
+                if end == len(buf) and more():
+                    continue
+                pos = end
+                return value
+
+        def expect(chars: str) -> str:
+            nonlocal pos
+            char = skip_ws()
+            if not char or char not in chars:
+                raise json.JSONDecodeError(f"此处应为 {' 或 '.join(repr(c) for c in chars)}", buf, pos)
+            pos += 1
+            return char
+
+        expect("{")
+        if skip_ws() == "}":
+            pos += 1
+        else:
+            while True:
+                skip_ws()
+                key = decode()
+                if not isinstance(key, str):
+                    raise json.JSONDecodeError("此处应为字符串键", buf, pos)
+                expect(":")
+                skip_ws()
+                yield key, decode()
+                if expect(",}") == "}":
+                    break
+        if skip_ws():
+            raise json.JSONDecodeError("JSON对象之后还有多余内容", buf, pos)
+
+
+def _iter_gt_lookup(gt_json_path: str) -> Callable[[str], Optional[List[int]]]:
+    """
+    按文件名顺序查GT：输入与GT的条目顺序一致时（通常如此），GT也只需边读边用；
+    顺序不一致时先读到的条目暂存起来，最坏情况退化为整份GT在内存中。
+    GT文件不存在时总是返回 None。
+    """
+    if not os.path.isfile(gt_json_path):
+        print(f"警告：GT文件不存在 -> {gt_json_path}。将无法进行比较。")
+        return lambda filename: None
+    items = iter_json_items(gt_json_path)
+    pending: Dict[str, Any] = {}
+
+    def lookup(filename: str) -> Optional[List[int]]:
+        if filename in pending:
+            return pending.pop(filename)
+        for key, value in items:
+            if key == filename:
+                return value
+            pending[key] = value
+        return None
+
+    return lookup
+
+
+def process_and_compare_streaming(
+        input_json_path: str,
+        gt_json_path: str,
+        expected_slips: int,
+        output_folder_path: Optional[str] = None,
+        memo: Optional[SlipStartMemo] = None,
+        template_index: Optional[TemplateIndex] = None,
+        algorithm: Optional[str] = None,
+        params: Optional[Dict[str, Any]] = None,
+        cascade: Optional[CascadeScheduler] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        max_printed_mismatches: int = STREAM_MAX_PRINTED_MISMATCHES,
+        progress_callback: Optional[Callable[[int, Optional[int], Optional[str], Optional[Dict[str, Any]]], None]] = None,
+        cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    process_and_compare 的流式版本，适合十万张以上的大批量评测：边读输入JSON边计算，
+    每条比较结果算出即写入结果文件，内存中只保留正确率计数，不再攒下全部结果。
+    结果文件与 process_and_compare 写出的逐字节相同；控制台只打印不一致的条目和统计。
+
+    参数含义同 process_and_compare，另有：
+        batch_size: 攒够多少张后整批计算一次
+        max_printed_mismatches: 控制台最多打印多少条不一致的条目（全部记录都在结果文件里）
+        progress_callback: 进度回调 (已完成数, None, 文件名, 比较结果 {"raw", "GT", "Val"})，
+                           每完成一张调用一次（流式读取时总数未知）
+        cancel_event: 设置后在当前这批算完后停止，不生成结果文件
+
+    Returns:
+        统计信息字典（processed / total / correct / accuracy / mismatches / output_path），
+        设置 memo / cascade 时额外包含 "memo" / "cascade": 缓存统计 / 各层统计，被取消时额外包含 "cancelled": True，输入或GT文件无效时返回空字典
+    """
+    input_path = Path(input_json_path)
+    full_output_path = Path(output_folder_path) / f"{input_path.stem}_comparison_results.json" if output_folder_path else None
+    if not input_path.is_file():
+        print(f"错误：无法读取输入文件 {input_path}。原因: 文件不存在")
+        return {}
+
+    try:
+        if memo is not None:
+            slip_fn = memo.func
+        elif cascade is not None:
+            slip_fn = cascade
+        else:
+            slip_fn = find_slip_starts if algorithm is None else get_algorithm(algorithm)
+        params = check_params(slip_fn, params)
+        batch_fn = _batch_fn_for(slip_fn, algorithm, memo, cascade, params)
+    except ValueError as e:
+        print(f"错误：{e}")
+        return {}
+
+    run_mode = f"自动判断模式" if expected_slips <= 0 else f"强制 {expected_slips} 联模式"
+    print(f"\n--- 开始流式处理 ({run_mode}，算法: {slip_fn.__module__.rsplit('.', 1)[-1]}) ---")
+
+    def compute(batch: List[Tuple[str, List[int]]]) -> List[List[int]]:
+        results: List[Optional[List[int]]] = [None] * len(batch)
+        remaining = []
+        for i, (filename, data_list) in enumerate(batch):
+            if template_index is not None:
+                results[i] = template_index.lookup(filename, data_list, expected_slips)
+            if results[i] is None:
+                remaining.append(i)
+        if memo is not None and remaining:
+            memo_results = memo.batch([batch[i][1] for i in remaining], expected_slips, _packed(batch_fn), **params)
+            for i, raw_result in zip(remaining, memo_results):
+                results[i] = raw_result
+        elif batch_fn is not None and remaining:
+            batch_results = batch_fn(*pack_coords([batch[i][1] for i in remaining]), expected_slips)
+            for i, raw_result in zip(remaining, batch_results):
+                results[i] = raw_result
+        else:
+            for i in remaining:
+                results[i] = slip_fn(batch[i][1], expected_slips, **params)
+        return results
+
+    # 与 json.dumps(全部结果, indent=4) 的排版一致：每条缩进一层
+    encoder = json.JSONEncoder(indent=4, ensure_ascii=False)
+    processed = total_files = correct_files = mismatches = 0
+    tmp_path = full_output_path.with_name(full_output_path.name + ".tmp") if full_output_path else None
+    out = None
+    try:
+        gt_lookup = _iter_gt_lookup(gt_json_path)
+        if tmp_path:
+            tmp_path.parent.mkdir(parents=True, exist_ok=True)
+            out = open(tmp_path, 'w', encoding='utf-8')
+            out.write("{")
+        items = iter_json_items(str(input_path))
+        cancelled = False
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                cancelled = True
+                break
+            batch = list(itertools.islice(items, batch_size))
+            if not batch:
+                break
+            for (filename, _), raw_result in zip(batch, compute(batch)):
+                result = compare_results(raw_result, gt_lookup(filename))
+                if out is not None:
+                    value = encoder.encode(result).replace("\n", "\n    ")
+                    out.write(f'{"," if processed else ""}\n    {encoder.encode(filename)}: {value}')
+                processed += 1
+                if progress_callback is not None:
+                    progress_callback(processed, None, filename, result)
+                # 只有当GT存在时才计入统计
+                if isinstance(result["GT"], list):
+                    total_files += 1
+                    if is_correct(result):
+                        correct_files += 1
+                        continue
+                mismatches += 1
+                if mismatches <= max_printed_mismatches:
+                    print(f"  ✗ {filename}: raw={result['raw']} GT={result['GT']}")
+        if cancelled:
+            # 临时文件由 finally 删除
+            full_output_path = None
+            print(f"\n已取消：已处理 {processed} 张，不生成结果文件。")
+        elif out is not None:
+            out.write("\n}" if processed else "}")
+            out.close()
+            out = None
+            os.replace(tmp_path, full_output_path)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"错误：流式处理在第 {processed + 1} 条附近中断。原因: {e}")
+        return {}
+    finally:
+        # 取消、出错或算法抛出异常时不留下半截的临时文件；正常完成时临时文件已经改名
+        if out is not None:
+            out.close()
+        if tmp_path and tmp_path.exists():
+            tmp_path.unlink()
+
+    if mismatches > max_printed_mismatches:
+        print(f"  ……另有 {mismatches - max_printed_mismatches} 条不一致未打印，见结果文件")
+    print("-" * 25)  # 分隔线
+    accuracy = round(correct_files / total_files * 100, 2) if total_files else None
+    print(f"【处理统计】: 共 {processed} 张，不一致或无GT {mismatches} 张")
+    if total_files > 0:
+        print(f"【准确率统计】: {correct_files} / {total_files} 正确 ({accuracy:.2f}%)")
+    else:
+        print("【准确率统计】: 未找到可比较的GT数据。")
+    if memo is not None:
+        print(f"【记忆化缓存】: {memo.stats()}")
+    if cascade is not None:
+        print(f"【级联调度】: {cascade.stats()}")
+    if template_index is not None:
+        print(f"【模板索引】: {template_index.stats()}")
+    if full_output_path:
+        print(f"\n结果已保存至: {full_output_path.resolve()}")
+
+    summary = {
+        "processed": processed,
+        "total": total_files,
+        "correct": correct_files,
+        "accuracy": accuracy,
+        "mismatches": mismatches,
+        "output_path": str(full_output_path.resolve()) if full_output_path else None,
+    }
+    if memo is not None:
+        summary["memo"] = memo.stats()
+    if cascade is not None:
+        summary["cascade"] = cascade.stats()
+    if cancelled:
+        summary["cancelled"] = True
+    return summary
+
+
+# 评测子进程共享的 [(坐标列表, GT或None), ...]，由进程池的 initializer 每个进程只传一次
+_evaluation_records: List[Tuple[List[int], Optional[List[int]]]] = []
+
+
+def load_evaluation_records(input_json_path: str, gt_json_path: str) -> Optional[List[Tuple[List[int], Optional[List[int]]]]]:
+    """读取输入与GT，返回 [(坐标列表, GT或None), ...]；输入或GT文件无效时返回 None。"""
+    try:
+        with open(input_json_path, 'r', encoding='utf-8') as f:
+            input_data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError) as e:
+        print(f"错误：无法读取输入文件 {input_json_path}。原因: {e}")
+        return None
+    try:
+        with open(gt_json_path, 'r', encoding='utf-8') as f:
+            gt_data = json.load(f)
+    except FileNotFoundError:
+        print(f"警告：GT文件不存在 -> {gt_json_path}。只统计耗时。")
+        gt_data = {}
+    except json.JSONDecodeError as e:
+        print(f"错误：GT文件 {gt_json_path} 格式无效。原因: {e}")
+        return None
+    return [(coords, gt_data.get(filename)) for filename, coords in input_data.items()]
+
+
+def init_evaluation_worker(records: List[Tuple[List[int], Optional[List[int]]]]):
+    """进程池 initializer：把评测数据放进子进程的全局变量（workers=1 时也在当前进程中调用一次）。"""
+    global _evaluation_records
+    _evaluation_records = records
+
+
+def evaluate_algorithm(
+        algorithm: str,
+        expected_slips: int,
+        params: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """[子进程] 用一个算法（及其参数）、一种联数设置跑完全部图片，统计正确数与耗时。"""
+    slip_fn = get_algorithm(algorithm)
+    params = params or {}
+    correct = total = errors = 0
+    elapsed = 0.0
+    for coords, gt_result in _evaluation_records:
+        start = time.perf_counter()
+        try:
+            raw_result = slip_fn(coords, expected_slips, **params)
+        except Exception:
+            raw_result = None
+            errors += 1
+        elapsed += time.perf_counter() - start
+        # 只有当GT存在时才计入统计
+        if gt_result is None:
+            continue
+        total += 1
+        if raw_result is not None and is_correct(compare_results(raw_result, gt_result)):
+            correct += 1
+
+    calls = len(_evaluation_records)
+    return {
+        "correct": correct,
+        "total": total,
+        "accuracy": round(correct / total * 100, 2) if total else None,
+        "errors": errors,
+        "mean_ms": round(elapsed / calls * 1000, 4) if calls else None,
+    }
+
+
+def run_tournament(
+        input_json_path: str,
+        gt_json_path: str,
+        slips_settings: Sequence[int] = TOURNAMENT_SLIPS,
+        algorithms: Optional[Sequence[str]] = None,
+        workers: Optional[int] = None,
+        output_folder_path: Optional[str] = None
+) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """
+    锦标赛模式：输入和GT只读一次，所有算法 x 所有联数设置在进程池里并行评测，输出一张准确率/耗时矩阵。
+    不再需要为了对比算法反复改导入、反复跑整个工作流。
+
+    Args:
+        input_json_path: 输入的坐标信息JSON文件路径
+        gt_json_path: 标准答案(Ground Truth)JSON文件路径
+        slips_settings: 要评测的联数设置
+        algorithms: 参赛算法名，None 为 算法注册 扫描到的全部可用算法
+        workers: 进程数，None 为 CPU 核数，1 为在当前进程中串行执行
+        output_folder_path: 结果JSON文件的保存文件夹路径（可选）
+
+    Returns:
+        {算法名: {联数: {"correct", "total", "accuracy", "errors", "mean_ms"}}}
+    """
+    input_path = Path(input_json_path)
+    records = load_evaluation_records(input_json_path, gt_json_path)
+    if records is None:
+        return {}
+
+    # 不能用于分割的模块（例如没有 find_slip_starts 的）直接跳过
+    entrants = []
+    for name in (algorithms if algorithms is not None else available_algorithms()):
+        try:
+            entrants.append(get_algorithm(name).__module__.rsplit('.', 1)[-1])
+        except ValueError as e:
+            print(f"跳过: {e}")
+
+    tasks = [(name, slips) for name in entrants for slips in slips_settings]
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    print(f"\n--- 锦标赛: {len(entrants)} 个算法 x {len(slips_settings)} 种联数设置，{len(records)} 张图片，{workers} 个进程 ---")
+
+    matrix: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in entrants}
+    if workers <= 1:
+        init_evaluation_worker(records)
+        outcomes = [evaluate_algorithm(name, slips) for name, slips in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_evaluation_worker, initargs=(records,)) as executor:
+            futures = [executor.submit(evaluate_algorithm, name, slips) for name, slips in tasks]
+            outcomes = [future.result() for future in futures]
+    for (name, slips), cell in zip(tasks, outcomes):
+        matrix[name][slips] = cell
+
+    # 矩阵打印：每格为 准确率% / 平均每张耗时ms
+    header = f"{'算法':<12}" + "".join(f"{'联数=' + str(slips):>20}" for slips in slips_settings)
+    print(header)
+    for name in entrants:
+        cells = []
+        for slips in slips_settings:
+            cell = matrix[name][slips]
+            accuracy = "-" if cell["accuracy"] is None else f"{cell['accuracy']:.1f}%"
+            errors = f"(异常{cell['errors']})" if cell["errors"] else ""
+            cells.append(f"{accuracy + errors + ' / ' + format(cell['mean_ms'] or 0, '.3f') + 'ms':>20}")
+        print(f"{name:<12}" + "".join(cells))
+
+    if output_folder_path:
+        full_output_path = Path(output_folder_path) / f"{input_path.stem}_tournament_results.json"
+        try:
+            full_output_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(full_output_path, 'w', encoding='utf-8') as f:
+                json.dump(matrix, f, indent=4, ensure_ascii=False)
+            print(f"\n锦标赛结果已保存至: {full_output_path.resolve()}")
+        except IOError as e:
+            print(f"\n错误：无法写入结果文件 -> {full_output_path}。原因: {e}")
+
+    return matrix
+
+
 def main():
     """主入口函数，设置默认配置并调用核心处理函数"""
     # ==================== 用户配置区 ====================
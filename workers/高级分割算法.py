@@ -1,9 +1,23 @@
+import json
+import time
 import numpy as np
-import ruptures as rpt
-from typing import List
+from typing import List, Dict, Any, Tuple
 
+from .变化点检测 import detect_changepoints, sum_of_costs
 
-def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+# 惩罚模式的惩罚值 = PENALTY_SCALE x log(n) x σ²，越大找到的变化点越少
+PENALTY_SCALE = 1.0
+# 自动判断联数时最多的分割点数（回单最多3联）
+MAX_AUTO_BREAKPOINTS = 2
+
+
+def find_slip_starts(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        method: str = "exact",
+        cost: str = "l2",
+        penalty_scale: float = PENALTY_SCALE
+) -> List[int]:
     """
     使用 "变化点检测" 算法，自动识别并找出回单的起始线。
 
@@ -13,50 +27,58 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     Args:
         coords_with_boundaries: 一个已排序的坐标列表。
         num_slips: 在此算法中，此参数被用作一个参考上限。
-                   如果<=0, 则由算法自由寻找最佳分割点（最多3个）。
+                   如果<=0, 则用惩罚项自由寻找分割点，最多 MAX_AUTO_BREAKPOINTS 个（即最多3联）；
+                   惩罚项找到更多时，改取成本最低的 MAX_AUTO_BREAKPOINTS 个分割点。
                    如果>0, 则算法最多寻找 num_slips-1 个分割点。
+        method: 变化点搜索方法，"exact"（动态规划，全局最优）或 "binseg"（二分分割，更快）。
+        cost: 段成本，"l2"（均值变化）或 "l1"（中位数，对离群间距更稳健）。
+        penalty_scale: 惩罚值的缩放系数，默认 PENALTY_SCALE。
 
     Returns:
         一个包含每个回单联起始线y坐标的有序列表。
     """
+    return find_slip_starts_scored(coords_with_boundaries, num_slips, method, cost, penalty_scale)[0]
+
+
+def find_slip_starts_scored(
+        coords_with_boundaries: List[int],
+        num_slips: int,
+        method: str = "exact",
+        cost: str = "l2",
+        penalty_scale: float = PENALTY_SCALE
+) -> Tuple[List[int], float]:
+    """
+    与 find_slip_starts 相同，额外返回置信度（0~1，越大越可靠）：
+    找到变化点时，为分段后间距信号成本相对不分段时的下降比例；
+    没有找到变化点时，为 1 - 最佳单个变化点能带来的下降比例。
+    """
     actual_lines = coords_with_boundaries[1:-1]
     if not actual_lines:
-        return []
+        return [], 1.0
 
     # 如果只有一条或两条线，无法形成有意义的间距信号
     if len(actual_lines) <= 2:
-        return [actual_lines[0]]
+        return [actual_lines[0]], 1.0
 
     # 1. 将“坐标”转换为“间距”信号
     # np.diff() 会计算相邻元素的差值，这正是我们关心的“间距”
     gaps = np.diff(actual_lines)
 
-    # 2. 初始化变化点检测算法 (PELT)
-    # model="rbf": 使用径向基函数模型，对均值变化（即间距大小变化）很敏感。
-    # min_size=1: 允许的最小段落长度为1。
-    # jump=1: 每次跳跃1个数据点进行搜索，保证精度。
-    algo = rpt.Pelt(model="rbf", min_size=1, jump=1)
-
-    # 3. 传入信号并进行拟合
-    # pen: 惩罚值。值越大，找到的变化点越少。
-    #      我们可以通过尝试1,2,3联的总线数来动态寻找一个合理的惩罚值，
-    #      但通常一个基于数据标准差的经验值效果很好。
-    #      这里我们用一个更简单的方法：直接限定最多找几个点。
-    algo.fit(gaps)
-
-    # 4. 预测变化点
+    # 2. 变化点检测：代价由前缀和 O(1) 得到（见 变化点检测.py），不再依赖 ruptures 的 rbf 核
     # 我们知道联数最多3联，即分割点最多2个。
-    # 如果用户指定了联数，我们也遵从那个上限。
-    max_breaks = (num_slips - 1) if num_slips > 1 else 2
-
-    try:
-        # predict方法可以接受一个目标数量 n_bkps
-        result_indices = algo.predict(n_bkps=max_breaks)
-    except Exception:
-        # 如果数据太少或分布极端，可能找不到那么多分割点，这里做个保护
-        # 使用 pen (惩罚项) 进行预测，通常更稳健
-        penalty = np.log(len(gaps)) * np.std(gaps) ** 2  # 经验惩罚值
-        result_indices = algo.predict(pen=penalty)
+    # 如果用户指定了联数，就直接找 num_slips-1 个变化点。
+    penalty = np.log(len(gaps)) * np.std(gaps) ** 2 * penalty_scale  # 经验惩罚值（即 L2 成本下经典的 σ²·log(n)）
+    if num_slips > 1:
+        try:
+            result_indices = detect_changepoints(gaps, n_bkps=num_slips - 1, cost=cost, method=method)
+        except ValueError:
+            # 如果数据太少，找不到那么多分割点，这里做个保护：改用惩罚项模式
+            result_indices = detect_changepoints(gaps, penalty=penalty, cost=cost, method=method)
+    else:
+        result_indices = detect_changepoints(gaps, penalty=penalty, cost=cost, method=method)
+        if len(result_indices) - 1 > MAX_AUTO_BREAKPOINTS:
+            # 线条很多、噪声较大时惩罚项会切出过多的段；回单最多3联，改取最优的2个分割点
+            result_indices = detect_changepoints(gaps, n_bkps=MAX_AUTO_BREAKPOINTS, cost=cost, method=method)
 
     # result_indices 返回的是分割点在 gaps 数组中的索引。
     # 例如，[180] 意味着在 gaps[180] 之后发生了变化。
@@ -71,4 +93,81 @@ def find_slip_starts(coords_with_boundaries: List[int], num_slips: int) -> List[
     # 5. 最终结果总是包含第一条线
     final_starts = sorted(list(set([actual_lines[0]] + start_line_coords)))
 
-    return final_starts
\ No newline at end of file
+    whole = sum_of_costs(gaps, [len(gaps)], cost)
+    if whole <= 0:
+        return final_starts, 1.0
+    if len(result_indices) > 1:
+        confidence = 1 - sum_of_costs(gaps, result_indices, cost) / whole
+    else:
+        best_single = detect_changepoints(gaps, n_bkps=1, cost=cost, method=method)
+        confidence = sum_of_costs(gaps, best_single, cost) / whole
+    return final_starts, float(min(1.0, max(0.0, confidence)))
+
+
+def _find_slip_starts_ruptures(coords_with_boundaries: List[int], num_slips: int) -> List[int]:
+    """
+    [仅供对比] 改写前基于 ruptures Pelt(rbf) 的实现，需要另外安装 ruptures。
+    """
+    import ruptures as rpt
+
+    actual_lines = coords_with_boundaries[1:-1]
+    if not actual_lines:
+        return []
+    if len(actual_lines) <= 2:
+        return [actual_lines[0]]
+
+    gaps = np.diff(actual_lines)
+    algo = rpt.Pelt(model="rbf", min_size=1, jump=1)
+    algo.fit(gaps)
+    max_breaks = (num_slips - 1) if num_slips > 1 else 2
+    try:
+        result_indices = algo.predict(n_bkps=max_breaks)
+    except Exception:
+        penalty = np.log(len(gaps)) * np.std(gaps) ** 2
+        result_indices = algo.predict(pen=penalty)
+    break_points_in_gaps = [idx for idx in result_indices if idx < len(gaps)]
+    start_line_coords = [actual_lines[i] for i in break_points_in_gaps]
+    return sorted(list(set([actual_lines[0]] + start_line_coords)))
+
+
+def benchmark_against_ruptures(input_json_path: str, gt_json_path: str, expected_slips: int = 0) -> Dict[str, Any]:
+    """
+    对比内置变化点引擎（各搜索方法 x 成本函数）与原 ruptures 实现：准确率与每张图片的平均耗时。
+    未安装 ruptures 时只报告内置引擎。
+    """
+    with open(input_json_path, 'r', encoding='utf-8') as f:
+        input_data = json.load(f)
+    with open(gt_json_path, 'r', encoding='utf-8') as f:
+        gt_data = json.load(f)
+
+    variants = {
+        f"{method}-{cost}": (lambda coords, n, m=method, c=cost: find_slip_starts(coords, n, method=m, cost=c))
+        for method in ("exact", "binseg") for cost in ("l2", "l1")
+    }
+    try:
+        import ruptures  # noqa: F401
+        variants["ruptures-pelt-rbf"] = _find_slip_starts_ruptures
+    except ImportError:
+        print("提示：未安装 ruptures，只报告内置引擎。")
+
+    report = {}
+    for name, func in variants.items():
+        correct = total = 0
+        start = time.perf_counter()
+        outputs = {filename: func(coords, expected_slips) for filename, coords in input_data.items()}
+        elapsed = time.perf_counter() - start
+        for filename, raw in outputs.items():
+            gt = gt_data.get(filename)
+            if isinstance(gt, list) and len(gt) >= 3:
+                total += 1
+                correct += raw == gt[1:-1]
+        report[name] = {
+            "accuracy": f"{correct} / {total}",
+            "ms_per_image": round(elapsed * 1000 / max(1, len(input_data)), 3),
+        }
+        print(f"【{name}】准确率 {correct} / {total}，平均每张 {report[name]['ms_per_image']} ms")
+    return report
+
+
+if __name__ == "__main__":
+    benchmark_against_ruptures('../data/image_info.json', '../data/image_GT.json', expected_slips=0)